@@ -1,17 +1,36 @@
+import math
 import os
-import requests
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+# Started before the other imports so the startup report includes them
+from startup_timer import StartupTimer
+startup = StartupTimer(budget_ms=int(os.environ.get('STARTUP_BUDGET_MS', 1500)))
+import json
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, Response
 from flask_cors import CORS
 from forms import LoginForm
 from flask_bcrypt import Bcrypt
 from functools import wraps
-from flask_pymongo import PyMongo
 from forms import RegistrationForm
 from datetime import datetime, timezone, timedelta
-from pymongo import MongoClient
 from bson import ObjectId
 from dotenv import load_dotenv
-from flask_mail import Mail, Message
+from flask_mail import Mail
+from result_cache import ResultCache
+from database import DatabaseUnavailable, LazyMongo
+from db_indexes import ensure_indexes
+from content_store import put_content, quiz_texts
+from quiz_model import grade, parse_quiz_text, public_quiz, render_question_text, render_quiz_text
+from quiz_pipeline import (
+    BATCH_MAX_STORIES, backend_router, generate_batch, generate_quiz, result_cache, stream_free_response
+)
+from user_stats import get_user_stats, record_quiz_created, record_score
+from leaderboard import PERIOD_DAYS, activity, record_daily_quiz, record_daily_score, top_players
+from password_hasher import HasherBusy, PasswordHasher
+from rate_limiter import NegativeCache, TokenBucketLimiter
+from job_queue import JobQueue, DONE, FAILED
+from mail_outbox import MailOutbox, SMTPTransport
+from concurrency_limiter import ConcurrencyLimiter, LimiterFull
+
+startup.mark('imports')
 
 load_dotenv()
 app = Flask(__name__)
@@ -39,8 +58,32 @@ def to_ist_filter(dt):
 if os.environ.get('FLASK_ENV') == 'production' and not os.environ.get('SECRET_KEY'):
     raise ValueError("SECRET_KEY must be set in production environment")
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+# Password hashing runs on a small process pool; BCRYPT_ROUNDS is the work factor for new hashes
+password_hasher = PasswordHasher.from_env()
+app.config['BCRYPT_LOG_ROUNDS'] = password_hasher.rounds
 bcrypt = Bcrypt(app)
 
+# Login/register throttling, shared by all workers (created pre-fork like the circuit breakers).
+# Only failures cost tokens: every attempt takes one from the client IP (and a login one from
+# the username) up front and successes get it back. A classroom signing in from one NAT
+# address is never throttled for succeeding.
+auth_ip_limiter = TokenBucketLimiter.per_minute(
+    'auth-ip',
+    per_minute=float(os.environ.get('AUTH_IP_PER_MINUTE', 10)),
+    burst=int(os.environ.get('AUTH_IP_BURST', 20))
+)
+login_user_limiter = TokenBucketLimiter.per_minute(
+    'login-user',
+    per_minute=float(os.environ.get('LOGIN_FAILURES_PER_MINUTE', 2)),
+    burst=int(os.environ.get('LOGIN_FAILURE_BURST', 5))
+)
+# Usernames that recently did not exist: further logins for them skip MongoDB and bcrypt
+unknown_users = NegativeCache(ttl=float(os.environ.get('UNKNOWN_USER_TTL', 60)))
+
+# Requests that wait on quiz generation may hold only this many of a worker's threads,
+# so pages and login always have threads left (worker_sizing.py sizes the pool)
+generation_limiter = ConcurrencyLimiter.from_env()
+
 # Email configuration
 app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
 app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
@@ -53,57 +96,27 @@ mail = Mail(app)
 
 # MongoDB Configuration
 mongo_uri = os.environ.get("MONGO_URI")
-mongo = None
-mongo_connected = False
-
-if not mongo_uri:
+if os.environ.get('FLASK_ENV') == 'production' and not mongo_uri:
     raise ValueError("MONGO_URI must be set in environment variables. Please check your .env file.")
+if mongo_uri and not mongo_uri.startswith(('mongodb://', 'mongodb+srv://')):
+    raise ValueError("Invalid MongoDB URI format. Must start with 'mongodb://' or 'mongodb+srv://'")
 
+# Connects on first use in each process (see /readyz), never at import
+mongo = LazyMongo(app, mongo_uri, timeout_ms=int(os.environ.get('MONGO_TIMEOUT_MS', 5000)))
 
-try:
-    print(">>> Starting MongoDB connection...")
-    
-    # Validate URI format before attempting connection
-    if not mongo_uri.startswith(('mongodb://', 'mongodb+srv://')):
-        raise ValueError("Invalid MongoDB URI format. Must start with 'mongodb://' or 'mongodb+srv://'")
-    
-    # Set the URI in Flask config
-    app.config["MONGO_URI"] = mongo_uri
-    
-    # Initialize PyMongo
-    mongo = PyMongo()
-    mongo.init_app(app)
-    
-    # Ensure mongo object is properly initialized
-    if mongo is None:
-        raise Exception("PyMongo initialization returned None")
-    
-    if not hasattr(mongo, 'db'):
-        raise Exception("PyMongo object missing 'db' attribute")
-    
-    # Test the connection with timeout
-    print(">>> Testing MongoDB connection...")
-    result = mongo.db.command('ping')
-    if result.get('ok') != 1:
-        raise Exception("MongoDB ping failed")
-    
-    mongo_connected = True
-    print(">>> Database connected successfully")
-    
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    print("Please verify:")
-    print("1. Your .env file exists and contains MONGO_URI")
-    print("2. MongoDB Atlas cluster is running")
-    print("3. Network access is configured (0.0.0.0/0)")
-    print("4. Database user has proper permissions")
-    raise
-
-# Only create test user in development and if MongoDB is connected
-if os.environ.get('FLASK_ENV') != 'production' and mongo_connected:
-    if not mongo.db.users.find_one({"username": "testuser"}):
+# Share generated quizzes across workers through MongoDB
+@mongo.on_connect
+def attach_result_cache(db):
+    result_cache.attach(db.generation_cache)
+
+# Only create test user in development
+@mongo.on_connect
+def seed_test_user(db):
+    if os.environ.get('FLASK_ENV') != 'production' and not db.users.find_one({"username": "testuser"}):
         hashed_pw = bcrypt.generate_password_hash("testpass").decode('utf-8')
-        mongo.db.users.insert_one({"username": "testuser", "password": hashed_pw})
+        db.users.insert_one({"username": "testuser", "password": hashed_pw})
+
+startup.mark('config')
 
 def login_required(f):
     @wraps(f)
@@ -119,483 +132,10 @@ def login_required(f):
 def favicon():
     return '', 204  # No Content response
 
-# Hugging Face API configuration for better models
-HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"  # Better for summarization
-HUGGINGFACE_QA_URL = "https://api-inference.huggingface.co/models/google/flan-t5-large"  # Better for Q&A generation
-
-def generate_free_response(story_text):
-    """Generate summary and quiz using Hugging Face's AI models"""
-    try:
-        api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
-        
-        if not api_key:
-            # If no API key, use a more intelligent fallback
-            return generate_smart_fallback(story_text)
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        # Step 1: Generate summary using BART model
-        summary = ""
-        try:
-            summary_response = requests.post(
-                HUGGINGFACE_API_URL,
-                headers=headers,
-                json={
-                    "inputs": story_text,
-                    "parameters": {
-                        "max_length": 150,
-                        "min_length": 30,
-                        "do_sample": False
-                    }
-                },
-                timeout=30
-            )
-            
-            if summary_response.status_code == 200:
-                summary_result = summary_response.json()
-                if isinstance(summary_result, list) and len(summary_result) > 0:
-                    summary = summary_result[0].get('summary_text', '')
-                elif isinstance(summary_result, dict):
-                    summary = summary_result.get('summary_text', '')
-        except Exception as e:
-            print(f"Summary generation error: {e}")
-        
-        # Step 2: Generate quiz questions using FLAN-T5
-        quiz_prompt = f"""Based on this story, create 5 multiple choice questions with 4 options each. 
-
-Story: {story_text[:1500]}  # Limit story length for API
-
-Generate questions that test comprehension of:
-1. Main characters and their roles
-2. Key plot events
-3. Setting and time period
-4. Central conflict or problem
-5. Theme or moral of the story
-
-Format each question with options A, B, C, D and indicate the correct answer."""
-        
-        quiz_questions = []
-        try:
-            quiz_response = requests.post(
-                HUGGINGFACE_QA_URL,
-                headers=headers,
-                json={
-                    "inputs": quiz_prompt,
-                    "parameters": {
-                        "max_length": 500,
-                        "temperature": 0.7,
-                        "top_p": 0.9
-                    }
-                },
-                timeout=30
-            )
-            
-            if quiz_response.status_code == 200:
-                quiz_result = quiz_response.json()
-                if isinstance(quiz_result, list) and len(quiz_result) > 0:
-                    quiz_text = quiz_result[0].get('generated_text', '')
-                elif isinstance(quiz_result, dict):
-                    quiz_text = quiz_result.get('generated_text', '')
-                
-                # Parse the generated quiz text
-                if quiz_text:
-                    quiz_questions = parse_quiz_from_text(quiz_text, story_text)
-        except Exception as e:
-            print(f"Quiz generation error: {e}")
-        
-        # If we didn't get good results, use intelligent fallback
-        if not summary or len(quiz_questions) < 5:
-            return generate_smart_fallback(story_text)
-        
-        # Format the final response
-        quiz_formatted = format_quiz_questions(quiz_questions)
-        return f"SUMMARY:\n{summary}\n\n{quiz_formatted}"
-        
-    except Exception as e:
-        print(f"Error in generate_free_response: {e}")
-        return generate_smart_fallback(story_text)
-
-def generate_smart_fallback(story_text):
-    """Generate story-specific summary and quiz questions"""
-    import random
-    
-    # Extract key information from the story
-    sentences = [s.strip() for s in story_text.split('.') if s.strip()]
-    words = story_text.split()
-    lower_text = story_text.lower()
-    
-    # Create a contextual summary
-    if len(sentences) >= 3:
-        # Take key sentences: beginning, important middle, and end
-        summary_parts = []
-        summary_parts.append(sentences[0])
-        
-        # Find sentences with action verbs or important keywords
-        action_words = ['went', 'found', 'discovered', 'met', 'saw', 'heard', 'felt', 'took', 'gave', 'made', 'came', 'left', 'arrived', 'decided', 'realized', 'learned']
-        for i, sent in enumerate(sentences[1:-1], 1):
-            if any(word in sent.lower() for word in action_words):
-                summary_parts.append(sent)
-                break
-        
-        if sentences[-1] not in summary_parts:
-            summary_parts.append(sentences[-1])
-        
-        summary = ". ".join(summary_parts) + "."
-    else:
-        summary = story_text
-    
-    # Extract character names intelligently
-    common_words = {'The', 'She', 'He', 'They', 'It', 'We', 'I', 'You', 'One', 'Once', 'This', 'That', 'There', 'These', 'Those', 'Throughout', 'In', 'At', 'On', 'By', 'For', 'With', 'But', 'And', 'Or', 'So', 'If', 'When', 'Where', 'Why', 'How', 'What', 'Who', 'Which', 'Every', 'Some', 'Many', 'Few', 'All', 'Any', 'After', 'Before', 'During', 'While', 'Since', 'Until', 'Curious', 'Suddenly', 'Finally', 'Eventually', 'Meanwhile', 'However', 'Therefore', 'Furthermore', 'Moreover', 'Nevertheless', 'Nonetheless', 'Otherwise', 'Instead', 'Indeed', 'Perhaps', 'Maybe', 'Certainly', 'Definitely', 'Probably', 'Possibly', 'Usually', 'Often', 'Sometimes', 'Always', 'Never', 'Just', 'Only', 'Even', 'Still', 'Already', 'Also', 'Too', 'Either', 'Neither', 'Both', 'Each', 'Every', 'Another', 'Other', 'Such', 'Rather', 'Quite', 'Very', 'Really', 'Actually', 'Basically', 'Generally', 'Specifically', 'Particularly', 'Especially'}
-    
-    potential_names = []
-    for word in words:
-        cleaned = word.strip('.,!?;:"\'-')
-        if cleaned and cleaned[0].isupper() and len(cleaned) > 2 and cleaned not in common_words:
-            potential_names.append(cleaned)
-    
-    unique_names = list(dict.fromkeys(potential_names))[:10]  # Keep order, get up to 10 unique names
-    
-    # Extract locations/places
-    location_indicators = ['in', 'at', 'to', 'from', 'near', 'beside', 'under', 'over', 'through', 'across', 'into', 'onto']
-    locations = []
-    words_lower = [w.lower() for w in words]
-    for i, word in enumerate(words_lower):
-        if word in location_indicators and i + 1 < len(words):
-            next_word = words[i + 1].strip('.,!?;:')
-            if next_word and next_word[0].isupper():
-                locations.append(next_word)
-    
-    # Extract key objects/things mentioned
-    objects = []
-    object_patterns = ['a', 'an', 'the']
-    for i, word in enumerate(words_lower):
-        if word in object_patterns and i + 1 < len(words):
-            next_word = words[i + 1].strip('.,!?;:')
-            if next_word and not next_word[0].isupper() and len(next_word) > 3:
-                objects.append(next_word.lower())
-    unique_objects = list(dict.fromkeys(objects))[:10]
-    
-    # Detect story elements
-    has_dialogue = '"' in story_text or "'" in story_text or 'said' in lower_text or 'asked' in lower_text or 'replied' in lower_text
-    
-    # Detect time references
-    time_words = ['morning', 'afternoon', 'evening', 'night', 'day', 'week', 'month', 'year', 'yesterday', 'today', 'tomorrow', 'once', 'then', 'now', 'later', 'before', 'after']
-    time_references = [word for word in time_words if word in lower_text]
-    
-    # Detect emotions/feelings
-    emotion_words = ['happy', 'sad', 'angry', 'scared', 'excited', 'worried', 'surprised', 'confused', 'proud', 'disappointed', 'loved', 'hated', 'feared', 'hoped', 'wished']
-    emotions_found = [word for word in emotion_words if word in lower_text]
-    
-    # Generate dynamic quiz questions based on the story content
-    quiz = "QUIZ:\n"
-    questions = []
-    
-    # Question pool based on what we found in the story
-    
-    # Character-based questions
-    if len(unique_names) >= 2:
-        main_char = unique_names[0]
-        other_chars = unique_names[1:4] if len(unique_names) > 1 else ['nobody', 'someone', 'a stranger']
-        questions.append({
-            'q': f"Who is the main character in this story?",
-            'options': [main_char, other_chars[0] if len(other_chars) > 0 else 'John', 
-                       other_chars[1] if len(other_chars) > 1 else 'Mary', 
-                       'The narrator'],
-            'correct': 'A'
-        })
-        
-        if len(unique_names) >= 3:
-            questions.append({
-                'q': f"Which character appears after {unique_names[0]} in the story?",
-                'options': [unique_names[1], unique_names[2] if len(unique_names) > 2 else 'Nobody',
-                           unique_names[0], 'An unnamed character'],
-                'correct': 'A'
-            })
-    
-    # Location-based questions
-    if locations:
-        questions.append({
-            'q': "Where does part of this story take place?",
-            'options': [locations[0], 'In a city', 'In space', 'Underwater'],
-            'correct': 'A'
-        })
-    
-    # Object-based questions
-    if unique_objects:
-        questions.append({
-            'q': f"What object is mentioned in the story?",
-            'options': [unique_objects[0], 'a sword', 'a map', 'a key'],
-            'correct': 'A'
-        })
-    
-    # Plot-based questions
-    action_verbs_in_story = []
-    action_check = ['found', 'discovered', 'met', 'saw', 'went', 'came', 'took', 'gave', 'made', 'ran', 'jumped', 'flew', 'fell', 'climbed', 'opened', 'closed', 'broke', 'fixed', 'helped', 'saved', 'fought', 'won', 'lost', 'died', 'lived', 'grew', 'changed', 'became', 'turned', 'returned']
-    for verb in action_check:
-        if verb in lower_text:
-            action_verbs_in_story.append(verb)
-    
-    if action_verbs_in_story:
-        questions.append({
-            'q': f"What action occurs in the story?",
-            'options': [f"Someone {action_verbs_in_story[0]}", 'Someone sleeps', 'Someone dances', 'Someone sings'],
-            'correct': 'A'
-        })
-    
-    # Time-based questions
-    if time_references:
-        questions.append({
-            'q': "When does this story take place?",
-            'options': [f"During the {time_references[0]}", 'In the future', 'In ancient times', 'Time is not specified'],
-            'correct': 'A'
-        })
-    
-    # Emotion-based questions
-    if emotions_found:
-        questions.append({
-            'q': "What emotion is expressed in the story?",
-            'options': [emotions_found[0].capitalize(), 'Boredom', 'Jealousy', 'No emotions mentioned'],
-            'correct': 'A'
-        })
-    
-    # Story structure questions
-    questions.append({
-        'q': "How does the story begin?",
-        'options': [sentences[0][:50] + "..." if len(sentences[0]) > 50 else sentences[0],
-                   "With a battle scene", "With a description of the weather", "With dialogue"],
-        'correct': 'A'
-    })
-    
-    if len(sentences) > 1:
-        questions.append({
-            'q': "How does the story end?",
-            'options': [sentences[-1][:50] + "..." if len(sentences[-1]) > 50 else sentences[-1],
-                       "With everyone living happily ever after", "With a cliffhanger", "With a moral lesson"],
-            'correct': 'A'
-        })
-    
-    # Dialogue questions - make them more specific
-    if has_dialogue:
-        if '"' in story_text:
-            questions.append({
-                'q': "What do characters do in this story?",
-                'options': ["They speak to each other", "They remain silent", "They only think", "They only write letters"],
-                'correct': 'A'
-            })
-        elif 'said' in lower_text:
-            questions.append({
-                'q': "How do characters communicate?",
-                'options': ["Someone said something", "Through telepathy", "Using sign language", "They don't communicate"],
-                'correct': 'A'
-            })
-    
-    # Theme questions based on content
-    if 'learn' in lower_text or 'lesson' in lower_text or 'realize' in lower_text:
-        questions.append({
-            'q': "What type of story is this?",
-            'options': ["A story with a lesson or moral", "A pure action story", "A romance", "A mystery"],
-            'correct': 'A'
-        })
-    
-    # Additional content-based questions
-    
-    # Check for specific story elements
-    if 'but' in lower_text or 'however' in lower_text or 'although' in lower_text:
-        questions.append({
-            'q': "What kind of conflict or challenge appears in the story?",
-            'options': ["A problem that needs to be overcome", "Everything goes smoothly", "No challenges mentioned", "Multiple unsolved problems"],
-            'correct': 'A'
-        })
-    
-    # Look for descriptive words
-    descriptive_words = ['beautiful', 'ugly', 'big', 'small', 'tall', 'short', 'dark', 'bright', 'mysterious', 'strange', 'magical', 'ordinary', 'special', 'dangerous', 'safe']
-    found_descriptive = [word for word in descriptive_words if word in lower_text]
-    if found_descriptive:
-        questions.append({
-            'q': f"How is something described in the story?",
-            'options': [found_descriptive[0].capitalize(), "Boring", "Normal", "Not described"],
-            'correct': 'A'
-        })
-    
-    # Check for movement or travel
-    travel_words = ['went', 'traveled', 'journeyed', 'walked', 'ran', 'flew', 'drove', 'sailed', 'arrived', 'departed', 'left', 'came']
-    travel_found = [word for word in travel_words if word in lower_text]
-    if travel_found:
-        questions.append({
-            'q': "What kind of movement happens in the story?",
-            'options': [f"Someone {travel_found[0]}", "Everyone stays in one place", "Only thoughts move", "No movement occurs"],
-            'correct': 'A'
-        })
-    
-    # Randomly select 5 questions from our pool
-    random.shuffle(questions)
-    selected_questions = questions[:5]
-    
-    # If we don't have enough questions, create more specific content questions
-    while len(selected_questions) < 5:
-        backup_questions = []
-        
-        # Create questions about specific words in the story
-        important_words = [w for w in words if len(w) > 5 and w[0].isupper()]
-        if important_words and len(backup_questions) < 3:
-            backup_questions.append({
-                'q': f"Which word appears in the story?",
-                'options': [important_words[0], "Elephant", "Computer", "Spaceship"],
-                'correct': 'A'
-            })
-        
-        # Question about what the story is NOT about
-        if len(backup_questions) < 3:
-            backup_questions.append({
-                'q': "What is this story NOT about?",
-                'options': ["Aliens from Mars", unique_names[0] if unique_names else "A character", 
-                           unique_objects[0] if unique_objects else "An event", "The events described"],
-                'correct': 'A'
-            })
-        
-        # Question about story setting
-        if len(backup_questions) < 3:
-            if 'forest' in lower_text or 'tree' in lower_text:
-                setting = "nature"
-            elif 'city' in lower_text or 'building' in lower_text or 'street' in lower_text:
-                setting = "urban area"
-            elif 'house' in lower_text or 'home' in lower_text or 'room' in lower_text:
-                setting = "indoor location"
-            else:
-                setting = "specific location"
-                
-            backup_questions.append({
-                'q': "Where might this story take place?",
-                'options': [f"In a {setting}", "On the moon", "Under the ocean", "In outer space"],
-                'correct': 'A'
-            })
-        
-        if backup_questions:
-            selected_questions.append(backup_questions[0])
-        else:
-            # Last resort - ask about story purpose
-            selected_questions.append({
-                'q': "What is the purpose of this story?",
-                'options': ["To tell a story", "To sell a product", "To provide instructions", "To list facts"],
-                'correct': 'A'
-            })
-    
-    # Format the selected questions with randomized answer positions
-    for i, q_data in enumerate(selected_questions, 1):
-        quiz += f"{i}. {q_data['q']}\n"
-        
-        # Get the options and randomize their order
-        options = q_data['options'][:4]  # Ensure we have exactly 4 options
-        while len(options) < 4:
-            options.append("Not applicable")
-        
-        # Remember the correct answer before shuffling
-        correct_answer = options[0]  # The first option is always the correct one in our data
-        
-        # Shuffle the options
-        random.shuffle(options)
-        
-        # Find where the correct answer ended up
-        correct_index = options.index(correct_answer)
-        correct_letter = ['A', 'B', 'C', 'D'][correct_index]
-        
-        # Write the shuffled options
-        for j, option in enumerate(['A', 'B', 'C', 'D']):
-            quiz += f"   {option}) {options[j]}\n"
-        quiz += f"   Correct: {correct_letter}\n\n"
-    
-    return f"SUMMARY:\n{summary}\n\n{quiz.rstrip()}"
-
-def parse_quiz_from_text(quiz_text, story_text):
-    """Parse quiz questions from generated text"""
-    questions = []
-    # This is a simplified parser - in production, you'd want more robust parsing
-    lines = quiz_text.split('\n')
-    current_question = {}
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if it's a question number
-        if line[0].isdigit() and '.' in line[:3]:
-            if current_question:
-                questions.append(current_question)
-            current_question = {'question': line, 'options': [], 'correct': 'A'}
-        elif line.startswith(('A)', 'B)', 'C)', 'D)')):
-            current_question.get('options', []).append(line)
-        elif 'correct' in line.lower() or 'answer' in line.lower():
-            # Try to extract correct answer
-            for char in ['A', 'B', 'C', 'D']:
-                if char in line:
-                    current_question['correct'] = char
-                    break
-    
-    if current_question:
-        questions.append(current_question)
-    
-    # Ensure we have 5 questions
-    while len(questions) < 5:
-        questions.append(create_generic_question(len(questions) + 1, story_text))
-    
-    return questions[:5]
-
-def create_generic_question(num, story_text):
-    """Create a generic question based on story analysis"""
-    questions_bank = [
-        {
-            'question': f'{num}. What is the main theme of this story?',
-            'options': [
-                'A) Adventure and discovery',
-                'B) Love and relationships',
-                'C) Conflict and resolution',
-                'D) Growth and learning'
-            ],
-            'correct': 'C'
-        },
-        {
-            'question': f'{num}. What narrative technique is used in this story?',
-            'options': [
-                'A) Flashback',
-                'B) Linear progression',
-                'C) Multiple perspectives',
-                'D) Stream of consciousness'
-            ],
-            'correct': 'B'
-        },
-        {
-            'question': f'{num}. What is the story\'s primary conflict?',
-            'options': [
-                'A) Person vs. Person',
-                'B) Person vs. Nature',
-                'C) Person vs. Self',
-                'D) Person vs. Society'
-            ],
-            'correct': 'A'
-        }
-    ]
-    return questions_bank[num % len(questions_bank)] if num <= len(questions_bank) else questions_bank[0]
-
-def format_quiz_questions(questions):
-    """Format quiz questions for output"""
-    quiz = "QUIZ:\n"
-    for i, q in enumerate(questions, 1):
-        quiz += f"{q.get('question', f'{i}. Question {i}')}\n"
-        for opt in q.get('options', []):
-            quiz += f"   {opt}\n"
-        quiz += f"   Correct: {q.get('correct', 'A')}\n\n"
-    return quiz.rstrip()
-
-
-
 @app.route("/users")
 @login_required
 def list_users():
-    if not mongo_connected:
+    if not mongo.available():
         flash('Database unavailable. Please try again later.', 'error')
         return redirect(url_for('hello_world'))
     users = list(mongo.db.users.find({}, {"_id": 0, "username": 1}))
@@ -606,6 +146,101 @@ def list_users():
 def test():
     return jsonify({"status": "ok", "message": "Flask app is working!"})
 
+@app.route("/healthz")
+def liveness():
+    """Liveness: the process is up and serving; never touches dependencies"""
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+@app.route("/readyz")
+def readiness():
+    """Readiness: MongoDB is required; inference backends are reported (fallback quizzes cover outages)"""
+    database_ok, database_detail = mongo.ping()
+    checks = {
+        "mongodb": {"ok": database_ok, ("latency_ms" if database_ok else "error"): database_detail},
+        "inference": backend_router.stats()
+    }
+    if mongo.connect_seconds is not None:
+        checks["mongodb"]["connect_ms"] = round(mongo.connect_seconds * 1000, 1)
+    body = {"ready": database_ok, "checks": checks, "startup": startup.report()}
+    return jsonify(body), 200 if database_ok else 503
+
+@app.errorhandler(DatabaseUnavailable)
+def database_unavailable(e):
+    if request.path.startswith('/api/') or request.is_json:
+        response = jsonify({"error": "Database not available"})
+    else:
+        response = Response("The database is temporarily unavailable. Please try again shortly.",
+                            mimetype='text/plain')
+    response.status_code = 503
+    response.headers['Retry-After'] = str(int(mongo.retry_interval))
+    return response
+
+@app.errorhandler(LimiterFull)
+def generation_busy(e):
+    response = jsonify({"error": "Too many quizzes are being generated right now. Please try again shortly."})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+@app.route("/cache/stats")
+@login_required
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route("/auth/stats")
+@login_required
+def auth_stats():
+    return jsonify(password_hasher.stats())
+
+@app.route("/mail/stats")
+@login_required
+def mail_stats():
+    return jsonify(mail_outbox.stats())
+
+@app.route("/backends/stats")
+@login_required
+def backend_stats():
+    return jsonify(backend_router.stats())
+
+@app.route("/concurrency/stats")
+@login_required
+def concurrency_stats():
+    # Per worker process, like the slots themselves
+    return jsonify({"pid": os.getpid(), "generation": generation_limiter.stats()})
+
+# Leaderboards change slowly; a short per-process cache keeps page views off MongoDB
+leaderboard_cache = ResultCache(maxsize=64, ttl=int(os.environ.get('LEADERBOARD_CACHE_TTL', 60)))
+
+@app.route("/leaderboard")
+@login_required
+def leaderboard():
+    period = request.args.get('period', 'all')
+    if period != 'all' and period not in PERIOD_DAYS:
+        return jsonify({"error": f"period must be one of: all, {', '.join(PERIOD_DAYS)}"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    key = f"leaderboard|{period}|{limit}"
+    players = leaderboard_cache.get(key)
+    if players is None:
+        players = top_players(mongo.db, period, limit)
+        leaderboard_cache.set(key, players)
+    response = jsonify({"period": period, "players": players})
+    # Signed-in users only, so shared caches must not keep a copy
+    response.headers['Cache-Control'] = f"private, max-age={leaderboard_cache.ttl}"
+    return response
+
+@app.route("/analytics/activity")
+@login_required
+def activity_analytics():
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    key = f"activity|{days}"
+    series = leaderboard_cache.get(key)
+    if series is None:
+        series = activity(mongo.db, days)
+        leaderboard_cache.set(key, series)
+    response = jsonify({"days": series})
+    response.headers['Cache-Control'] = f"private, max-age={leaderboard_cache.ttl}"
+    return response
+
 @app.route("/test_auth")
 @login_required
 def test_auth():
@@ -613,7 +248,7 @@ def test_auth():
 
 @app.route("/")
 def hello_world():
-    return render_template('index.html', mongo_connected=mongo_connected)
+    return render_template('index.html', mongo_connected=mongo.connected, generate_async=GENERATE_ASYNC)
 
 @app.route("/auth")
 def auth_choice():
@@ -628,23 +263,65 @@ def register():
         username = form.username.data
         password = form.password.data
         
+        # Charged up front so a parallel burst cannot slip past; refunded unless the name was taken
+        ip = client_ip()
+        allowed, retry_after = auth_ip_limiter.consume(ip)
+        if not allowed:
+            return too_many_attempts_response('register.html', form, retry_after)
+        
         # Check if username already exists
         if mongo.db.users.find_one({"username": username}):
             flash('Username already exists. Please choose another.', 'danger')
         else:
+            auth_ip_limiter.refund(ip)
             # Create new user
-            hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
+            try:
+                hashed_pw = password_hasher.hash(password)
+            except HasherBusy:
+                return too_busy_response('register.html', form)
             mongo.db.users.insert_one({
                 "username": username, 
                 "password": hashed_pw,
                 "created_at": get_ist_time()
             })
+            unknown_users.discard(username)
             flash('Registration successful! Please log in.', 'success')
             return redirect(url_for('login'))
     
     return render_template('register.html', form=form)
 
 
+# Only behind a proxy that sets X-Forwarded-For (Render) does the header say who the client is;
+# without one any client could send it and pick a fresh rate-limit bucket per request
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'False').lower() == 'true'
+
+def client_ip():
+    if TRUST_PROXY_HEADERS and request.access_route:
+        # The last X-Forwarded-For entry is the address the proxy saw
+        return request.access_route[-1]
+    return request.remote_addr or ''
+
+def too_busy_response(template, form):
+    """503 with Retry-After when the password hashing pool is saturated"""
+    flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'warning')
+    return render_template(template, form=form), 503, {'Retry-After': str(password_hasher.retry_after())}
+
+def too_many_attempts_response(template, form, retry_after):
+    """429 with Retry-After when a client or username has used up its attempts"""
+    flash('Too many attempts. Please wait a minute and try again.', 'danger')
+    return render_template(template, form=form), 429, {'Retry-After': str(max(1, int(retry_after + 0.999)))}
+
+def rehash_password(username, hashed, password):
+    """Upgrade a stored hash to the current work factor after a successful login (best effort)"""
+    if not password_hasher.needs_rehash(hashed):
+        return
+    try:
+        new_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return
+    mongo.db.users.update_one({"username": username, "password": hashed}, {"$set": {"password": new_hash}})
+    password_hasher.record_rehash()
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     form = LoginForm()
@@ -653,9 +330,32 @@ def login():
         username = form.username.data
         password = form.password.data
         
-        # Find user in MongoDB
-        user = mongo.db.users.find_one({"username": username})
-        if user and bcrypt.check_password_hash(user["password"], password):
+        # Throttle before touching MongoDB or bcrypt. Tokens are taken up front, so a parallel
+        # burst cannot all pass before any of them is charged, and refunded if the login succeeds.
+        ip = client_ip()
+        allowed, retry_after = auth_ip_limiter.consume(ip)
+        if allowed:
+            allowed, retry_after = login_user_limiter.consume(username)
+            if not allowed:
+                auth_ip_limiter.refund(ip)
+        if not allowed:
+            return too_many_attempts_response('login.html', form, retry_after)
+        
+        # Find user in MongoDB (unless we just learned it does not exist)
+        user = None if username in unknown_users else mongo.db.users.find_one({"username": username})
+        if user is None:
+            unknown_users.add(username)
+        try:
+            valid = bool(user) and password_hasher.check(user["password"], password)
+        except HasherBusy:
+            auth_ip_limiter.refund(ip)
+            login_user_limiter.refund(username)
+            return too_busy_response('login.html', form)
+        if valid:
+            auth_ip_limiter.refund(ip)
+            login_user_limiter.refund(username)
+        if valid:
+            rehash_password(username, user["password"], password)
             session['username'] = username
             flash('Logged in successfully!', 'success')
             return redirect(url_for('hello_world'))
@@ -672,15 +372,179 @@ def logout():
 @app.route("/profile")
 @login_required
 def profile():
+    before = request.args.get('before')
+    if before and decode_history_cursor(before) is None:
+        flash('That page link is not valid; showing your latest quizzes.', 'warning')
+        return redirect(url_for('profile'))
     user = mongo.db.users.find_one({"username": session['username']}, {"_id": 0, "username": 1})
-    quiz_results = list(mongo.db.quiz_results.find({"username": session['username']}))
-    
-    # Convert ObjectId to string for each quiz result
-    for result in quiz_results:
-        result['_id'] = str(result['_id'])
-    
-    return render_template('profile.html', user=user, quiz_results=quiz_results)
+    quiz_results, next_cursor = quiz_history_page(session['username'], before)
+    stats = quiz_score_stats(session['username'])
+    return render_template('profile.html', user=user, quiz_results=quiz_results, stats=stats,
+                           next_cursor=next_cursor, paged=bool(before))
+
+
+PROFILE_PAGE_SIZE = int(os.environ.get('PROFILE_PAGE_SIZE', 20))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
+def encode_history_cursor(result):
+    """Cursor pointing just past ``result``: '<date in ms>_<id>'"""
+    date = result['date']
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return f"{(date - EPOCH) // timedelta(milliseconds=1)}_{result['_id']}"
+
+def decode_history_cursor(cursor):
+    """Return (date, ObjectId), or None for a missing, malformed or tampered cursor"""
+    try:
+        millis, object_id = cursor.split('_', 1)
+        date, object_id = EPOCH + timedelta(milliseconds=int(millis)), ObjectId(object_id)
+    except Exception:
+        return None
+    # Only what encode_history_cursor produces: no signs, padding or upper-case ids
+    if encode_history_cursor({'date': date, '_id': object_id}) != cursor:
+        return None
+    return date, object_id
+
+def quiz_history_page(username, cursor=None, limit=None):
+    """One page of quiz history, newest first, without the story and quiz text.
+
+    Keyset pagination on (date, _id) walks the username_date_id index, so every page
+    costs the same however long the history is. Returns (results, next_cursor).
+    """
+    limit = limit or PROFILE_PAGE_SIZE
+    query = {"username": username}
+    position = decode_history_cursor(cursor) if cursor else None
+    if position:
+        date, object_id = position
+        query["$or"] = [{"date": {"$lt": date}}, {"date": date, "_id": {"$lt": object_id}}]
+    results = list(mongo.db.quiz_results.find(query, {"date": 1, "score": 1})
+                   .sort([("date", -1), ("_id", -1)])
+                   .limit(limit + 1))
+    next_cursor = encode_history_cursor(results[limit - 1]) if len(results) > limit else None
+    results = results[:limit]
+    for result in results:
+        result['_id'] = str(result['_id'])
+    return results, next_cursor
+
+def quiz_score_stats(username):
+    """Quiz count, average and best score from the user's running totals (one document read)"""
+    stats = get_user_stats(mongo.db, username)
+    completed = stats.get("completed_count", 0)
+    return {
+        "count": stats.get("quiz_count", 0),
+        "avg_score": round(stats.get("score_sum", 0) / completed, 1) if completed else 0,
+        "best_score": stats.get("best_score") if stats.get("best_score") is not None else 0
+    }
+
+
+def save_quiz_result(username, story_text, quiz):
+    """Store a generated quiz and return its id; the story goes to the shared content store"""
+    now = get_ist_time()
+    quiz_result = mongo.db.quiz_results.insert_one({
+        "username": username,
+        "story_ref": put_content(mongo.db, story_text),
+        "quiz": quiz,
+        "score": None,
+        "date": now
+    })
+    record_quiz_created(mongo.db, username, now)
+    record_daily_quiz(mongo.db, username, now)
+    return str(quiz_result.inserted_id)
+
+def save_quiz_results(username, story_texts, quizzes):
+    """Store a batch of quizzes with one insert_many and return their ids in order"""
+    now = get_ist_time()
+    refs = {}
+    for story_text in story_texts:
+        refs[story_text] = refs.get(story_text, 0) + 1
+    refs = {story_text: put_content(mongo.db, story_text, refs=count) for story_text, count in refs.items()}
+    inserted = mongo.db.quiz_results.insert_many([
+        {"username": username, "story_ref": refs[story_text], "quiz": quiz, "score": None, "date": now}
+        for story_text, quiz in zip(story_texts, quizzes)
+    ])
+    record_quiz_created(mongo.db, username, now, count=len(quizzes))
+    record_daily_quiz(mongo.db, username, now, count=len(quizzes))
+    return [str(object_id) for object_id in inserted.inserted_ids]
+
+def load_quiz(username, quiz_id):
+    """The user's stored quiz result and its structured quiz, or (None, None)"""
+    try:
+        object_id = ObjectId(quiz_id)
+    except Exception:
+        return None, None
+    doc = mongo.db.quiz_results.find_one({"_id": object_id, "username": username}, {"story": 0, "story_ref": 0})
+    if doc is None:
+        return None, None
+    quiz = doc.get('quiz')
+    if quiz is None:
+        # Stored before the structured model: parse the SUMMARY/QUIZ text once on read
+        quiz = parse_quiz_text(quiz_texts(mongo.db, doc)[1] or '')
+    return doc, quiz
+
+def store_score(username, object_id, score):
+    """Save a score on a quiz and update the user's totals; False when the quiz is not theirs"""
+    previous = record_score(mongo.db, username, object_id, score, get_ist_time())
+    if previous is None:
+        return False
+    if previous.get('date'):
+        record_daily_score(mongo.db, username, previous['date'], score, previous.get('score'))
+    return True
+
+def quiz_response(quiz, quiz_id):
+    """Body returned by /generate and finished jobs: structured quiz plus the legacy text"""
+    return {"quiz": public_quiz(quiz), "result": render_quiz_text(quiz), "quiz_id": quiz_id}
+
+def run_generation_job(job):
+    """Background worker handler for queued /generate requests"""
+    story_text = job['payload']['text']
+    quiz = generate_quiz(story_text)
+    quiz_id = save_quiz_result(job['username'], story_text, quiz)
+    return quiz_response(quiz, quiz_id)
+
+# Queue for /generate requests served in async mode; each worker process drains it with a few threads
+GENERATE_ASYNC = os.environ.get('GENERATE_ASYNC', 'False').lower() == 'true'
+generation_jobs = JobQueue(run_generation_job, workers=int(os.environ.get('JOB_WORKERS', 2)), connect=mongo.connect)
+mongo.on_connect(lambda db: generation_jobs.attach(db.generation_jobs))
+
+# Contact form mail is queued in MongoDB and sent in batches over one SMTP connection per sender thread
+def mail_transport():
+    return SMTPTransport(app.config['MAIL_SERVER'], app.config['MAIL_PORT'], app.config['MAIL_USE_TLS'],
+                         app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'],
+                         timeout=float(os.environ.get('MAIL_TIMEOUT', 30)))
+
+mail_outbox = MailOutbox(
+    mail_transport,
+    workers=int(os.environ.get('MAIL_WORKERS', 1)),
+    batch_size=int(os.environ.get('MAIL_BATCH_SIZE', 20)),
+    max_attempts=int(os.environ.get('MAIL_MAX_ATTEMPTS', 5)),
+    connect=mongo.connect
+)
+mongo.on_connect(lambda db: mail_outbox.attach(db.mail_outbox))
+
+@app.before_request
+def start_job_workers():
+    # Started lazily so threads are created in each gunicorn worker, not in the preloading master.
+    # The queues are attached once MongoDB is connected; until then start() does nothing, and
+    # enqueue/get connect in the request thread (or raise DatabaseUnavailable for a 503).
+    mongo.connect_in_background()
+    generation_jobs.start()
+    mail_outbox.start()
+
+def generation_stream(events):
+    """Event-stream response that holds a generation slot until the server is done sending it"""
+    acquired_at = generation_limiter.acquire()
+    response = Response(events, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: generation_limiter.release(acquired_at))
+    return response
+
+def job_to_json(job):
+    data = {"job_id": str(job['_id']), "status": job['status']}
+    if job['status'] == DONE:
+        data.update(job.get('result') or {})
+    elif job['status'] == FAILED:
+        data['error'] = job.get('error', 'Generation failed')
+    return data
 
 @app.route("/generate", methods=["POST"])
 @login_required
@@ -695,24 +559,66 @@ def generate():
         if not user_text:
             return jsonify({"error": "No input received."}), 400
 
-        # Pass the user's story text directly to the AI function
-        result = generate_free_response(user_text)
-        
-        # Save quiz generation to MongoDB
-        quiz_result = mongo.db.quiz_results.insert_one({
-            "username": session['username'],
-            "story": user_text,
-            "summary": result,
-            "score": None,
-            "date": get_ist_time()
-        })
-        quiz_id = str(quiz_result.inserted_id)
-        
-        return jsonify({"result": result, "quiz_id": quiz_id})
+        # In async mode hand the work to the job queue and let the client poll /jobs/<id>
+        if data.get("async", GENERATE_ASYNC):
+            job_id = generation_jobs.enqueue(session['username'], {"text": user_text})
+            return jsonify({"job_id": job_id, "status": "queued",
+                            "status_url": url_for('job_status', job_id=job_id)}), 202
+
+        with generation_limiter.slot():
+            # Pass the user's story text directly to the AI function
+            quiz = generate_quiz(user_text)
+
+            # Save quiz generation to MongoDB
+            quiz_id = save_quiz_result(session['username'], user_text, quiz)
+
+        return jsonify(quiz_response(quiz, quiz_id))
+    except (LimiterFull, DatabaseUnavailable):
+        # Answered with 503 and Retry-After by their errorhandlers
+        raise
     except Exception as e:
         print(f"Error in generate route: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/generate/stream", methods=["POST"])
+@login_required
+def generate_stream():
+    data = request.get_json(silent=True)
+    user_text = (data or {}).get("text", "")
+    if not user_text:
+        return jsonify({"error": "No input received."}), 400
+    username = session['username']
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def stream():
+        try:
+            index = 0
+            for kind, value in stream_free_response(user_text):
+                if kind == 'summary':
+                    yield sse('summary', {"summary": value})
+                elif kind == 'question':
+                    yield sse('question', {"index": index, "question": value,
+                                           "text": render_question_text(index + 1, value)})
+                    index += 1
+                else:
+                    quiz_id = save_quiz_result(username, user_text, value)
+                    yield sse('done', quiz_response(value, quiz_id))
+        except Exception as e:
+            print(f"Error in generate stream: {str(e)}")
+            yield sse('error', {"error": str(e)})
+
+    return generation_stream(stream())
+
+@app.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = generation_jobs.get(job_id, session['username'])
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_to_json(job))
+
 @app.route("/save_score", methods=["POST"])
 @login_required
 def save_score():
@@ -722,20 +628,96 @@ def save_score():
     
     if score is None or quiz_id is None:
         return jsonify({"error": "Missing score or quiz_id"}), 400
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+        return jsonify({"error": "Score must be a number"}), 400
     
     try:
-        # Convert string ID back to ObjectId
-        object_id = ObjectId(quiz_id)
+        doc, quiz = load_quiz(session['username'], quiz_id)
+        if doc is None:
+            return jsonify({"error": "Quiz not found"}), 404
+        # Scores feed running totals and the public leaderboard: one point per question at most
+        if not 0 <= score <= len(quiz['questions']):
+            return jsonify({"error": f"Score must be between 0 and {len(quiz['questions'])}"}), 400
         
-        # Update the quiz result with the score
-        mongo.db.quiz_results.update_one(
-            {"_id": object_id, "username": session['username']},
-            {"$set": {"score": score}}
-        )
+        # Update the quiz result with the score and the user's running totals
+        if not store_score(session['username'], doc['_id'], score):
+            return jsonify({"error": "Quiz not found"}), 404
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Versioned JSON API: quizzes as structured data, graded on the server
+
+@app.route("/api/v1/quizzes", methods=["POST"])
+@login_required
+def api_create_quiz():
+    data = request.get_json(silent=True) or {}
+    user_text = data.get("text", "")
+    if not user_text:
+        return jsonify({"error": "No input received."}), 400
+    with generation_limiter.slot():
+        quiz = generate_quiz(user_text)
+        quiz_id = save_quiz_result(session['username'], user_text, quiz)
+    body = dict(public_quiz(quiz), id=quiz_id)
+    if request.args.get('format') == 'text':
+        body['text'] = render_quiz_text(quiz)
+    return jsonify(body), 201
+
+@app.route("/api/v1/quizzes/batch", methods=["POST"])
+@login_required
+def api_create_quiz_batch():
+    stories = (request.get_json(silent=True) or {}).get("stories")
+    if not isinstance(stories, list) or not stories or not all(isinstance(story, str) and story.strip()
+                                                               for story in stories):
+        return jsonify({"error": "stories must be a non-empty list of story texts"}), 400
+    if len(stories) > BATCH_MAX_STORIES:
+        return jsonify({"error": f"At most {BATCH_MAX_STORIES} stories per batch"}), 400
+    username = session['username']
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def stream():
+        try:
+            quizzes = [None] * len(stories)
+            for indexes, quiz in generate_batch(stories):
+                for index in indexes:
+                    quizzes[index] = quiz
+                yield sse('item', {"indexes": indexes, "quiz": public_quiz(quiz)})
+            quiz_ids = save_quiz_results(username, stories, quizzes)
+            yield sse('done', {"quiz_ids": quiz_ids})
+        except Exception as e:
+            print(f"Error in batch generation: {str(e)}")
+            yield sse('error', {"error": str(e)})
+
+    return generation_stream(stream())
+
+@app.route("/api/v1/quizzes/<quiz_id>")
+@login_required
+def api_get_quiz(quiz_id):
+    doc, quiz = load_quiz(session['username'], quiz_id)
+    if doc is None:
+        return jsonify({"error": "Quiz not found"}), 404
+    body = dict(public_quiz(quiz), id=quiz_id, score=doc.get('score'),
+                date=doc['date'].isoformat() if doc.get('date') else None)
+    if request.args.get('format') == 'text':
+        body['text'] = render_quiz_text(quiz)
+    return jsonify(body)
+
+@app.route("/api/v1/quizzes/<quiz_id>/grade", methods=["POST"])
+@login_required
+def api_grade_quiz(quiz_id):
+    answers = (request.get_json(silent=True) or {}).get("answers")
+    if not isinstance(answers, list):
+        return jsonify({"error": "answers must be a list with one option index or letter per question"}), 400
+    doc, quiz = load_quiz(session['username'], quiz_id)
+    if doc is None:
+        return jsonify({"error": "Quiz not found"}), 404
+    score, results = grade(quiz, answers)
+    store_score(session['username'], doc['_id'], score)
+    return jsonify({"score": score, "total": len(quiz['questions']), "correct": results,
+                    "answers": [question['answer'] for question in quiz['questions']]})
+
 @app.route("/contact")
 def contact():
     return render_template("contact.html")
@@ -761,17 +743,17 @@ def contact_submit():
         except Exception as e:
             print(f"Failed to save contact message to database: {e}")
         
-        # Send email notification if email is configured
+        # Queue the notifications; the mail outbox sends them after this response has gone out
         if app.config['MAIL_USERNAME'] and app.config['MAIL_PASSWORD']:
             try:
-                # Send email to admin
+                sender = app.config['MAIL_DEFAULT_SENDER'] or app.config['MAIL_USERNAME']
+                # Email to admin
                 admin_email = os.environ.get('ADMIN_EMAIL', app.config['MAIL_USERNAME'])
-                msg = Message(
-                    subject=f"New Contact Form Submission: {subject}",
-                    sender=app.config['MAIL_DEFAULT_SENDER'],
-                    recipients=[admin_email]
-                )
-                msg.html = f"""
+                mail_outbox.enqueue(
+                    sender,
+                    [admin_email],
+                    f"New Contact Form Submission: {subject}",
+                    f"""
                 <h3>New Contact Form Submission</h3>
                 <p><strong>Name:</strong> {name}</p>
                 <p><strong>Email:</strong> {email}</p>
@@ -781,15 +763,14 @@ def contact_submit():
                 <hr>
                 <p><small>Submitted on {get_ist_time().strftime('%Y-%m-%d %H:%M IST')}</small></p>
                 """
-                mail.send(msg)
-                
-                # Send confirmation email to user
-                user_msg = Message(
-                    subject="Thank you for contacting Story Quiz",
-                    sender=app.config['MAIL_DEFAULT_SENDER'],
-                    recipients=[email]
                 )
-                user_msg.html = f"""
+
+                # Confirmation email to user
+                mail_outbox.enqueue(
+                    sender,
+                    [email],
+                    "Thank you for contacting Story Quiz",
+                    f"""
                 <h3>Thank you for reaching out, {name}!</h3>
                 <p>We have received your message and will get back to you soon.</p>
                 <p><strong>Your message:</strong></p>
@@ -797,10 +778,10 @@ def contact_submit():
                 <hr>
                 <p>Best regards,<br>Story Quiz Team</p>
                 """
-                mail.send(user_msg)
-                
+                )
+
             except Exception as e:
-                print(f"Email sending failed: {e}")
+                print(f"Queueing email failed: {e}")
                 # Don't show error to user, just log it
         
         flash('Thank you for your message! We will get back to you soon.', 'success')
@@ -809,6 +790,15 @@ def contact_submit():
     
     return redirect(url_for('contact'))
 
+startup.mark('routes')
+print(startup.summary())
+
+if __name__ == "__main__":
+    # Pool processes would re-import this file; hash on the request thread
+    password_hasher.workers = 0
+    # Under gunicorn the master creates the indexes (gunicorn_config.py); the dev server is one process
+    mongo.on_connect(ensure_indexes)
+
 # Only run Flask dev server in development, not production
 if __name__ == "__main__" and os.environ.get("FLASK_ENV") != "production":
     # Use PORT from environment (Render provides this), fallback to 8000
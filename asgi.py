@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point: quiz generation on an event loop, everything else through Flask
+
+Under gthread every /generate request holds one of the worker's threads while it waits
+on the inference API. Here POST /generate and POST /api/v1/quizzes are served natively
+by async_pipeline, so one worker keeps hundreds of generations in flight. Every other
+route, and any request these handlers do not fully own (not logged in, async job mode),
+goes to the unchanged Flask app through asgiref's WSGI adapter.
+
+Usage:
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+    SERVING_MODE=asgi gunicorn --config gunicorn_config.py
+"""
+import json
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import parse_cookie
+
+import async_pipeline
+from app import app as flask_app, GENERATE_ASYNC, mongo, quiz_response, save_quiz_result, start_job_workers
+from concurrency_limiter import LimiterFull
+from database import DatabaseUnavailable
+from quiz_model import public_quiz, render_quiz_text
+
+wsgi_application = WsgiToAsgi(flask_app)
+session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+
+def session_username(scope):
+    """Username in the Flask session cookie, None when there is no valid session"""
+    headers = dict(scope['headers'])
+    cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+    cookie = cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie or session_serializer is None:
+        return None
+    try:
+        data = session_serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return None
+    return data.get('username')
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def replay(body):
+    """A receive callable that hands an already-read body to the WSGI adapter"""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {'type': 'http.disconnect'}
+        sent = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    return receive
+
+
+async def send_json(send, status, payload, retry_after=None):
+    body = json.dumps(payload).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b'retry-after', str(int(retry_after)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_error(send, e, route):
+    """503 with Retry-After where the Flask errorhandlers give one, else a JSON 500"""
+    if isinstance(e, DatabaseUnavailable):
+        return await send_json(send, 503, {"error": "Database not available"}, retry_after=mongo.retry_interval)
+    if isinstance(e, LimiterFull):
+        return await send_json(send, 503, {"error": "Too many quizzes are being generated right now. "
+                                                    "Please try again shortly."}, retry_after=e.retry_after)
+    print(f"Error in {route} route: {str(e)}")
+    await send_json(send, 500, {"error": str(e)})
+
+
+async def generate(scope, username, data, send):
+    """POST /generate: same contract as the Flask view, errors included"""
+    if not data:
+        return await send_json(send, 400, {"error": "No JSON data received"})
+    user_text = data.get("text", "")
+    if not user_text:
+        return await send_json(send, 400, {"error": "No input received."})
+    try:
+        quiz = await async_pipeline.generate_quiz(user_text)
+        quiz_id = await async_pipeline.run_blocking(save_quiz_result, username, user_text, quiz)
+        await send_json(send, 200, quiz_response(quiz, quiz_id))
+    except Exception as e:
+        await send_error(send, e, 'generate')
+
+
+async def create_quiz(scope, username, data, send):
+    """POST /api/v1/quizzes: same contract as the Flask view, errors included"""
+    user_text = (data or {}).get("text", "")
+    if not user_text:
+        return await send_json(send, 400, {"error": "No input received."})
+    try:
+        quiz = await async_pipeline.generate_quiz(user_text)
+        quiz_id = await async_pipeline.run_blocking(save_quiz_result, username, user_text, quiz)
+    except Exception as e:
+        return await send_error(send, e, 'create quiz')
+    body = dict(public_quiz(quiz), id=quiz_id)
+    if parse_qs(scope.get('query_string', b'').decode()).get('format') == ['text']:
+        body['text'] = render_quiz_text(quiz)
+    await send_json(send, 201, body)
+
+
+ASYNC_ROUTES = {'/generate': generate, '/api/v1/quizzes': create_quiz}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_pipeline.async_client.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    handler = ASYNC_ROUTES.get(scope.get('path')) if scope['type'] == 'http' else None
+    if handler is None or scope['method'] != 'POST':
+        return await wsgi_application(scope, receive, send)
+
+    start_job_workers()
+    body = await read_body(receive)
+    username = session_username(scope)
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if username is None or (handler is generate and isinstance(data, dict) and data.get("async", GENERATE_ASYNC)):
+        # Login redirects and queued jobs are the Flask app's business
+        return await wsgi_application(scope, replay(body), send)
+    await handler(scope, username, data if isinstance(data, dict) else None, send)
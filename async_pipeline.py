@@ -0,0 +1,135 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import quiz_pipeline as pipeline
+from chunking import CHUNK_WORDS, split_into_chunks, summarize_extractive
+from hf_client import AsyncInferenceClient
+from result_cache import make_cache_key
+
+# The asyncio side of quiz_pipeline, for the ASGI serving mode (asgi.py). Model calls are
+# awaited on one event loop instead of holding a thread each, so a single process can
+# keep hundreds of generations in flight. Payloads, response parsing, circuit breakers,
+# the result cache and the rule-based fallback are shared with the threaded pipeline.
+# Backend hedging is not: a failed BART summary falls back to the extractive one.
+
+async_client = AsyncInferenceClient.from_env()
+
+# MongoDB and CPU-bound work (fallback quizzes, extractive summaries) run here, off the event loop
+blocking_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ASYNC_BLOCKING_THREADS', 16)),
+    thread_name_prefix='blocking'
+)
+
+# Concurrent requests for the same story share one generation
+_in_flight = {}
+
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(blocking_pool, func, *args)
+
+
+async def call_inference_endpoint(breaker, url, payload):
+    """POST to an inference endpoint through its circuit breaker, None when the circuit is open"""
+    if not breaker.allow():
+        return None
+    try:
+        response = await async_client.post(url, headers=pipeline.huggingface_headers(), json=payload)
+    except Exception:
+        breaker.record_failure()
+        raise
+    pipeline.record_response(breaker, response)
+    return response
+
+
+async def bart_summary(story_text):
+    """Ask the BART model for a summary, returning '' on failure"""
+    try:
+        response = await call_inference_endpoint(pipeline.summary_breaker, pipeline.HUGGINGFACE_API_URL,
+                                                 pipeline.summary_payload(story_text))
+        if response is not None and response.status_code == 200:
+            return pipeline.summary_from_result(response.json())
+    except Exception as e:
+        print(f"Summary generation error: {e}")
+    return ''
+
+
+async def remote_summary(story_text, max_words=CHUNK_WORDS):
+    """map_reduce_summarize, with the chunk summaries awaited together instead of run on chunk_pool"""
+    if len(story_text.split()) <= max_words:
+        return await bart_summary(story_text)
+    chunks = split_into_chunks(story_text, max_words)
+    partials = await asyncio.gather(*(bart_summary(chunk) for chunk in chunks))
+    partials = [partial or await run_blocking(summarize_extractive, chunk) for chunk, partial in zip(chunks, partials)]
+    combined = " ".join(partials)
+    if len(combined.split()) >= len(story_text.split()):
+        # Summaries are not getting shorter, stop rather than loop forever
+        return await run_blocking(summarize_extractive, combined)
+    return await remote_summary(combined, max_words)
+
+
+async def request_summary(story_text):
+    """BART when it is configured, the local extractive summary when it is not or fails"""
+    summary = ''
+    if pipeline.SUMMARY_BACKEND != 'extractive':
+        summary = await remote_summary(story_text)
+    return summary or await run_blocking(pipeline.extractive_summary, story_text)
+
+
+async def remote_quiz(story_text):
+    """Ask the FLAN-T5 model for quiz questions, returning [] on failure"""
+    try:
+        response = await call_inference_endpoint(pipeline.quiz_breaker, pipeline.HUGGINGFACE_QA_URL,
+                                                 pipeline.quiz_payload(story_text))
+        if response is not None and response.status_code == 200:
+            return pipeline.quiz_questions_from_result(response.json(), story_text)
+    except Exception as e:
+        print(f"Quiz generation error: {e}")
+    return []
+
+
+async def generate_quiz_entry(story_text):
+    """Like quiz_pipeline.generate_quiz_entry, awaiting both model calls side by side"""
+    if not pipeline.has_huggingface_key() or pipeline.quiz_breaker.is_open():
+        # No model call to wait on: the fallback is all local work
+        return await run_blocking(pipeline.generate_quiz_entry, story_text)
+
+    tasks = {asyncio.create_task(request_summary(story_text)): 'summary',
+             asyncio.create_task(remote_quiz(story_text)): 'quiz'}
+    results = {'summary': '', 'quiz': []}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks[task]] = task.result()
+            if not all(results[tasks[task]] for task in done):
+                # The fallback is unavoidable now, stop waiting for the other call
+                break
+    except Exception as e:
+        print(f"Error in generate_quiz_entry: {e}")
+    finally:
+        for task in pending:
+            task.cancel()
+    return await run_blocking(pipeline.model_entry, story_text, results['summary'], results['quiz'])
+
+
+async def _generate_and_cache(story_text, cache_key):
+    entry = await generate_quiz_entry(story_text)
+    if entry.get('cacheable'):
+        await run_blocking(pipeline.result_cache.set, cache_key, entry)
+    return entry
+
+
+async def generate_quiz(story_text):
+    """Generate the structured quiz, reusing cached results for stories we have already seen"""
+    cache_key = make_cache_key(story_text, pipeline.GENERATION_VERSION)
+    entry = await run_blocking(pipeline.result_cache.get, cache_key)
+    if entry is None:
+        task = _in_flight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(_generate_and_cache(story_text, cache_key))
+            _in_flight[cache_key] = task
+            task.add_done_callback(lambda _: _in_flight.pop(cache_key, None))
+        entry = await asyncio.shield(task)
+    return pipeline.quiz_from_entry(entry)
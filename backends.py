@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Backend:
+    """A way of doing one pipeline task ('summary' or 'quiz') for a story.
+
+    ``func(story_text)`` returns the result, or something falsy / raises on failure.
+    Lower ``tier`` means better output; the router only drops to a higher tier when
+    every backend of the better tier is failing or slow. A backend whose circuit
+    ``breaker`` is open is skipped entirely.
+    """
+
+    def __init__(self, name, task, func, tier=0, available=None, breaker=None):
+        self.name = name
+        self.task = task
+        self.func = func
+        self.tier = tier
+        self.breaker = breaker
+        self._available = available
+
+    def available(self):
+        if self.breaker is not None and self.breaker.is_open():
+            return False
+        return self._available() if self._available else True
+
+    def run(self, story_text):
+        return self.func(story_text)
+
+
+class LatencyStats:
+    """Rolling window of call latencies and outcomes for one backend"""
+
+    def __init__(self, window=100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, ok):
+        with self._lock:
+            self._samples.append((elapsed, ok))
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {"calls": 0, "p50": None, "p95": None, "error_rate": 0.0}
+        latencies = sorted(elapsed for elapsed, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "calls": len(samples),
+            "p50": latencies[int(0.50 * (len(latencies) - 1))],
+            "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "error_rate": round(errors / len(samples), 3)
+        }
+
+
+class BackendRouter:
+    """Registry of backends plus latency-aware routing between them.
+
+    For each call the router tries the best tier first, fastest (rolling p50) healthy
+    backend first. If the primary has not answered by its hedge deadline (its own p95,
+    or ``hedge_after`` seconds) a second backend is started and the first good answer
+    wins. Failures move straight on to the next candidate.
+    """
+
+    def __init__(self, max_error_rate=0.5, min_samples=5, hedge_after=None, max_workers=8):
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.hedge_after = hedge_after
+        self._backends = []
+        self._stats = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backend')
+
+    def register(self, backend):
+        self._backends.append(backend)
+        self._stats[backend.name] = LatencyStats()
+        return backend
+
+    def backends(self, task):
+        return [backend for backend in self._backends if backend.task == task]
+
+    def healthy(self, backend):
+        stats = self._stats[backend.name].snapshot()
+        return stats["calls"] < self.min_samples or stats["error_rate"] <= self.max_error_rate
+
+    def candidates(self, task):
+        """Available backends in the order they should be tried"""
+        def sort_key(backend):
+            p50 = self._stats[backend.name].snapshot()["p50"]
+            # Unhealthy backends go last rather than disappearing, so they can recover
+            return (not self.healthy(backend), backend.tier, p50 if p50 is not None else 0.0)
+        return sorted((b for b in self.backends(task) if b.available()), key=sort_key)
+
+    def hedge_delay(self, backend):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        stats = self._stats[backend.name].snapshot()
+        if stats["calls"] < self.min_samples:
+            return None
+        return stats["p95"]
+
+    def _call(self, backend, story_text):
+        started = time.perf_counter()
+        try:
+            result = backend.run(story_text)
+        except Exception as e:
+            print(f"Backend {backend.name} error: {e}")
+            result = None
+        self._stats[backend.name].record(time.perf_counter() - started, bool(result))
+        return result or None
+
+    def run(self, task, story_text):
+        """Return the first good result for ``task``, or None when every backend failed"""
+        candidates = self.candidates(task)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return self._call(candidates[0], story_text)
+
+        pending = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            backend = candidates[next_index]
+            next_index += 1
+            pending[self._executor.submit(self._call, backend, story_text)] = backend
+
+        launch()
+        while pending:
+            timeout = self.hedge_delay(candidates[0]) if next_index < len(candidates) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is slower than usual: hedge with the next candidate
+                launch()
+                continue
+            for future in done:
+                pending.pop(future)
+                result = future.result()
+                if result:
+                    for other in pending:
+                        other.cancel()
+                    return result
+            if not pending and next_index < len(candidates):
+                launch()
+        return None
+
+    def stats(self):
+        stats = {}
+        for backend in self._backends:
+            stats[backend.name] = dict(self._stats[backend.name].snapshot(), task=backend.task, tier=backend.tier,
+                                       healthy=self.healthy(backend), available=backend.available())
+            if backend.breaker is not None:
+                stats[backend.name]["circuit"] = backend.breaker.snapshot()
+        return stats
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark password checks (logins) through the hashing pool
+
+Usage: python bench_passwords.py [logins per run]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from password_hasher import HasherBusy, PasswordHasher
+
+def bench_logins(logins=40):
+    """Logins/sec for each work factor and pool size, as 16 request threads would see them"""
+    cores = os.cpu_count() or 1
+    print(f"Password checks, {logins} logins from 16 threads ({cores} cores)")
+    print(f"{'rounds':>7} {'workers':>8} {'seconds':>8} {'logins/s':>9} {'per core':>9} {'rejected':>9}")
+    for rounds in (10, 12):
+        for workers in sorted({1, cores}):
+            hasher = PasswordHasher(rounds=rounds, workers=workers, max_pending=logins, timeout=120)
+            hashed = hasher.hash("correct horse battery staple")
+
+            def login(_):
+                try:
+                    return hasher.check(hashed, "correct horse battery staple")
+                except HasherBusy:
+                    return None
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=16) as threads:
+                results = list(threads.map(login, range(logins)))
+            elapsed = time.perf_counter() - started
+            assert all(result is not False for result in results)
+            rate = logins / elapsed
+            print(f"{rounds:>7} {workers:>8} {elapsed:>8.2f} {rate:>9.1f} {rate / min(workers, cores):>9.1f} "
+                  f"{results.count(None):>9}")
+            hasher.pool.shutdown()
+
+if __name__ == "__main__":
+    bench_logins(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
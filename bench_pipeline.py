@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the text pipeline
+
+Usage: python bench_pipeline.py
+"""
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chunking import map_reduce_summarize, split_into_chunks
+from extractive_summarizer import summarize_extractive
+from hf_client import InferenceClient
+from stub_inference_server import StubInferenceServer
+from story_analysis import (
+    StoryAnalysis, ACTION_WORDS, TIME_WORDS, EMOTION_WORDS, PLOT_VERBS, DESCRIPTIVE_WORDS, TRAVEL_WORDS,
+    DIALOGUE_WORDS, LESSON_WORDS, CONTRAST_WORDS, NATURE_WORDS, URBAN_WORDS, INDOOR_WORDS
+)
+
+SAMPLE_STORY = """In a small village near the mountains, there lived a brave knight named Sir Robert. 
+He was known throughout the kingdom for his courage and loyalty. One morning, 
+a messenger arrived with urgent news: a dragon had been terrorizing nearby towns. 
+Sir Robert immediately set out on his horse Thunder to face the beast. After 
+three days of travel, he reached the dragon's lair in the Black Mountains. 
+The battle was fierce, with fire and sword clashing for hours. Using his wit 
+and skill, Sir Robert managed to defeat the dragon and save the kingdom. 
+The people celebrated his return with a grand feast that lasted three days. """
+
+LEXICONS = (TIME_WORDS, EMOTION_WORDS, PLOT_VERBS, DESCRIPTIVE_WORDS, TRAVEL_WORDS)
+SINGLE_CHECKS = (DIALOGUE_WORDS, ('learn', 'lesson', 'realize'), CONTRAST_WORDS,
+                 ('forest', 'tree'), ('city', 'building', 'street'), ('house', 'home', 'room'))
+
+def make_story(words):
+    """Repeat the sample story until it has roughly `words` words"""
+    sample_words = len(SAMPLE_STORY.split())
+    return SAMPLE_STORY * max(1, words // sample_words)
+
+def make_varied_story(words, seed=7):
+    """Synthetic story of roughly `words` words with distinct sentences (no repeated text)"""
+    rng = random.Random(seed)
+    vocabulary = [w.strip('.,:') for w in SAMPLE_STORY.split()] + [f"thing{i}" for i in range(2000)]
+    sentences = []
+    total = 0
+    while total < words:
+        length = rng.randint(8, 20)
+        sentences.append(" ".join(rng.choice(vocabulary) for _ in range(length)).capitalize())
+        total += length
+    return ". ".join(sentences) + "."
+
+def timed(func, *args, repeat=5):
+    """Best-of-`repeat` wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def substring_scans(story_text):
+    """The fallback's old analysis: repeated splits and a substring scan per keyword"""
+    sentences = [s.strip() for s in story_text.split('.') if s.strip()]
+    words = story_text.split()
+    lower_text = story_text.lower()
+    words_lower = [w.lower() for w in words]
+    action_sentence = next((sent for sent in sentences[1:-1]
+                            if any(word in sent.lower() for word in ACTION_WORDS)), None)
+    found = [[word for word in lexicon if word in lower_text] for lexicon in LEXICONS]
+    checks = [any(word in lower_text for word in group) for group in SINGLE_CHECKS]
+    return sentences, words_lower, action_sentence, found, checks
+
+def token_lookups(story_text):
+    """The same questions answered from a single StoryAnalysis"""
+    analysis = StoryAnalysis(story_text)
+    action_sentence = next((analysis.sentences[i] for i in range(1, len(analysis.sentences) - 1)
+                            if analysis.sentence_has_action(i)), None)
+    found = [analysis.found(lexicon) for lexicon in LEXICONS]
+    checks = [analysis.has_any(group) for group in (DIALOGUE_WORDS, LESSON_WORDS, CONTRAST_WORDS,
+                                                    NATURE_WORDS, URBAN_WORDS, INDOOR_WORDS)]
+    return analysis.sentences, analysis.words_lower, action_sentence, found, checks
+
+def bench_story_analysis():
+    print("Story analysis: substring scans vs tokenize-once lookups")
+    print(f"{'words':>8} {'substring ms':>14} {'tokenized ms':>14}")
+    for words in (150, 1000, 10000, 50000):
+        story = make_story(words)
+        print(f"{len(story.split()):>8} {timed(substring_scans, story):>14.2f} {timed(token_lookups, story):>14.2f}")
+
+def bench_extractive():
+    print("Extractive summarizer: latency and summary length vs input size")
+    print(f"{'words':>8} {'sentences':>10} {'ms':>10} {'summary words':>14}")
+    for words in (150, 1000, 10000, 50000):
+        story = make_varied_story(words)
+        analysis = StoryAnalysis(story)
+        elapsed = timed(summarize_extractive, story, repeat=3)
+        summary = summarize_extractive(story)
+        print(f"{len(story.split()):>8} {len(analysis.sentences):>10} {elapsed:>10.1f} {len(summary.split()):>14}")
+
+def bench_map_reduce(latency=0.05):
+    """Map-reduce summarization throughput against a stub model with fixed latency"""
+    server = StubInferenceServer(latency=latency).start()
+    client = InferenceClient()
+    url = f"{server.url}/models/bart"
+
+    def summarize(text):
+        response = client.post(url, json={"inputs": text})
+        return response.json()[0]["summary_text"] if response.status_code == 200 else ''
+
+    print(f"Map-reduce summarization (stub model latency {latency * 1000:.0f} ms per call)")
+    print(f"{'words':>8} {'chunks':>7} {'workers':>8} {'calls':>6} {'seconds':>8} {'words/s':>9}")
+    try:
+        for words in (500, 2000, 10000, 50000):
+            story = make_varied_story(words)
+            chunks = len(split_into_chunks(story))
+            for workers in (1, 4, 8):
+                executor = ThreadPoolExecutor(max_workers=workers)
+                calls_before = server.requests
+                started = time.perf_counter()
+                map_reduce_summarize(story, summarize, executor)
+                elapsed = time.perf_counter() - started
+                executor.shutdown()
+                total_words = len(story.split())
+                print(f"{total_words:>8} {chunks:>7} {workers:>8} {server.requests - calls_before:>6} "
+                      f"{elapsed:>8.2f} {total_words / elapsed:>9.0f}")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    bench_story_analysis()
+    print()
+    bench_extractive()
+    print()
+    bench_map_reduce()
@@ -0,0 +1,95 @@
+from story_analysis import StoryAnalysis
+
+# BART reads at most 1024 tokens; 600 words stays safely under that
+CHUNK_WORDS = 600
+
+
+def summarize_extractive(*args, **kwargs):
+    # numpy/scipy are imported on first use so importing the pipeline stays fast
+    from extractive_summarizer import summarize_extractive
+    return summarize_extractive(*args, **kwargs)
+
+
+def split_into_chunks(story_text, max_words=CHUNK_WORDS, analysis=None):
+    """Group whole sentences into windows of at most ``max_words`` words.
+
+    A single sentence longer than the window is cut on word boundaries.
+    """
+    if analysis is None:
+        analysis = StoryAnalysis(story_text)
+    chunks = []
+    current = []
+    current_words = 0
+    for sentence in analysis.sentences:
+        words = sentence.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_words = [], 0
+            chunks.append(" ".join(words[:max_words]) + ".")
+            words = words[max_words:]
+        if not words:
+            continue
+        if current_words + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current, current_words = [], 0
+        current.append(" ".join(words) + ".")
+        current_words += len(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def map_reduce_summarize(story_text, summarize, executor, max_words=CHUNK_WORDS, fallback=summarize_extractive):
+    """Summarize a story of any length with a model that only reads ``max_words`` words.
+
+    Map: every chunk is summarized in parallel on ``executor`` (which bounds the
+    concurrency). Reduce: the chunk summaries are joined and summarized again, repeating
+    while they are still too long. A chunk the model fails on gets ``fallback`` instead,
+    but when the model failed on every chunk the result is '' like any other model
+    failure, so the backend router records the outage and picks the next backend.
+    """
+    if len(story_text.split()) <= max_words:
+        return summarize(story_text) or ''
+
+    chunks = split_into_chunks(story_text, max_words)
+    futures = [executor.submit(summarize, chunk) for chunk in chunks]
+    partials = []
+    failures = 0
+    for chunk, future in zip(chunks, futures):
+        try:
+            partial = future.result()
+        except Exception as e:
+            print(f"Chunk summary error: {e}")
+            partial = ''
+        if not partial:
+            failures += 1
+            partial = fallback(chunk)
+        partials.append(partial)
+    if failures == len(chunks):
+        return ''
+
+    combined = " ".join(partials)
+    if len(combined.split()) >= len(story_text.split()):
+        # Summaries are not getting shorter, stop rather than loop forever
+        return fallback(combined)
+    return map_reduce_summarize(combined, summarize, executor, max_words, fallback)
+
+
+def quiz_excerpt(story_text, max_chars=1500, max_words=CHUNK_WORDS, min_chars_per_chunk=250):
+    """Text for the quiz prompt that covers the whole story, not just its opening.
+
+    Short stories are used as is. Long ones contribute the most central sentences of
+    evenly spaced chunks (all chunks when they fit), sharing the character budget.
+    """
+    if len(story_text) <= max_chars:
+        return story_text
+    chunks = split_into_chunks(story_text, max_words)
+    picks = min(len(chunks), max(1, max_chars // min_chars_per_chunk))
+    budget = max_chars // picks
+    parts = []
+    for i in range(picks):
+        chunk = chunks[i * len(chunks) // picks]
+        picked = summarize_extractive(chunk, max_sentences=3)
+        parts.append(picked[:budget].rsplit(' ', 1)[0] if len(picked) > budget else picked)
+    return " ".join(parts)[:max_chars]
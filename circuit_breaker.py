@@ -0,0 +1,86 @@
+import multiprocessing
+import time
+
+CLOSED = 0
+OPEN = 1
+HALF_OPEN = 2
+STATE_NAMES = {CLOSED: 'closed', OPEN: 'open', HALF_OPEN: 'half-open'}
+
+# Slots in the shared array
+_STATE, _FAILURES, _OPENED_AT, _PROBING = range(4)
+
+
+class CircuitBreaker:
+    """Circuit breaker whose state lives in shared memory.
+
+    The array and lock are created when the module-level breakers are built. With
+    gunicorn's ``preload_app = True`` that happens in the master before forking, so all
+    workers see the same state and fail fast together. (Without preloading each worker
+    simply keeps its own breaker.)
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls are
+    refused for ``reset_timeout`` seconds. Then one probe call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = multiprocessing.Lock()
+        self._shared = multiprocessing.RawArray('d', 4)
+
+    def is_open(self):
+        """True while calls would be refused (does not take the half-open probe slot)"""
+        with self._lock:
+            state = self._shared[_STATE]
+            if state == OPEN:
+                return time.time() - self._shared[_OPENED_AT] < self.reset_timeout
+            return state == HALF_OPEN and self._probe_in_flight()
+
+    def allow(self):
+        """Whether a call may go ahead now; in half-open only one probe is allowed"""
+        with self._lock:
+            state = self._shared[_STATE]
+            if state == CLOSED:
+                return True
+            if state == OPEN:
+                if time.time() - self._shared[_OPENED_AT] < self.reset_timeout:
+                    return False
+                self._shared[_STATE] = HALF_OPEN
+                self._shared[_PROBING] = 0
+            if self._probe_in_flight():
+                return False
+            self._shared[_PROBING] = 1
+            self._shared[_OPENED_AT] = time.time()
+            return True
+
+    def _probe_in_flight(self):
+        # A probe whose worker died never reports back, so it only blocks others for one timeout
+        return self._shared[_PROBING] == 1 and time.time() - self._shared[_OPENED_AT] < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            if self._shared[_STATE] != CLOSED:
+                print(f"Circuit {self.name} closed")
+            self._shared[_STATE] = CLOSED
+            self._shared[_FAILURES] = 0
+            self._shared[_PROBING] = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._shared[_FAILURES] += 1
+            self._shared[_PROBING] = 0
+            if self._shared[_STATE] == HALF_OPEN or self._shared[_FAILURES] >= self.failure_threshold:
+                if self._shared[_STATE] != OPEN:
+                    print(f"Circuit {self.name} opened after {int(self._shared[_FAILURES])} failures")
+                self._shared[_STATE] = OPEN
+                self._shared[_OPENED_AT] = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": STATE_NAMES[int(self._shared[_STATE])],
+                "failures": int(self._shared[_FAILURES]),
+                "opened_at": self._shared[_OPENED_AT] or None
+            }
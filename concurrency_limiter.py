@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LimiterFull(Exception):
+    """Raised when a request class already has its maximum running and queued"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Caps how many requests of one class run at once in a worker process.
+
+    Generation requests spend up to minutes waiting on the inference API. Under gthread
+    each one holds a thread, so without a cap a burst of them takes every thread of the
+    worker and login or page requests queue behind them. At most ``limit`` requests
+    hold a slot; up to ``max_queue`` more wait for one (at most ``queue_timeout``
+    seconds), and anything beyond that raises LimiterFull straight away, so the caller
+    can answer 503. worker_sizing.py sizes the gthread pool to ``limit + max_queue``
+    plus threads kept for everything else.
+
+    Slots are per process, like the threads they protect.
+    """
+
+    def __init__(self, name, limit=4, max_queue=2, queue_timeout=10.0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "peak_waiting": 0,
+                       "wait_seconds": 0.0, "max_wait_seconds": 0.0, "completed": 0, "held_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls, name='generation', environ=os.environ):
+        return cls(
+            name,
+            limit=int(environ.get('GENERATION_SLOTS', 4)),
+            max_queue=int(environ.get('GENERATION_QUEUE', 2)),
+            queue_timeout=float(environ.get('GENERATION_QUEUE_TIMEOUT', 10))
+        )
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room; raises LimiterFull otherwise"""
+        with self._cond:
+            started = time.monotonic()
+            if self._active >= self.limit or self._waiting:
+                if self._waiting >= self.max_queue:
+                    self._stats["rejected"] += 1
+                    raise LimiterFull(f"{self.name}: {self._active} running, {self._waiting} queued",
+                                      self._retry_after())
+                self._waiting += 1
+                self._stats["queued"] += 1
+                self._stats["peak_waiting"] = max(self._stats["peak_waiting"], self._waiting)
+                try:
+                    deadline = started + self.queue_timeout
+                    while self._active >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timed_out"] += 1
+                            raise LimiterFull(f"{self.name}: no slot within {self.queue_timeout}s",
+                                              self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            waited = time.monotonic() - started
+            self._active += 1
+            self._stats["admitted"] += 1
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            return time.monotonic()
+
+    def release(self, acquired_at):
+        """Give back a slot taken by ``acquire`` (pass what it returned)"""
+        with self._cond:
+            self._active -= 1
+            self._stats["completed"] += 1
+            self._stats["held_seconds"] += time.monotonic() - acquired_at
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        acquired_at = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(acquired_at)
+
+    def _retry_after(self):
+        """Seconds a rejected client should wait: about how long the running and queued work takes (lock held)"""
+        completed = self._stats["completed"]
+        average = self._stats["held_seconds"] / completed if completed else 5.0
+        return max(1, round(average * (self._active + self._waiting) / max(self.limit, 1)))
+
+    def stats(self):
+        with self._cond:
+            admitted = self._stats["admitted"]
+            completed = self._stats["completed"]
+            return {
+                "limit": self.limit,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "waiting": self._waiting,
+                "peak_waiting": self._stats["peak_waiting"],
+                "admitted": admitted,
+                "queued": self._stats["queued"],
+                "rejected": self._stats["rejected"],
+                "timed_out": self._stats["timed_out"],
+                "avg_wait_ms": round(1000 * self._stats["wait_seconds"] / admitted, 1) if admitted else None,
+                "max_wait_ms": round(1000 * self._stats["max_wait_seconds"], 1),
+                "avg_held_ms": round(1000 * self._stats["held_seconds"] / completed, 1) if completed else None
+            }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for story and quiz text
+
+Quiz results used to carry a full copy of the story and of the formatted quiz. Now
+each distinct text is stored once in ``contents`` under the sha256 of its bytes, and
+quiz results keep only the hashes (``story_ref`` / ``summary_ref``). Bodies larger
+than COMPRESS_MIN_BYTES are zlib-compressed when that actually makes them smaller.
+
+Usage:
+    python content_store.py migrate   # move story/summary out of existing quiz_results
+    python content_store.py report    # bytes stored vs. bytes referenced
+"""
+import hashlib
+import sys
+import zlib
+
+from bson import Binary
+from pymongo import UpdateOne
+
+COMPRESS_MIN_BYTES = 1024
+
+
+def content_ref(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def encode_body(data):
+    """(body, encoding) to store for the UTF-8 bytes ``data``"""
+    if len(data) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return Binary(compressed), 'zlib'
+    return data.decode('utf-8'), 'text'
+
+
+def decode_body(doc):
+    if doc.get('encoding') == 'zlib':
+        return zlib.decompress(doc['body']).decode('utf-8')
+    return doc['body']
+
+
+def put_content(db, text, refs=1):
+    """Store ``text`` if it is new, count ``refs`` more references to it and return its hash"""
+    ref = content_ref(text)
+    data = text.encode('utf-8')
+    body, encoding = encode_body(data)
+    db.contents.update_one(
+        {"_id": ref},
+        {"$setOnInsert": {"body": body, "encoding": encoding, "size": len(data),
+                          "stored_size": len(body) if encoding == 'zlib' else len(data)},
+         "$inc": {"refs": refs}},
+        upsert=True
+    )
+    return ref
+
+
+def get_content(db, ref):
+    doc = db.contents.find_one({"_id": ref}, {"body": 1, "encoding": 1})
+    return decode_body(doc) if doc else None
+
+
+def quiz_texts(db, quiz):
+    """(story, summary) of a quiz_results document, whether migrated or not"""
+    story = quiz.get('story')
+    summary = quiz.get('summary')
+    if story is None and quiz.get('story_ref'):
+        story = get_content(db, quiz['story_ref'])
+    if summary is None and quiz.get('summary_ref'):
+        summary = get_content(db, quiz['summary_ref'])
+    return story, summary
+
+
+def migrate(db, batch_size=500):
+    """Replace inline story/summary text in quiz_results with content references.
+
+    Safe to re-run: only documents that still carry inline text are touched.
+    Returns the number of quiz results migrated.
+    """
+    migrated = 0
+    while True:
+        batch = list(db.quiz_results.find({"story": {"$exists": True}}, {"story": 1, "summary": 1})
+                     .limit(batch_size))
+        if not batch:
+            return migrated
+        updates = []
+        for quiz in batch:
+            fields = {}
+            for field in ('story', 'summary'):
+                if isinstance(quiz.get(field), str):
+                    fields[f"{field}_ref"] = put_content(db, quiz[field])
+            updates.append(UpdateOne({"_id": quiz["_id"]},
+                                     {"$set": fields, "$unset": {"story": "", "summary": ""}}))
+        db.quiz_results.bulk_write(updates, ordered=False)
+        migrated += len(updates)
+        print(f"Migrated {migrated} quiz results...")
+
+
+def report(db):
+    """Bytes the references stand for, bytes actually stored and the difference"""
+    totals = {"documents": 0, "references": 0, "logical_bytes": 0, "stored_bytes": 0}
+    for doc in db.contents.find({}, {"size": 1, "stored_size": 1, "refs": 1}):
+        totals["documents"] += 1
+        totals["references"] += doc.get("refs", 0)
+        totals["logical_bytes"] += doc.get("size", 0) * doc.get("refs", 0)
+        totals["stored_bytes"] += doc.get("stored_size", 0)
+    totals["bytes_saved"] = totals["logical_bytes"] - totals["stored_bytes"]
+    totals["inline_quizzes_left"] = db.quiz_results.count_documents({"story": {"$exists": True}})
+    return totals
+
+
+def main(argv):
+    from db_indexes import connect_from_env
+
+    command = argv[1] if len(argv) > 1 else 'report'
+    db = connect_from_env()
+    if command == 'migrate':
+        print(f"✅ Migrated {migrate(db)} quiz results")
+        command = 'report'
+    if command == 'report':
+        totals = report(db)
+        print(f"Contents: {totals['documents']} documents for {totals['references']} references")
+        print(f"Referenced: {totals['logical_bytes']:,} bytes, stored: {totals['stored_bytes']:,} bytes")
+        print(f"✅ Saved {totals['bytes_saved']:,} bytes "
+              f"({totals['inline_quizzes_left']} quiz results still store text inline)")
+        return 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
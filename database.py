@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+from flask_pymongo import PyMongo
+
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of blocking when MongoDB is not configured or could not be reached"""
+
+
+class LazyMongo:
+    """Flask-PyMongo, connected on first use instead of at import.
+
+    Importing the app used to create the client and ping MongoDB, which slowed every boot
+    and made scripts that only need the text pipeline depend on a live database. Now
+    ``db`` connects (and pings) the first time it is used in a process, then runs the
+    ``on_connect`` hooks once (index creation, attaching the queues and caches). Creating
+    the client in each worker rather than in the preloading gunicorn master also means no
+    MongoClient is ever shared across a fork. After a failed attempt, further uses fail
+    fast with DatabaseUnavailable for ``retry_interval`` seconds.
+    """
+
+    def __init__(self, app, uri=None, timeout_ms=5000, retry_interval=5.0):
+        self.app = app
+        self.uri = uri
+        self.timeout_ms = timeout_ms
+        self.retry_interval = retry_interval
+        self.connect_seconds = None
+        self.last_error = None
+        self._mongo = None
+        self._pid = None
+        self._failed_at = None
+        self._hooks = []
+        self._lock = threading.Lock()
+        self._background_pid = None
+
+    def on_connect(self, hook):
+        """Register ``hook(db)`` to run once per process after the first successful connection"""
+        self._hooks.append(hook)
+        return hook
+
+    @property
+    def connected(self):
+        """Whether this process has connected; never touches the network"""
+        return self._mongo is not None and self._pid == os.getpid()
+
+    @property
+    def db(self):
+        if not self.connected:
+            self.connect()
+        return self._mongo.db
+
+    @property
+    def cx(self):
+        if not self.connected:
+            self.connect()
+        return self._mongo.cx
+
+    def connect(self):
+        with self._lock:
+            if self.connected:
+                return
+            if not self.uri:
+                raise DatabaseUnavailable("MONGO_URI is not set")
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+                raise DatabaseUnavailable(self.last_error)
+            started = time.perf_counter()
+            mongo = PyMongo()
+            try:
+                print(">>> Starting MongoDB connection...")
+                self.app.config["MONGO_URI"] = self.uri
+                mongo.init_app(self.app, serverSelectionTimeoutMS=self.timeout_ms)
+                if mongo.db is None:
+                    raise ValueError("MONGO_URI must include a database name")
+                if mongo.db.command('ping').get('ok') != 1:
+                    raise Exception("MongoDB ping failed")
+                for hook in self._hooks:
+                    hook(mongo.db)
+            except Exception as e:
+                if mongo.cx is not None:
+                    mongo.cx.close()
+                self._failed_at = time.monotonic()
+                self.last_error = f"MongoDB connection failed: {e}"
+                print(f"❌ {self.last_error}")
+                raise DatabaseUnavailable(self.last_error) from e
+            self._mongo = mongo
+            self._pid = os.getpid()
+            self._failed_at = None
+            self.last_error = None
+            self.connect_seconds = time.perf_counter() - started
+            print(f">>> Database connected in {self.connect_seconds * 1000:.0f} ms")
+
+    def available(self):
+        """Connect if needed; False (rather than an exception) when MongoDB is unavailable"""
+        try:
+            self.connect()
+            return True
+        except DatabaseUnavailable:
+            return False
+
+    def connect_in_background(self):
+        """Start connecting on a daemon thread, once per process, so the first request rarely waits"""
+        if self.connected or self._background_pid == os.getpid():
+            return
+        self._background_pid = os.getpid()
+        threading.Thread(target=self.available, name="mongo-connect", daemon=True).start()
+
+    def ping(self):
+        """(ok, milliseconds or error) for readiness checks"""
+        started = time.perf_counter()
+        try:
+            self.db.command('ping')
+        except Exception as e:
+            return False, str(e)
+        return True, round((time.perf_counter() - started) * 1000, 1)
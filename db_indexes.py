@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+MongoDB index management for Story Quiz
+
+Indexes are created once per deploy, not by every worker: gunicorn_config.py runs
+ensure_indexes_from_env() in the gunicorn master before any worker starts (and the
+Flask dev server runs it on its first connection). Creating an index that already
+exists is a no-op. Run ``ensure`` as a deploy step when serving without gunicorn.
+
+Usage:
+    python db_indexes.py ensure   # create missing indexes
+    python db_indexes.py check    # explain() the hot queries and flag collection scans
+"""
+import os
+import sys
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+# collection -> list of (keys, options)
+INDEXES = {
+    'users': [
+        ([("username", ASCENDING)], {"unique": True, "name": "username_unique"}),
+    ],
+    'user_stats': [
+        ([("username", ASCENDING)], {"unique": True, "name": "username_unique"}),
+        ([("score_sum", DESCENDING), ("completed_count", DESCENDING)], {"name": "points_completed"}),
+    ],
+    'daily_rollups': [
+        ([("day", ASCENDING), ("username", ASCENDING)], {"unique": True, "name": "day_username"}),
+    ],
+    'quiz_results': [
+        # _id breaks ties between equal dates for the profile's keyset pagination
+        ([("username", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], {"name": "username_date_id"}),
+    ],
+}
+
+# Indexes made redundant by a wider one above; dropped so writes stop maintaining them
+RETIRED_INDEXES = {
+    'quiz_results': ['username_date'],
+}
+
+# Queries the request handlers run on every page view: (description, collection, filter, sort)
+HOT_QUERIES = [
+    ("login/register/profile user lookup", 'users', {"username": "__probe__"}, None),
+    ("profile quiz history", 'quiz_results', {"username": "__probe__"}, [("date", DESCENDING), ("_id", DESCENDING)]),
+    ("profile stats lookup", 'user_stats', {"username": "__probe__"}, None),
+    ("all-time leaderboard", 'user_stats', {"completed_count": {"$gt": 0}},
+     [("score_sum", DESCENDING), ("completed_count", DESCENDING)]),
+    ("period leaderboard / activity", 'daily_rollups', {"day": {"$in": ["1970-01-01"]}}, None),
+    ("save_score update", 'quiz_results', {"_id": ObjectId(), "username": "__probe__"}, None),
+]
+
+
+def ensure_indexes(db):
+    """Create every index in INDEXES; safe to run repeatedly"""
+    created = []
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            try:
+                created.append(db[collection].create_index(keys, **options))
+            except Exception as e:
+                # e.g. duplicate usernames already stored block the unique index
+                print(f"❌ Could not create index {options.get('name')} on {collection}: {e}")
+    for collection, names in RETIRED_INDEXES.items():
+        try:
+            existing = db[collection].index_information()
+            for name in names:
+                if name in existing:
+                    db[collection].drop_index(name)
+        except Exception as e:
+            print(f"❌ Could not drop retired indexes on {collection}: {e}")
+    return created
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def find_collscans(db):
+    """Return (description, collection, winning stages) for hot queries that scan a whole collection"""
+    problems = []
+    for description, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = list(_plan_stages(winning_plan))
+        if 'COLLSCAN' in stages:
+            problems.append((description, collection, stages))
+    return problems
+
+
+def connect_from_env():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    mongo_uri = os.environ.get("MONGO_URI")
+    if not mongo_uri:
+        raise ValueError("MONGO_URI must be set in environment variables. Please check your .env file.")
+    return MongoClient(mongo_uri, serverSelectionTimeoutMS=5000).get_default_database()
+
+
+def ensure_indexes_from_env():
+    """ensure_indexes with a short-lived client, closed again so nothing is shared across a fork"""
+    db = connect_from_env()
+    try:
+        # Fail once, fast, instead of once per index when MongoDB is unreachable
+        db.command('ping')
+        return ensure_indexes(db)
+    finally:
+        db.client.close()
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'check'
+    db = connect_from_env()
+    if command == 'ensure':
+        for name in ensure_indexes(db):
+            print(f"✅ Index ready: {name}")
+        return 0
+    if command == 'check':
+        problems = find_collscans(db)
+        for description, collection, stages in problems:
+            print(f"❌ COLLSCAN on {collection} for {description}: {' -> '.join(stages)}")
+        if not problems:
+            print(f"✅ All {len(HOT_QUERIES)} hot queries use an index")
+        return 1 if problems else 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,105 @@
+import numpy as np
+from scipy import sparse
+
+from story_analysis import StoryAnalysis
+
+STOPWORDS = frozenset({
+    'a', 'about', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'before',
+    'but', 'by', 'can', 'could', 'did', 'do', 'does', 'for', 'from', 'had', 'has', 'have', 'he', 'her',
+    'hers', 'him', 'his', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'just', 'me', 'my', 'no',
+    'not', 'of', 'on', 'one', 'or', 'our', 'out', 's', 'she', 'so', 'some', 'than', 'that', 'the', 'their',
+    'them', 'then', 'there', 'these', 'they', 'this', 'those', 'to', 'too', 'up', 'very', 'was', 'we',
+    'were', 'what', 'when', 'where', 'which', 'while', 'who', 'will', 'with', 'would', 'you', 'your'
+})
+_STOPWORD_ARRAY = np.array(sorted(STOPWORDS))
+
+# Past this many sentences the full similarity graph gets too dense to be worth it and
+# sentences are ranked by similarity to the document centroid instead
+MAX_GRAPH_SENTENCES = 2000
+
+
+def summary_length(sentence_count):
+    """How many sentences to keep: 3 for short stories, up to 6 for long ones"""
+    return min(6, max(3, sentence_count // 10))
+
+
+def tfidf_matrix(analysis):
+    """Sparse sentence x term TF-IDF matrix with L2-normalized rows"""
+    n = len(analysis.sentences)
+    lengths = np.array([end - start for start, end in analysis.sentence_spans], dtype=np.int64)
+    if not analysis.tokens:
+        return sparse.csr_matrix((n, 0))
+
+    tokens = np.array(analysis.tokens)
+    sentence_ids = np.repeat(np.arange(n), lengths)
+    keep = ~np.isin(tokens, _STOPWORD_ARRAY)
+    vocabulary, term_ids = np.unique(tokens[keep], return_inverse=True)
+    counts = sparse.csr_matrix(
+        (np.ones(term_ids.size), (sentence_ids[keep], term_ids)),
+        shape=(n, vocabulary.size)
+    )
+    counts.sum_duplicates()
+
+    # Sublinear term frequency and smoothed inverse document frequency
+    counts.data = 1.0 + np.log(counts.data)
+    document_frequency = np.bincount(counts.indices, minlength=vocabulary.size)
+    idf = np.log((1.0 + n) / (1.0 + document_frequency)) + 1.0
+    weighted = counts.multiply(idf).tocsr()
+
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ weighted
+
+
+def textrank_scores(matrix, damping=0.85, tolerance=1e-6, max_iterations=100):
+    """PageRank over the cosine-similarity graph of the sentences"""
+    n = matrix.shape[0]
+    similarity = (matrix @ matrix.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1.0
+    transition = (sparse.diags(1.0 / out_weight) @ similarity).T.tocsr()
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        updated = (1.0 - damping) / n + damping * (transition @ scores + scores[dangling].sum() / n)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def centroid_scores(matrix):
+    """Cosine similarity of each sentence to the whole document, O(non-zeros)"""
+    centroid = np.asarray(matrix.sum(axis=0)).ravel()
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(matrix.shape[0])
+    return matrix @ (centroid / norm)
+
+
+def summarize_extractive(story_text=None, max_sentences=None, analysis=None):
+    """Pick the most central sentences of the story and return them in story order"""
+    if analysis is None:
+        analysis = StoryAnalysis(story_text)
+    sentences = analysis.sentences
+    if not sentences:
+        return (story_text or analysis.text).strip()
+
+    keep = max_sentences or summary_length(len(sentences))
+    if len(sentences) <= keep:
+        chosen = range(len(sentences))
+    else:
+        matrix = tfidf_matrix(analysis)
+        if len(sentences) > MAX_GRAPH_SENTENCES:
+            scores = centroid_scores(matrix)
+        else:
+            scores = textrank_scores(matrix)
+        # Stable sort so ties go to the earlier sentence
+        chosen = sorted(np.argsort(-scores, kind='stable')[:keep])
+
+    return ". ".join(" ".join(sentences[i].split()) for i in chosen) + "."
@@ -1,5 +1,7 @@
 import os
 
+from worker_sizing import plan
+
 # Debug: Check what PORT Render is providing
 print(">>> Gunicorn binding to PORT:", os.environ.get("PORT"))
 print(">>> Full bind address will be:", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
@@ -7,16 +9,27 @@ print(">>> Full bind address will be:", f"0.0.0.0:{os.environ.get('PORT', '8000'
 # Bind to the port that Render provides via the PORT environment variable
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
 
-# Worker configuration  
-workers = 4
-threads = 4
-worker_class = 'gthread'
+# Worker configuration, sized from the CPUs and memory of the instance (see worker_sizing.py)
+sizing = plan()
+print(">>> Worker sizing:", sizing)
+workers = sizing['workers']
+threads = sizing['threads']
+
+# SERVING_MODE=asgi serves asgi.py on uvicorn workers: /generate waits on the
+# inference API without holding a thread, everything else still runs through Flask
+serving_mode = os.environ.get('SERVING_MODE', 'gthread').lower()
+if serving_mode == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'asgi:application'
+else:
+    worker_class = 'gthread'
+    wsgi_app = 'app:app'
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 50
 
 # Timeout configuration
-timeout = 300
+timeout = sizing['timeout']
 graceful_timeout = 60
 keepalive = 2
 
@@ -28,4 +41,17 @@ loglevel = 'info'
 # Preload app for better performance
 preload_app = True
 
-print(f"Gunicorn starting on {bind}")
\ No newline at end of file
+
+def on_starting(server):
+    # Indexes are created here, once in the master, rather than by every worker on connect
+    if not os.environ.get('MONGO_URI'):
+        return
+    from db_indexes import ensure_indexes_from_env
+    try:
+        print(f">>> MongoDB indexes ready: {', '.join(ensure_indexes_from_env())}")
+    except Exception as e:
+        # Workers still boot; run `python db_indexes.py ensure` once MongoDB is reachable
+        print(f"❌ Could not create MongoDB indexes at startup: {e}")
+
+
+print(f"Gunicorn starting on {bind} ({worker_class})")
\ No newline at end of file
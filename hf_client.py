@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class InferenceClient:
+    """Keep-alive HTTP client for the Hugging Face inference API.
+
+    Each worker process gets its own pooled requests.Session (created lazily, so
+    sockets are never shared across a gunicorn fork). Cold models answer 503 with an
+    ``estimated_time``; those responses are retried while the total latency budget
+    for the call allows it. A read timeout is not retried: the call has already
+    waited ``timeout`` seconds, and another attempt would only stretch it to the budget.
+    """
+
+    def __init__(self, pool_size=10, timeout=30, budget=45, max_retries=3, max_wait=20):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.budget = budget
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_size=int(os.environ.get('HF_POOL_SIZE', 10)),
+            timeout=float(os.environ.get('HF_TIMEOUT', 30)),
+            budget=float(os.environ.get('HF_RETRY_BUDGET', 45)),
+            max_retries=int(os.environ.get('HF_MAX_RETRIES', 3)),
+            max_wait=float(os.environ.get('HF_MAX_RETRY_WAIT', 20))
+        )
+
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
+
+    def retry_delay(self, response, attempt):
+        """Seconds to wait before retrying, preferring the server's own estimate"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        if response is not None:
+            try:
+                body = response.json()
+                if isinstance(body, dict) and body.get('estimated_time'):
+                    return float(body['estimated_time'])
+            except ValueError:
+                pass
+        # Exponential backoff when the server gives no hint
+        return min(0.5 * (2 ** attempt), self.max_wait)
+
+    def post(self, url, budget=None, **kwargs):
+        """POST with retries, never spending more than ``budget`` seconds in total"""
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        response = None
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = self.session.post(url, timeout=min(self.timeout, remaining), **kwargs)
+                last_error = None
+            except requests.ReadTimeout:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response = None
+                last_error = e
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                return response
+
+            if attempt == self.max_retries:
+                break
+            delay = self.retry_delay(response, attempt)
+            if delay > self.max_wait or time.monotonic() + delay >= deadline:
+                # Waiting out the cold start would blow the budget, give up now
+                break
+            print(f"Inference retry {attempt + 1} for {url} in {delay:.1f}s")
+            time.sleep(delay)
+
+        if response is not None:
+            return response
+        if last_error is not None:
+            raise last_error
+        raise requests.Timeout(f"Latency budget exhausted for {url}")
+
+
+class AsyncInferenceClient(InferenceClient):
+    """InferenceClient for asyncio code (the ASGI serving mode), on an httpx.AsyncClient.
+
+    Same retry policy and budget, but waiting on the network holds no thread, so one
+    process can keep ``pool_size`` requests in flight. The clients are created lazily
+    inside the running event loop.
+
+    httpcore's pool scans every connection on each request, which costs seconds per
+    round once a single pool holds a few hundred. The connections are therefore split
+    across several small clients used in turn.
+    """
+
+    SHARD_CONNECTIONS = 25
+
+    @classmethod
+    def from_env(cls):
+        client = super().from_env()
+        client.pool_size = int(os.environ.get('HF_ASYNC_POOL_SIZE', 200))
+        return client
+
+    @property
+    def session(self):
+        import httpx
+
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            shards = max(1, -(-self.pool_size // self.SHARD_CONNECTIONS))
+            per_shard = -(-self.pool_size // shards)
+            limits = httpx.Limits(max_connections=per_shard, max_keepalive_connections=per_shard)
+            self._session = [httpx.AsyncClient(limits=limits) for _ in range(shards)]
+            self._next_shard = itertools.cycle(self._session)
+            self._session_pid = pid
+        return next(self._next_shard)
+
+    async def post(self, url, budget=None, **kwargs):
+        """POST with retries, never spending more than ``budget`` seconds in total"""
+        import httpx
+
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        response = None
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = await self.session.post(url, timeout=min(self.timeout, remaining), **kwargs)
+                last_error = None
+            except httpx.ReadTimeout:
+                raise
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                response = None
+                last_error = e
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                return response
+
+            if attempt == self.max_retries:
+                break
+            delay = self.retry_delay(response, attempt)
+            if delay > self.max_wait or time.monotonic() + delay >= deadline:
+                break
+            print(f"Inference retry {attempt + 1} for {url} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        if response is not None:
+            return response
+        if last_error is not None:
+            raise last_error
+        raise httpx.TimeoutException(f"Latency budget exhausted for {url}")
+
+    async def aclose(self):
+        if self._session is not None:
+            for client in self._session:
+                await client.aclose()
+            self._session = None
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueue:
+    """MongoDB-backed job queue drained by background threads in each worker process.
+
+    Jobs are claimed atomically with find_one_and_update, so any number of gunicorn
+    workers can share one collection. A job whose lease runs out (its worker died)
+    is picked up again by the next claim.
+
+    ``connect`` is called when a request needs the queue before a collection has been
+    attached (LazyMongo.connect, which runs the attach hook or raises DatabaseUnavailable).
+    """
+
+    def __init__(self, handler, workers=2, poll_interval=0.5, lease_seconds=300, max_attempts=2, connect=None):
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connect = connect
+        self.collection = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def attach(self, collection):
+        collection.create_index([("status", 1), ("created_at", 1)])
+        # Finished jobs are only needed until the client has picked up the result
+        collection.create_index("finished_at", expireAfterSeconds=24 * 3600)
+        self.collection = collection
+
+    def ensure_attached(self):
+        """The collection, connecting first if a request got here before the background connect"""
+        if self.collection is None and self.connect is not None:
+            self.connect()
+        if self.collection is None:
+            raise RuntimeError("Job queue is not attached to a collection")
+        return self.collection
+
+    def start(self):
+        """Start the worker threads once per process (safe to call on every request)"""
+        if self.collection is None or self.workers <= 0 or self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True).start()
+            self._started_pid = os.getpid()
+
+    def enqueue(self, username, payload):
+        now = datetime.now(timezone.utc)
+        job_id = self.ensure_attached().insert_one({
+            "username": username,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }).inserted_id
+        self._wakeup.set()
+        return str(job_id)
+
+    def get(self, job_id, username):
+        try:
+            object_id = ObjectId(job_id)
+        except Exception:
+            return None
+        return self.ensure_attached().find_one({"_id": object_id, "username": username}, {"payload": 0})
+
+    def claim(self):
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "lease_expires": {"$lt": now}, "attempts": {"$lt": self.max_attempts}}
+            ]},
+            {"$set": {
+                "status": RUNNING,
+                "started_at": now,
+                "updated_at": now,
+                "lease_expires": now + timedelta(seconds=self.lease_seconds)
+            }, "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _finish(self, job_id, update):
+        now = datetime.now(timezone.utc)
+        update.update({"updated_at": now, "finished_at": now})
+        self.collection.update_one({"_id": job_id}, {"$set": update, "$unset": {"lease_expires": ""}})
+
+    def fail_abandoned(self):
+        """Give up on jobs whose lease ran out after the last allowed attempt"""
+        now = datetime.now(timezone.utc)
+        self.collection.update_many(
+            {"status": RUNNING, "lease_expires": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": FAILED, "error": "Job abandoned by worker", "updated_at": now, "finished_at": now},
+             "$unset": {"lease_expires": ""}}
+        )
+
+    def run_one(self):
+        """Claim and run a single job, returning False when the queue is empty"""
+        job = self.claim()
+        if job is None:
+            return False
+        started = time.perf_counter()
+        try:
+            result = self.handler(job)
+            self._finish(job["_id"], {"status": DONE, "result": result,
+                                      "elapsed_ms": round((time.perf_counter() - started) * 1000)})
+        except Exception as e:
+            print(f"Job {job['_id']} failed: {e}")
+            self._finish(job["_id"], {"status": FAILED, "error": str(e)})
+        return True
+
+    def _worker_loop(self):
+        while True:
+            try:
+                if self.run_one():
+                    continue
+                self.fail_abandoned()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Leaderboards and activity analytics from daily rollups
+
+``daily_rollups`` holds one document per (IST day, user) with the quizzes the user
+generated that day and the points they scored on them. The documents are updated
+incrementally as quizzes are created and scored, so a leaderboard or activity chart
+only reads the rollups for the days it covers, never the raw quiz_results.
+
+Usage:
+    python leaderboard.py rebuild   # recompute all rollups from quiz_results
+"""
+import heapq
+import sys
+from datetime import datetime, timedelta, timezone
+
+from pymongo import DESCENDING, UpdateOne
+
+# Same offset as app.IST; days are bucketed the way get_ist_time() sees them
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Days covered by each leaderboard period, counting back from today
+PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30}
+
+
+def ist_day(when):
+    """'YYYY-MM-DD' of ``when`` in IST; naive datetimes (as read back from MongoDB) are UTC"""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(IST).strftime('%Y-%m-%d')
+
+
+def recent_days(days, now=None):
+    """The last ``days`` IST days, oldest first, ending today"""
+    today = (now or datetime.now(IST)).astimezone(IST)
+    return [(today - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days - 1, -1, -1)]
+
+
+def record_daily_quiz(db, username, quiz_date, count=1):
+    """Count ``count`` newly generated quizzes in their day's bucket"""
+    db.daily_rollups.update_one(
+        {"day": ist_day(quiz_date), "username": username},
+        {"$inc": {"quizzes": count}},
+        upsert=True
+    )
+
+
+def record_daily_score(db, username, quiz_date, score, old_score=None):
+    """Credit a score to the day the quiz was generated; re-scoring only adds the difference"""
+    if old_score is None:
+        increments = {"completed": 1, "points": score}
+    else:
+        increments = {"points": score - old_score}
+    db.daily_rollups.update_one(
+        {"day": ist_day(quiz_date), "username": username},
+        {"$inc": increments},
+        upsert=True
+    )
+
+
+def top_players(db, period='all', limit=10, now=None):
+    """[{username, points, completed}] ranked by points, then completed quizzes"""
+    if period == 'all':
+        # user_stats is kept sorted by the points_completed index, so this reads ``limit`` documents
+        cursor = (db.user_stats.find({"completed_count": {"$gt": 0}},
+                                     {"_id": 0, "username": 1, "score_sum": 1, "completed_count": 1})
+                  .sort([("score_sum", DESCENDING), ("completed_count", DESCENDING)])
+                  .limit(limit))
+        return [{"username": doc["username"], "points": doc.get("score_sum", 0),
+                 "completed": doc.get("completed_count", 0)} for doc in cursor]
+
+    totals = {}
+    for doc in db.daily_rollups.find({"day": {"$in": recent_days(PERIOD_DAYS[period], now)}},
+                                     {"_id": 0, "username": 1, "points": 1, "completed": 1}):
+        points, completed = totals.get(doc["username"], (0, 0))
+        totals[doc["username"]] = (points + doc.get("points", 0), completed + doc.get("completed", 0))
+    # Bounded heap: O(users * log limit) rather than sorting everyone who played this period
+    best = heapq.nlargest(limit, ((points, completed, username)
+                                  for username, (points, completed) in totals.items() if completed))
+    return [{"username": username, "points": points, "completed": completed}
+            for points, completed, username in best]
+
+
+def activity(db, days=30, now=None):
+    """Per-day totals for the last ``days`` IST days, oldest first, with empty days included"""
+    series = {day: {"day": day, "quizzes": 0, "completed": 0, "points": 0, "active_users": 0}
+              for day in recent_days(days, now)}
+    for doc in db.daily_rollups.find({"day": {"$in": list(series)}}, {"_id": 0}):
+        row = series[doc["day"]]
+        row["quizzes"] += doc.get("quizzes", 0)
+        row["completed"] += doc.get("completed", 0)
+        row["points"] += doc.get("points", 0)
+        row["active_users"] += 1
+    return list(series.values())
+
+
+def _aggregate_rollups(db):
+    """One row per (IST day, user) with totals from quiz_results; the heavy part of rebuild"""
+    pipeline = [
+        {"$group": {
+            "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date", "timezone": "+05:30"}},
+                    "username": "$username"},
+            "quizzes": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$score", None]}, None]}, 0, 1]}},
+            "points": {"$sum": "$score"}
+        }}
+    ]
+    return db.quiz_results.aggregate(pipeline, allowDiskUse=True)
+
+
+def rebuild(db):
+    """Recompute every rollup from quiz_results; returns the number of documents written.
+
+    Rollups are overwritten in place and only afterwards are rows without quizzes left
+    removed, so readers never see an empty leaderboard mid-rebuild. Rows created while
+    it runs are kept, but increments that land on existing rows can be lost, so run it
+    when traffic is quiet.
+    """
+    stale = {(doc["day"], doc["username"]): doc["_id"]
+             for doc in db.daily_rollups.find({}, {"day": 1, "username": 1})}
+    operations = []
+    for row in _aggregate_rollups(db):
+        stale.pop((row["_id"]["day"], row["_id"]["username"]), None)
+        operations.append(UpdateOne(row["_id"], {"$set": {"quizzes": row["quizzes"], "completed": row["completed"],
+                                                          "points": row["points"]}}, upsert=True))
+    if operations:
+        db.daily_rollups.bulk_write(operations, ordered=False)
+    if stale:
+        db.daily_rollups.delete_many({"_id": {"$in": list(stale.values())}})
+    return len(operations)
+
+
+def main(argv):
+    from db_indexes import connect_from_env, ensure_indexes
+
+    if len(argv) < 2 or argv[1] != 'rebuild':
+        print(__doc__)
+        return 2
+    db = connect_from_env()
+    ensure_indexes(db)
+    print(f"✅ Rebuilt {rebuild(db)} daily rollups")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request capacity of the gthread and ASGI serving modes
+
+Starts the stub inference server (stub_inference_server.py) with a fixed latency, then
+one single-worker server per mode against it, and fires N simultaneous POST /generate
+requests at each with a signed session cookie. Each story is unique, so every request
+waits on the stub. gthread finishes about ``threads`` requests per round of latency;
+ASGI should finish all of them in roughly one.
+
+Both servers save quizzes, so MONGO_URI must point at a MongoDB you can write to.
+Use --url to load an already running server instead (e.g. a deployed worker).
+
+Usage:
+    python load_test.py [--requests 200] [--latency 1.0] [--threads 4]
+    python load_test.py --url http://127.0.0.1:8000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from flask import Flask
+
+from stub_inference_server import StubInferenceServer
+
+STORY = ("The old lighthouse keeper climbed the stairs every night to light the lamp. One stormy evening "
+         "a small fishing boat lost its way near the rocks. The keeper saw the boat and rang the bell. "
+         "The fishermen followed the sound and reached the harbor safely. The village thanked the keeper "
+         "and he learned that even a quiet life can matter a great deal.")
+LOAD_TEST_SECRET = 'load-test-secret'
+
+
+def session_cookie(secret_key, username='loadtest'):
+    """A Flask session cookie for ``username``, signed the way the app signs its own"""
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    return signer.session_interface.get_signing_serializer(signer).dumps({'username': username})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            httpx.get(f"{url}/healthz", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def fire(url, cookie, requests, timeout):
+    """Send ``requests`` POST /generate at once; returns (latencies of successes, errors, wall seconds)"""
+    # Small clients: one httpx pool with hundreds of connections is itself the bottleneck
+    clients = [httpx.AsyncClient(base_url=url, cookies={'session': cookie}, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=25, max_keepalive_connections=25))
+               for _ in range(-(-requests // 25))]
+
+    async def one(i):
+        started = time.perf_counter()
+        try:
+            response = await clients[i % len(clients)].post(
+                '/generate', json={"text": f"Story {i}. {STORY}", "async": False})
+            ok = response.status_code == 200 and 'quiz' in response.json()
+        except httpx.HTTPError:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+    latencies = sorted(elapsed for ok, elapsed in results if ok)
+    return latencies, sum(1 for ok, _ in results if not ok), wall
+
+
+def report(name, latencies, errors, wall):
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else float('nan')
+    print(f"{name:>8}: {len(latencies)} ok, {errors} errors in {wall:.1f}s "
+          f"({len(latencies) / wall:.1f} req/s), p50 {percentile(0.5):.2f}s, p95 {percentile(0.95):.2f}s")
+
+
+def run_server(command, env):
+    port = free_port()
+    process = subprocess.Popen([arg.format(port=port) for arg in command], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(url, process)
+    except Exception:
+        process.terminate()
+        raise
+    return url, process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare gthread and ASGI concurrent capacity")
+    parser.add_argument('--requests', type=int, default=200, help="simultaneous requests per mode")
+    parser.add_argument('--latency', type=float, default=1.0, help="stub inference latency in seconds")
+    parser.add_argument('--threads', type=int, default=4, help="gthread threads (gunicorn_config.py uses 4)")
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--url', help="only load this running server (its SECRET_KEY must be in the env)")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        cookie = session_cookie(os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production'))
+        report('target', *asyncio.run(fire(args.url, cookie, args.requests, args.timeout)))
+        return 0
+    if not os.environ.get('MONGO_URI'):
+        print("❌ MONGO_URI must be set: both servers save the generated quizzes")
+        return 2
+
+    stub = StubInferenceServer(latency=args.latency).start()
+    env = dict(os.environ,
+               SECRET_KEY=LOAD_TEST_SECRET,
+               HUGGINGFACE_API_KEY='load-test',
+               HUGGINGFACE_API_URL=f"{stub.url}/models/bart",
+               HUGGINGFACE_QA_URL=f"{stub.url}/models/flan-t5",
+               GENERATE_ASYNC='False')
+    modes = {
+        'gthread': [sys.executable, '-m', 'gunicorn', '--worker-class', 'gthread', '--workers', '1',
+                    '--threads', str(args.threads), '--timeout', str(int(args.timeout)),
+                    '--bind', '127.0.0.1:{port}', 'app:app'],
+        'asgi': [sys.executable, '-m', 'uvicorn', '--workers', '1', '--port', '{port}', '--no-access-log',
+                 'asgi:application'],
+    }
+    cookie = session_cookie(LOAD_TEST_SECRET)
+    print(f"{args.requests} simultaneous requests per mode, stub latency {args.latency}s")
+    try:
+        for name, command in modes.items():
+            url, process = run_server(command, env)
+            try:
+                report(name, *asyncio.run(fire(url, cookie, args.requests, args.timeout)))
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from email.message import EmailMessage
+
+from pymongo import ReturnDocument
+
+QUEUED = 'queued'
+SENDING = 'sending'
+SENT = 'sent'
+DEAD = 'dead'
+
+
+class SMTPTransport:
+    """One SMTP connection kept open across messages and batches, reopened when it drops"""
+
+    def __init__(self, host, port=587, use_tls=True, username=None, password=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._smtp = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send(self, message):
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message)
+        except Exception as e:
+            # Answers like a refused recipient leave the connection usable; only a dropped
+            # connection (the server closed it while idle) is worth one fresh attempt
+            if not is_transport_error(e):
+                raise
+            self.close()
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+def build_message(doc):
+    message = EmailMessage()
+    message['Subject'] = doc['subject']
+    message['From'] = doc['sender']
+    message['To'] = ", ".join(doc['recipients'])
+    message.set_content("This message is best viewed in an HTML-capable mail client.")
+    message.add_alternative(doc['html'], subtype='html')
+    return message
+
+
+def is_transport_error(error):
+    """The connection itself failed. SMTPException subclasses OSError, so SMTP answers are excluded"""
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException))
+
+
+def is_permanent(error):
+    """5xx answers (bad recipient, rejected content) will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and code >= 500
+
+
+class MailOutbox:
+    """Outgoing mail persisted in MongoDB and sent by background threads.
+
+    Requests only insert a document, so they never wait on SMTP. Worker threads claim
+    up to ``batch_size`` messages at a time (atomically, like JobQueue, so several
+    gunicorn workers can share the collection) and send them over one reused SMTP
+    connection. Temporary failures are retried with exponential backoff; messages
+    that fail permanently or ``max_attempts`` times are dead-lettered (status 'dead').
+    ``connect`` works as for JobQueue: called when mail is queued before the collection is attached.
+    """
+
+    def __init__(self, transport_factory, workers=1, batch_size=20, max_attempts=5, poll_interval=2.0,
+                 lease_seconds=120, retry_base=30, retry_max=3600, idle_close=30, connect=None):
+        self.transport_factory = transport_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.idle_close = idle_close
+        self.connect = connect
+        self.collection = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def attach(self, collection):
+        collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        # Sent mail is kept for a week for troubleshooting; dead letters stay until handled
+        collection.create_index("sent_at", expireAfterSeconds=7 * 24 * 3600)
+        self.collection = collection
+
+    def ensure_attached(self):
+        """The collection, connecting first if a request got here before the background connect"""
+        if self.collection is None and self.connect is not None:
+            self.connect()
+        if self.collection is None:
+            raise RuntimeError("Mail outbox is not attached to a collection")
+        return self.collection
+
+    def start(self):
+        """Start the sender threads once per process (safe to call on every request)"""
+        if self.collection is None or self.workers <= 0 or self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._worker_loop, name=f"mail-worker-{i}", daemon=True).start()
+            self._started_pid = os.getpid()
+
+    def enqueue(self, sender, recipients, subject, html):
+        now = datetime.now(timezone.utc)
+        message_id = self.ensure_attached().insert_one({
+            "sender": sender,
+            "recipients": list(recipients),
+            "subject": subject,
+            "html": html,
+            "status": QUEUED,
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now
+        }).inserted_id
+        self._wakeup.set()
+        return str(message_id)
+
+    def claim(self):
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "next_attempt_at": {"$lte": now}},
+                {"status": SENDING, "lease_expires": {"$lt": now}}
+            ]},
+            {"$set": {"status": SENDING, "lease_expires": now + timedelta(seconds=self.lease_seconds)},
+             "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def claim_batch(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            doc = self.claim()
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    def _mark_sent(self, doc):
+        self.collection.update_one({"_id": doc["_id"]}, {
+            "$set": {"status": SENT, "sent_at": datetime.now(timezone.utc)},
+            "$unset": {"lease_expires": "", "last_error": ""}
+        })
+
+    def _mark_failed(self, doc, error):
+        now = datetime.now(timezone.utc)
+        if is_permanent(error) or doc["attempts"] >= self.max_attempts:
+            update = {"status": DEAD, "dead_at": now, "last_error": str(error)}
+            print(f"Mail {doc['_id']} dead-lettered after {doc['attempts']} attempts: {error}")
+        else:
+            delay = min(self.retry_base * (2 ** (doc["attempts"] - 1)), self.retry_max)
+            update = {"status": QUEUED, "next_attempt_at": now + timedelta(seconds=delay), "last_error": str(error)}
+        self.collection.update_one({"_id": doc["_id"]}, {"$set": update, "$unset": {"lease_expires": ""}})
+
+    def send_batch(self, transport, batch):
+        """Send claimed messages over ``transport``; returns how many were sent"""
+        sent = 0
+        for i, doc in enumerate(batch):
+            try:
+                transport.send(build_message(doc))
+            except Exception as e:
+                if not is_transport_error(e) and getattr(e, 'smtp_code', None) != 421:
+                    # An answer about this message only: the connection stays open for the rest
+                    self._mark_failed(doc, e)
+                    continue
+                # Connection lost or the server is shutting down: back off the rest of the batch as well
+                transport.close()
+                for failed in batch[i:]:
+                    self._mark_failed(failed, e)
+                break
+            self._mark_sent(doc)
+            sent += 1
+        return sent
+
+    def stats(self):
+        collection = self.ensure_attached()
+        counts = {status: collection.count_documents({"status": status})
+                  for status in (QUEUED, SENDING, DEAD)}
+        oldest = collection.find_one({"status": QUEUED}, {"created_at": 1}, sort=[("created_at", 1)])
+        if oldest:
+            created_at = oldest["created_at"]
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            counts["oldest_queued_seconds"] = round((datetime.now(timezone.utc) - created_at).total_seconds())
+        return counts
+
+    def _worker_loop(self):
+        transport = None
+        idle_since = time.monotonic()
+        while True:
+            try:
+                batch = self.claim_batch()
+                if batch:
+                    transport = transport or self.transport_factory()
+                    self.send_batch(transport, batch)
+                    idle_since = time.monotonic()
+                    continue
+                if transport is not None and time.monotonic() - idle_since > self.idle_close:
+                    transport.close()
+                    transport = None
+            except Exception as e:
+                print(f"Mail worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
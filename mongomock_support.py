@@ -0,0 +1,76 @@
+"""
+Test helpers: run app.py against an in-memory mongomock database
+
+fresh_worker() patches the app's LazyMongo so its next connect gets a new mongomock
+client and returns an ExitStack that undoes everything, including the queues and caches
+the on_connect hooks attach. The background connect is disabled, so each test sees a
+worker whose connection happens in the request.
+"""
+import json
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import mongomock
+
+import database
+
+TEST_DATABASE = 'quiz_test'
+
+
+class MongomockPyMongo:
+    """Stands in for flask_pymongo.PyMongo, backed by one in-memory client"""
+    client = None
+
+    def __init__(self):
+        self.cx = None
+        self.db = None
+
+    def init_app(self, app, **kwargs):
+        self.cx = MongomockPyMongo.client
+        self.db = self.cx[TEST_DATABASE]
+
+
+def fresh_worker(uri=f'mongodb://localhost:27017/{TEST_DATABASE}'):
+    """(ExitStack, app module) for a worker that has not connected yet; ``uri=None`` means MongoDB is down"""
+    import app as app_module
+
+    MongomockPyMongo.client = mongomock.MongoClient()
+    stack = ExitStack()
+    stack.enter_context(patch.object(database, 'PyMongo', MongomockPyMongo))
+    mongo = app_module.mongo
+    for name, value in (('uri', uri), ('_mongo', None), ('_pid', None), ('_failed_at', None)):
+        stack.enter_context(patch.object(mongo, name, value))
+    stack.enter_context(patch.object(mongo, 'connect_in_background', lambda: None))
+    for queue in (app_module.generation_jobs, app_module.mail_outbox):
+        stack.enter_context(patch.object(queue, 'collection', None))
+        stack.enter_context(patch.object(queue, 'start', lambda: None))
+    stack.enter_context(patch.object(app_module.result_cache, 'collection', app_module.result_cache.collection))
+    stack.enter_context(patch.dict(app_module.app.config, {'WTF_CSRF_ENABLED': False}))
+    return stack, app_module
+
+
+def worker_database():
+    """The mongomock database of the current fresh_worker()"""
+    return MongomockPyMongo.client[TEST_DATABASE]
+
+
+def logged_in_client(app_module, username='reader'):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = username
+    return client
+
+
+def sse_events(response):
+    """[(event, data)] from a text/event-stream test response, which is closed afterwards
+
+    Closing runs the route's call_on_close, which gives back its generation slot.
+    """
+    body = response.get_data(as_text=True)
+    response.close()
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+        if 'data' in fields:
+            events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
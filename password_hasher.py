@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+# bcrypt only reads the first 72 bytes; older releases truncated silently, newer ones raise
+MAX_PASSWORD_BYTES = 72
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the hashing pool already has too much work"""
+
+
+def _password_bytes(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(_password_bytes(password), hashed.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+def hash_rounds(hashed):
+    """Work factor a bcrypt hash was made with ('$2b$12$...' -> 12), None if unreadable"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt on a small process pool so a burst of logins cannot starve request threads.
+
+    At most ``max_pending`` hashes may be queued or running per worker process; beyond
+    that ``hash``/``check`` raise HasherBusy straight away, so the caller can answer
+    503 instead of piling up threads. The pool is created lazily in each process (a
+    pool made in the preloading gunicorn master would not survive the fork) and uses
+    'spawn', since forking a threaded worker is unsafe. Spawned processes re-import the
+    ``__main__`` module, so scripts that do work at import time should use ``workers=0``,
+    which hashes inline. A hash that outlives ``timeout`` raises HasherBusy but keeps
+    its place in ``max_pending`` until the pool has actually finished it.
+    """
+
+    def __init__(self, rounds=12, workers=1, max_pending=16, timeout=10):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"completed": 0, "rejected": 0, "timed_out": 0, "rehashed": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rounds=int(os.environ.get('BCRYPT_ROUNDS', 12)),
+            workers=int(os.environ.get('HASH_WORKERS', 1)),
+            max_pending=int(os.environ.get('HASH_QUEUE_SIZE', 16)),
+            timeout=float(os.environ.get('HASH_TIMEOUT', 10))
+        )
+
+    @property
+    def pool(self):
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._lock:
+                if self._pool is None or self._pool_pid != pid:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                    self._pool_pid = pid
+        return self._pool
+
+    def _run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise HasherBusy(f"{self._pending} password hashes already queued")
+            self._pending += 1
+        started = time.perf_counter()
+        if self.workers <= 0:
+            try:
+                return func(*args)
+            finally:
+                self._finished(started)
+        try:
+            future = self.pool.submit(func, *args)
+        except BaseException:
+            self._finished(started, completed=False)
+            raise
+        # The slot stays taken until the pool is done with the job, even if we stop waiting for it
+        future.add_done_callback(lambda _: self._finished(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._stats["timed_out"] += 1
+            raise HasherBusy(f"Password hash took longer than {self.timeout}s")
+
+    def _finished(self, started, completed=True):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._pending -= 1
+            if completed:
+                self._stats["completed"] += 1
+                self._stats["wait_seconds"] += elapsed
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, hashed, password):
+        return self._run(_check, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True when ``hashed`` was made with a different work factor than the current one"""
+        return hash_rounds(hashed) != self.rounds
+
+    def record_rehash(self):
+        with self._lock:
+            self._stats["rehashed"] += 1
+
+    def retry_after(self):
+        """Seconds a rejected client should wait: roughly how long the current queue takes to drain"""
+        with self._lock:
+            completed = self._stats["completed"]
+            average = self._stats["wait_seconds"] / completed if completed else 0.25
+            return max(1, round(average * self._pending / max(self.workers, 1)))
+
+    def stats(self):
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": completed,
+                "rejected": self._stats["rejected"],
+                "timed_out": self._stats["timed_out"],
+                "rehashed": self._stats["rehashed"],
+                "avg_ms": round(1000 * self._stats["wait_seconds"] / completed, 1) if completed else None
+            }
@@ -0,0 +1,88 @@
+import re
+
+# Bump when the shape below changes; returned with every quiz by the JSON API
+QUIZ_FORMAT_VERSION = 1
+
+LETTERS = 'ABCD'
+
+_QUESTION_NUMBER = re.compile(r'^\s*\d+[.)]\s*')
+_OPTION_LETTER = re.compile(r'^\s*[A-D]\)\s*')
+
+# A quiz is stored and served as
+#   {"summary": str, "questions": [{"question": str, "options": [str, ...], "answer": int}]}
+# where ``answer`` indexes ``options``. The SUMMARY/QUIZ text is only a rendering of it.
+
+
+def make_quiz(summary, questions):
+    return {"summary": summary, "questions": questions}
+
+
+def make_question(text, options, answer):
+    return {"question": text, "options": list(options), "answer": answer}
+
+
+def quiz_from_parsed(summary, parsed_questions):
+    """Structured quiz from parse_quiz_from_text output ('1. ...', 'A) ...', correct letter)"""
+    questions = []
+    for parsed in parsed_questions:
+        correct = parsed.get('correct', 'A')
+        questions.append(make_question(
+            _QUESTION_NUMBER.sub('', parsed.get('question', '')),
+            [_OPTION_LETTER.sub('', option) for option in parsed.get('options', [])],
+            LETTERS.index(correct) if correct in LETTERS else 0
+        ))
+    return make_quiz(summary, questions)
+
+
+def render_question_text(number, question):
+    lines = [f"{number}. {question['question']}"]
+    lines += [f"   {LETTERS[i]}) {option}" for i, option in enumerate(question['options'])]
+    lines.append(f"   Correct: {LETTERS[question['answer']]}")
+    return "\n".join(lines)
+
+
+def render_quiz_text(quiz):
+    """The legacy SUMMARY/QUIZ string for a structured quiz"""
+    blocks = [render_question_text(i, question) for i, question in enumerate(quiz['questions'], 1)]
+    return f"SUMMARY:\n{quiz['summary']}\n\nQUIZ:\n" + "\n\n".join(blocks)
+
+
+def parse_quiz_text(result):
+    """Structured quiz from a legacy SUMMARY/QUIZ string (quizzes stored before the JSON model)"""
+    summary_part, _, quiz_part = result.partition("\n\nQUIZ:\n")
+    summary = summary_part.replace("SUMMARY:\n", "", 1).strip()
+    questions = []
+    for line in quiz_part.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0].isdigit():
+            questions.append(make_question(_QUESTION_NUMBER.sub('', line), [], 0))
+        elif questions and _OPTION_LETTER.match(line):
+            questions[-1]['options'].append(_OPTION_LETTER.sub('', line))
+        elif questions and line.startswith('Correct:'):
+            letter = line[len('Correct:'):].strip()[:1]
+            questions[-1]['answer'] = LETTERS.index(letter) if letter and letter in LETTERS else 0
+    return make_quiz(summary, questions)
+
+
+def public_quiz(quiz, include_answers=True):
+    """JSON representation served by the API"""
+    questions = quiz['questions'] if include_answers else [
+        {key: value for key, value in question.items() if key != 'answer'} for question in quiz['questions']
+    ]
+    return {"version": QUIZ_FORMAT_VERSION, "summary": quiz['summary'], "questions": questions}
+
+
+def grade(quiz, answers):
+    """Score ``answers`` (option indexes or letters, one per question) against the quiz.
+
+    Returns (score, [True/False per question]). Missing or malformed answers are wrong.
+    """
+    results = []
+    for i, question in enumerate(quiz['questions']):
+        given = answers[i] if i < len(answers) else None
+        if isinstance(given, str) and len(given) == 1 and given.upper() in LETTERS:
+            given = LETTERS.index(given.upper())
+        results.append(isinstance(given, int) and not isinstance(given, bool) and given == question['answer'])
+    return sum(results), results
@@ -0,0 +1,865 @@
+#!/usr/bin/env python3
+"""
+Story -> summary + quiz generation pipeline, independent of the web app
+
+Everything needed to turn a story into a structured quiz (model calls, backend routing,
+caching, the rule-based fallback) lives here, so it can be imported without Flask or
+MongoDB. app.py serves it; the CLI below runs it over a content library on every core.
+
+Usage:
+    python quiz_pipeline.py stories.jsonl > quizzes.jsonl     # {"text": ...} per line (other keys are copied)
+    python quiz_pipeline.py story1.txt story2.txt > quizzes.jsonl
+    cat story.txt | python quiz_pipeline.py - > quizzes.jsonl
+    python quiz_pipeline.py --processes 8 stories.jsonl -o quizzes.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+from result_cache import ResultCache, make_cache_key
+from quiz_model import make_question, make_quiz, public_quiz, quiz_from_parsed, render_quiz_text
+from hf_client import InferenceClient
+from backends import Backend, BackendRouter
+from circuit_breaker import CircuitBreaker
+from chunking import CHUNK_WORDS, map_reduce_summarize, quiz_excerpt
+from story_analysis import (
+    StoryAnalysis, COMMON_WORDS, LOCATION_INDICATORS, OBJECT_PATTERNS, DIALOGUE_WORDS, TIME_WORDS,
+    EMOTION_WORDS, PLOT_VERBS, LESSON_WORDS, CONTRAST_WORDS, DESCRIPTIVE_WORDS, TRAVEL_WORDS,
+    NATURE_WORDS, URBAN_WORDS, INDOOR_WORDS
+)
+
+load_dotenv()
+
+# Cache generated quizzes so repeated stories skip the Hugging Face round-trips
+# (app.py attaches MongoDB as a shared second tier; the CLI keeps it per process)
+result_cache = ResultCache(
+    maxsize=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+    ttl=int(os.environ.get('RESULT_CACHE_TTL', 6 * 3600))
+)
+
+# Hugging Face API configuration for better models
+# (overridable so tests and load tests can point at stub_inference_server.py)
+HUGGINGFACE_API_URL = os.environ.get('HUGGINGFACE_API_URL', "https://api-inference.huggingface.co/models/facebook/bart-large-cnn")  # Better for summarization
+HUGGINGFACE_QA_URL = os.environ.get('HUGGINGFACE_QA_URL', "https://api-inference.huggingface.co/models/google/flan-t5-large")  # Better for Q&A generation
+
+# Summary backend: 'remote' (BART, extractive fallback) or 'extractive' (local TextRank only)
+SUMMARY_BACKEND = os.environ.get('SUMMARY_BACKEND', 'remote').lower()
+
+# Pooled keep-alive session with a retry budget for cold-starting models
+inference_client = InferenceClient.from_env()
+
+# Shared, bounded pool for outbound inference calls; threads start lazily so this is safe with preload_app
+HF_CONCURRENT_CALLS = os.environ.get('HF_CONCURRENT_CALLS', 'True').lower() == 'true'
+inference_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('INFERENCE_POOL_SIZE', 8)),
+    thread_name_prefix='inference'
+)
+
+# Bounded pool for per-chunk summary calls on long stories (separate so it never waits on itself)
+chunk_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('CHUNK_CONCURRENCY', 4)),
+    thread_name_prefix='chunk'
+)
+
+# Bump whenever prompts, model parameters or the fallback heuristics change so cached results are regenerated
+GENERATION_VERSION = f"5|{SUMMARY_BACKEND}|{HUGGINGFACE_API_URL}|{HUGGINGFACE_QA_URL}"
+
+def generate_quiz(story_text, summary=None):
+    """Generate the structured quiz, reusing cached results for stories we have already seen"""
+    cache_key = make_cache_key(story_text, GENERATION_VERSION)
+    entry = result_cache.get(cache_key)
+    if entry is None:
+        entry = generate_quiz_entry(story_text, summary)
+        if entry.get('cacheable'):
+            result_cache.set(cache_key, entry)
+    return quiz_from_entry(entry)
+
+def generate_free_response(story_text):
+    """Generate summary and quiz as the legacy SUMMARY/QUIZ text"""
+    return render_quiz_text(generate_quiz(story_text))
+
+def quiz_from_entry(entry):
+    """Turn a cached generation entry into the quiz for one request"""
+    if entry['source'] == 'model':
+        return entry['quiz']
+    # Fallback quizzes are re-shuffled per request so repeat visitors get fresh answer positions
+    return pick_fallback_quiz(entry)
+
+def huggingface_headers():
+    return {
+        "Authorization": f"Bearer {os.environ.get('HUGGINGFACE_API_KEY', '')}",
+        "Content-Type": "application/json"
+    }
+
+def has_huggingface_key():
+    return bool(os.environ.get('HUGGINGFACE_API_KEY'))
+
+# One breaker per endpoint, created before gunicorn forks so all workers share the state
+summary_breaker = CircuitBreaker(
+    'bart',
+    failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+    reset_timeout=float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+)
+quiz_breaker = CircuitBreaker(
+    'flan-t5',
+    failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+    reset_timeout=float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+)
+
+def call_inference_endpoint(breaker, url, payload):
+    """POST to an inference endpoint through its circuit breaker, None when the circuit is open"""
+    if not breaker.allow():
+        return None
+    try:
+        response = inference_client.post(url, headers=huggingface_headers(), json=payload)
+    except Exception:
+        breaker.record_failure()
+        raise
+    record_response(breaker, response)
+    return response
+
+def record_response(breaker, response):
+    # Timeouts raise before this; 429 and 5xx mean the endpoint is unhealthy, other codes do not
+    if response.status_code == 429 or response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+def remote_summary(story_text):
+    """Summarize with BART, map-reducing over chunks when the story is longer than the model reads"""
+    return map_reduce_summarize(story_text, bart_summary, chunk_pool)
+
+BART_PARAMETERS = {
+    "max_length": 150,
+    "min_length": 30,
+    "do_sample": False
+}
+
+def summary_payload(story_text):
+    return {
+        "inputs": story_text,
+        "parameters": BART_PARAMETERS
+    }
+
+def summary_from_result(summary_result):
+    """The summary text in a BART response body ('' if there is none)"""
+    if isinstance(summary_result, list) and len(summary_result) > 0:
+        return summary_result[0].get('summary_text', '')
+    if isinstance(summary_result, dict):
+        return summary_result.get('summary_text', '')
+    return ''
+
+def bart_summary(story_text):
+    """Ask the BART model for a summary, returning '' on failure"""
+    summary = ""
+    try:
+        summary_response = call_inference_endpoint(summary_breaker, HUGGINGFACE_API_URL, summary_payload(story_text))
+        
+        if summary_response is not None and summary_response.status_code == 200:
+            summary = summary_from_result(summary_response.json())
+    except Exception as e:
+        print(f"Summary generation error: {e}")
+    return summary
+
+def bart_summaries(story_texts):
+    """Summarize several stories with one BART request (inputs as a list); '' for each failure"""
+    summaries = [''] * len(story_texts)
+    try:
+        response = call_inference_endpoint(
+            summary_breaker,
+            HUGGINGFACE_API_URL,
+            {"inputs": list(story_texts), "parameters": BART_PARAMETERS}
+        )
+        if response is not None and response.status_code == 200:
+            results = response.json()
+            if isinstance(results, list) and len(results) == len(story_texts):
+                summaries = [item.get('summary_text', '') if isinstance(item, dict) else '' for item in results]
+    except Exception as e:
+        print(f"Batch summary error: {e}")
+    return summaries
+
+def quiz_payload(story_text):
+    quiz_prompt = f"""Based on this story, create 5 multiple choice questions with 4 options each. 
+
+Story: {quiz_excerpt(story_text)}
+
+Generate questions that test comprehension of:
+1. Main characters and their roles
+2. Key plot events
+3. Setting and time period
+4. Central conflict or problem
+5. Theme or moral of the story
+
+Format each question with options A, B, C, D and indicate the correct answer."""
+    return {
+        "inputs": quiz_prompt,
+        "parameters": {
+            "max_length": 500,
+            "temperature": 0.7,
+            "top_p": 0.9
+        }
+    }
+
+def quiz_questions_from_result(quiz_result, story_text):
+    """Parsed questions from a FLAN-T5 response body ([] if there are none)"""
+    quiz_text = ''
+    if isinstance(quiz_result, list) and len(quiz_result) > 0:
+        quiz_text = quiz_result[0].get('generated_text', '')
+    elif isinstance(quiz_result, dict):
+        quiz_text = quiz_result.get('generated_text', '')
+    
+    # Parse the generated quiz text
+    return parse_quiz_from_text(quiz_text, story_text) if quiz_text else []
+
+def remote_quiz(story_text):
+    """Ask the FLAN-T5 model for quiz questions, returning [] on failure"""
+    quiz_questions = []
+    try:
+        quiz_response = call_inference_endpoint(quiz_breaker, HUGGINGFACE_QA_URL, quiz_payload(story_text))
+        
+        if quiz_response is not None and quiz_response.status_code == 200:
+            quiz_questions = quiz_questions_from_result(quiz_response.json(), story_text)
+    except Exception as e:
+        print(f"Quiz generation error: {e}")
+    return quiz_questions
+
+def extractive_summary(story_text=None, analysis=None):
+    """Local TextRank summary; numpy/scipy are imported on first use so importing the pipeline stays fast"""
+    from extractive_summarizer import summarize_extractive
+    return summarize_extractive(story_text, analysis=analysis)
+
+# Backends for each pipeline task. The router prefers the lower tier, picks the fastest
+# healthy backend within it and hedges to the next one when the primary is slow.
+# The rule-based quiz (build_fallback_quiz) stays the last resort when no quiz backend answers.
+backend_router = BackendRouter(
+    hedge_after=float(os.environ['BACKEND_HEDGE_AFTER']) if os.environ.get('BACKEND_HEDGE_AFTER') else None,
+    max_workers=int(os.environ.get('BACKEND_POOL_SIZE', 16))
+)
+if SUMMARY_BACKEND != 'extractive':
+    backend_router.register(Backend('bart', 'summary', remote_summary, tier=0, available=has_huggingface_key,
+                                    breaker=summary_breaker))
+backend_router.register(Backend('extractive', 'summary', extractive_summary, tier=1))
+backend_router.register(Backend('flan-t5', 'quiz', remote_quiz, tier=0, available=has_huggingface_key,
+                                breaker=quiz_breaker))
+
+def request_summary(story_text):
+    """Summarize with the best available backend ('' if all of them failed)"""
+    return backend_router.run('summary', story_text) or ''
+
+def request_quiz(story_text):
+    """Generate quiz questions with the best available backend ([] if all of them failed)"""
+    return backend_router.run('quiz', story_text) or []
+
+def _timed_call(func, *args):
+    """Run func and return (result, elapsed milliseconds)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - started) * 1000)
+
+def _run_model_calls(story_text, summary=None):
+    """Run the summary and quiz calls, concurrently when enabled.
+
+    Returns (summary, quiz_questions, timings). When one call comes back unusable the
+    fallback is unavoidable, so we stop waiting for the other one. A ``summary`` that
+    is already known (from a batched request) skips the summary call.
+    """
+    calls = {'summary': request_summary, 'quiz': request_quiz}
+    results = {'summary': '', 'quiz': []}
+    if summary:
+        results['summary'] = summary
+        del calls['summary']
+    timings = {}
+    
+    if not HF_CONCURRENT_CALLS:
+        for name, func in calls.items():
+            results[name], timings[name] = _timed_call(func, story_text)
+            if not results[name]:
+                break
+        return results['summary'], results['quiz'], timings
+    
+    futures = {inference_pool.submit(_timed_call, func, story_text): name for name, func in calls.items()}
+    for future in as_completed(futures):
+        name = futures[future]
+        results[name], timings[name] = future.result()
+        if not results[name]:
+            # Drop the other call: cancelled if still queued, ignored if already in flight
+            for other in futures:
+                if other is not future and not other.done():
+                    other.cancel()
+                    timings[futures[other]] = 'cancelled'
+            break
+    return results['summary'], results['quiz'], timings
+
+def generate_quiz_entry(story_text, summary=None):
+    """Generate summary and quiz using Hugging Face's AI models"""
+    try:
+        api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
+        
+        if not api_key:
+            # If no API key, use a more intelligent fallback
+            plan = build_fallback_quiz(story_text)
+            plan['cacheable'] = True
+            return plan
+        
+        if quiz_breaker.is_open():
+            # The quiz model is known to be down: go straight to the fallback instead of waiting on timeouts
+            return build_fallback_quiz(story_text)
+        
+        # Summary (BART) and quiz (FLAN-T5) are independent, so they can run side by side
+        summary, quiz_questions, timings = _run_model_calls(story_text, summary)
+        print(f"Inference timings (ms): {timings}")
+        
+        return model_entry(story_text, summary, quiz_questions)
+        
+    except Exception as e:
+        print(f"Error in generate_free_response: {e}")
+        return build_fallback_quiz(story_text)
+
+def model_entry(story_text, summary, quiz_questions):
+    """Generation entry for the models' output"""
+    # If we didn't get good results, use intelligent fallback
+    # (not cached, so the next request gets another chance at the models)
+    if not summary or len(quiz_questions) < 5:
+        return build_fallback_quiz(story_text)
+    
+    return {'source': 'model', 'quiz': quiz_from_parsed(summary, quiz_questions), 'cacheable': True}
+
+def stream_free_response(story_text):
+    """Like generate_quiz, but yields pieces as soon as they are ready.
+
+    Yields ('summary', text) first, then ('question', question) per question and finally
+    ('result', quiz) with the whole structured quiz. The summary is sent as soon as
+    BART (or the fallback summarizer) finishes instead of waiting for the quiz model.
+    """
+    cache_key = make_cache_key(story_text, GENERATION_VERSION)
+    entry = result_cache.get(cache_key)
+    api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
+    if entry is None and not api_key:
+        entry = build_fallback_quiz(story_text)
+        result_cache.set(cache_key, entry)
+    elif entry is None and quiz_breaker.is_open():
+        entry = build_fallback_quiz(story_text)
+    
+    if entry is not None:
+        quiz = quiz_from_entry(entry)
+        yield 'summary', quiz['summary']
+    else:
+        calls = {'summary': request_summary, 'quiz': request_quiz}
+        futures = {inference_pool.submit(_timed_call, func, story_text): name for name, func in calls.items()}
+        summary, quiz_questions, timings = '', [], {}
+        for future in as_completed(futures):
+            name = futures[future]
+            value, timings[name] = future.result()
+            if not value:
+                break
+            if name == 'summary':
+                summary = value
+                yield 'summary', summary
+            else:
+                quiz_questions = value
+        for future in futures:
+            future.cancel()
+        print(f"Inference timings (ms): {timings}")
+        
+        if summary and len(quiz_questions) >= 5:
+            quiz = quiz_from_parsed(summary, quiz_questions)
+            result_cache.set(cache_key, {'source': 'model', 'quiz': quiz})
+        else:
+            plan = build_fallback_quiz(story_text)
+            if summary:
+                # The model summary is already on the user's screen, keep it
+                plan['summary'] = summary
+            else:
+                yield 'summary', plan['summary']
+            quiz = pick_fallback_quiz(plan)
+    
+    for question in quiz['questions']:
+        yield 'question', question
+    yield 'result', quiz
+
+# Batch generation: stories run on their own pool (it calls into inference_pool, so it must not share it)
+BATCH_MAX_STORIES = int(os.environ.get('BATCH_MAX_STORIES', 200))
+BATCH_SUMMARY_SIZE = int(os.environ.get('BATCH_SUMMARY_SIZE', 8))
+batch_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_CONCURRENCY', 4)),
+    thread_name_prefix='batch'
+)
+
+def generate_batch(story_texts):
+    """Generate quizzes for many stories, yielding (indexes, quiz) as each distinct story is done.
+
+    Identical stories (same cache key) are generated once and reported with all their
+    indexes. Short stories get their BART summaries in batched requests of
+    BATCH_SUMMARY_SIZE inputs; everything else runs on batch_pool, which bounds how many
+    stories are in flight at once.
+    """
+    groups = {}
+    for index, story_text in enumerate(story_texts):
+        key = make_cache_key(story_text, GENERATION_VERSION)
+        groups.setdefault(key, (story_text, []))[1].append(index)
+
+    batch_summaries = (SUMMARY_BACKEND != 'extractive' and has_huggingface_key()
+                       and not summary_breaker.is_open() and not quiz_breaker.is_open())
+    pending = {}
+    summarize_keys = []
+    for key, (story_text, indexes) in groups.items():
+        entry = result_cache.get(key)
+        if entry is not None:
+            yield indexes, quiz_from_entry(entry)
+        elif batch_summaries and len(story_text.split()) <= CHUNK_WORDS:
+            summarize_keys.append(key)
+        else:
+            pending[batch_pool.submit(generate_quiz, story_text)] = ('quiz', key)
+    for start in range(0, len(summarize_keys), BATCH_SUMMARY_SIZE):
+        keys = summarize_keys[start:start + BATCH_SUMMARY_SIZE]
+        pending[batch_pool.submit(bart_summaries, [groups[key][0] for key in keys])] = ('summaries', keys)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            kind, keys = pending.pop(future)
+            if kind == 'summaries':
+                summaries = future.result()
+                for key, summary in zip(keys, summaries):
+                    # A story BART could not summarize goes through the normal path (router, fallbacks)
+                    pending[batch_pool.submit(generate_quiz, groups[key][0], summary or None)] = ('quiz', key)
+                continue
+            story_text, indexes = groups[keys]
+            try:
+                quiz = future.result()
+            except Exception as e:
+                print(f"Batch item error: {e}")
+                quiz = pick_fallback_quiz(build_fallback_quiz(story_text))
+            yield indexes, quiz
+
+def generate_smart_fallback(story_text):
+    """Generate story-specific summary and quiz questions"""
+    return render_quiz_text(pick_fallback_quiz(build_fallback_quiz(story_text)))
+
+def build_fallback_quiz(story_text):
+    """Analyse the story and build the summary plus the pool of candidate questions.
+
+    This is the expensive, deterministic part of the fallback and is safe to cache;
+    picking and shuffling questions happens per request in pick_fallback_quiz.
+    """
+    # Tokenize once; every keyword check below is a set lookup against this analysis
+    analysis = StoryAnalysis(story_text)
+    sentences = analysis.sentences
+    words = analysis.words
+    
+    # Create a contextual summary from the most central sentences (TextRank, no network)
+    if len(sentences) >= 3:
+        summary = extractive_summary(analysis=analysis)
+    else:
+        summary = story_text
+    
+    # Extract character names intelligently
+    
+    potential_names = []
+    for word in words:
+        cleaned = word.strip('.,!?;:"\'-')
+        if cleaned and cleaned[0].isupper() and len(cleaned) > 2 and cleaned not in COMMON_WORDS:
+            potential_names.append(cleaned)
+    
+    unique_names = list(dict.fromkeys(potential_names))[:10]  # Keep order, get up to 10 unique names
+    
+    # Extract locations/places
+    locations = []
+    words_lower = analysis.words_lower
+    for i, word in enumerate(words_lower):
+        if word in LOCATION_INDICATORS and i + 1 < len(words):
+            next_word = words[i + 1].strip('.,!?;:')
+            if next_word and next_word[0].isupper():
+                locations.append(next_word)
+    
+    # Extract key objects/things mentioned
+    objects = []
+    for i, word in enumerate(words_lower):
+        if word in OBJECT_PATTERNS and i + 1 < len(words):
+            next_word = words[i + 1].strip('.,!?;:')
+            if next_word and not next_word[0].isupper() and len(next_word) > 3:
+                objects.append(next_word.lower())
+    unique_objects = list(dict.fromkeys(objects))[:10]
+    
+    # Detect story elements
+    has_dialogue = '"' in story_text or "'" in story_text or analysis.has_any(DIALOGUE_WORDS)
+    
+    # Detect time references
+    time_references = analysis.found(TIME_WORDS)
+    
+    # Detect emotions/feelings
+    emotions_found = analysis.found(EMOTION_WORDS)
+    
+    # Generate dynamic quiz questions based on the story content
+    questions = []
+    
+    # Question pool based on what we found in the story
+    
+    # Character-based questions
+    if len(unique_names) >= 2:
+        main_char = unique_names[0]
+        other_chars = unique_names[1:4] if len(unique_names) > 1 else ['nobody', 'someone', 'a stranger']
+        questions.append({
+            'q': f"Who is the main character in this story?",
+            'options': [main_char, other_chars[0] if len(other_chars) > 0 else 'John', 
+                       other_chars[1] if len(other_chars) > 1 else 'Mary', 
+                       'The narrator'],
+            'correct': 'A'
+        })
+        
+        if len(unique_names) >= 3:
+            questions.append({
+                'q': f"Which character appears after {unique_names[0]} in the story?",
+                'options': [unique_names[1], unique_names[2] if len(unique_names) > 2 else 'Nobody',
+                           unique_names[0], 'An unnamed character'],
+                'correct': 'A'
+            })
+    
+    # Location-based questions
+    if locations:
+        questions.append({
+            'q': "Where does part of this story take place?",
+            'options': [locations[0], 'In a city', 'In space', 'Underwater'],
+            'correct': 'A'
+        })
+    
+    # Object-based questions
+    if unique_objects:
+        questions.append({
+            'q': f"What object is mentioned in the story?",
+            'options': [unique_objects[0], 'a sword', 'a map', 'a key'],
+            'correct': 'A'
+        })
+    
+    # Plot-based questions
+    action_verbs_in_story = analysis.found(PLOT_VERBS)
+    
+    if action_verbs_in_story:
+        questions.append({
+            'q': f"What action occurs in the story?",
+            'options': [f"Someone {action_verbs_in_story[0]}", 'Someone sleeps', 'Someone dances', 'Someone sings'],
+            'correct': 'A'
+        })
+    
+    # Time-based questions
+    if time_references:
+        questions.append({
+            'q': "When does this story take place?",
+            'options': [f"During the {time_references[0]}", 'In the future', 'In ancient times', 'Time is not specified'],
+            'correct': 'A'
+        })
+    
+    # Emotion-based questions
+    if emotions_found:
+        questions.append({
+            'q': "What emotion is expressed in the story?",
+            'options': [emotions_found[0].capitalize(), 'Boredom', 'Jealousy', 'No emotions mentioned'],
+            'correct': 'A'
+        })
+    
+    # Story structure questions
+    questions.append({
+        'q': "How does the story begin?",
+        'options': [sentences[0][:50] + "..." if len(sentences[0]) > 50 else sentences[0],
+                   "With a battle scene", "With a description of the weather", "With dialogue"],
+        'correct': 'A'
+    })
+    
+    if len(sentences) > 1:
+        questions.append({
+            'q': "How does the story end?",
+            'options': [sentences[-1][:50] + "..." if len(sentences[-1]) > 50 else sentences[-1],
+                       "With everyone living happily ever after", "With a cliffhanger", "With a moral lesson"],
+            'correct': 'A'
+        })
+    
+    # Dialogue questions - make them more specific
+    if has_dialogue:
+        if '"' in story_text:
+            questions.append({
+                'q': "What do characters do in this story?",
+                'options': ["They speak to each other", "They remain silent", "They only think", "They only write letters"],
+                'correct': 'A'
+            })
+        elif analysis.has('said'):
+            questions.append({
+                'q': "How do characters communicate?",
+                'options': ["Someone said something", "Through telepathy", "Using sign language", "They don't communicate"],
+                'correct': 'A'
+            })
+    
+    # Theme questions based on content
+    if analysis.has_any(LESSON_WORDS):
+        questions.append({
+            'q': "What type of story is this?",
+            'options': ["A story with a lesson or moral", "A pure action story", "A romance", "A mystery"],
+            'correct': 'A'
+        })
+    
+    # Additional content-based questions
+    
+    # Check for specific story elements
+    if analysis.has_any(CONTRAST_WORDS):
+        questions.append({
+            'q': "What kind of conflict or challenge appears in the story?",
+            'options': ["A problem that needs to be overcome", "Everything goes smoothly", "No challenges mentioned", "Multiple unsolved problems"],
+            'correct': 'A'
+        })
+    
+    # Look for descriptive words
+    found_descriptive = analysis.found(DESCRIPTIVE_WORDS)
+    if found_descriptive:
+        questions.append({
+            'q': f"How is something described in the story?",
+            'options': [found_descriptive[0].capitalize(), "Boring", "Normal", "Not described"],
+            'correct': 'A'
+        })
+    
+    # Check for movement or travel
+    travel_found = analysis.found(TRAVEL_WORDS)
+    if travel_found:
+        questions.append({
+            'q': "What kind of movement happens in the story?",
+            'options': [f"Someone {travel_found[0]}", "Everyone stays in one place", "Only thoughts move", "No movement occurs"],
+            'correct': 'A'
+        })
+    
+    # Backup questions used to pad the quiz when the pool has fewer than 5 questions
+    backup_questions = []
+    
+    # Create questions about specific words in the story
+    important_words = [w for w in words if len(w) > 5 and w[0].isupper()]
+    if important_words and len(backup_questions) < 3:
+        backup_questions.append({
+            'q': f"Which word appears in the story?",
+            'options': [important_words[0], "Elephant", "Computer", "Spaceship"],
+            'correct': 'A'
+        })
+    
+    # Question about what the story is NOT about
+    if len(backup_questions) < 3:
+        backup_questions.append({
+            'q': "What is this story NOT about?",
+            'options': ["Aliens from Mars", unique_names[0] if unique_names else "A character", 
+                       unique_objects[0] if unique_objects else "An event", "The events described"],
+            'correct': 'A'
+        })
+    
+    # Question about story setting
+    if len(backup_questions) < 3:
+        if analysis.has_any(NATURE_WORDS):
+            setting = "nature"
+        elif analysis.has_any(URBAN_WORDS):
+            setting = "urban area"
+        elif analysis.has_any(INDOOR_WORDS):
+            setting = "indoor location"
+        else:
+            setting = "specific location"
+            
+        backup_questions.append({
+            'q': "Where might this story take place?",
+            'options': [f"In a {setting}", "On the moon", "Under the ocean", "In outer space"],
+            'correct': 'A'
+        })
+    
+    if backup_questions:
+        filler = backup_questions[0]
+    else:
+        # Last resort - ask about story purpose
+        filler = {
+            'q': "What is the purpose of this story?",
+            'options': ["To tell a story", "To sell a product", "To provide instructions", "To list facts"],
+            'correct': 'A'
+        }
+    
+    return {'source': 'fallback', 'summary': summary, 'questions': questions, 'filler': filler}
+
+def pick_fallback_quiz(plan):
+    """Pick 5 questions from a fallback plan and randomize their answer positions"""
+    import random
+    
+    # Randomly select 5 questions from our pool
+    questions = list(plan['questions'])
+    random.shuffle(questions)
+    selected_questions = questions[:5]
+    
+    # If we don't have enough questions, pad with the backup question
+    while len(selected_questions) < 5:
+        selected_questions.append(plan['filler'])
+    
+    # Randomize the answer position of each selected question
+    quiz_questions = []
+    for q_data in selected_questions:
+        # Get the options and randomize their order
+        options = q_data['options'][:4]  # Ensure we have exactly 4 options
+        while len(options) < 4:
+            options.append("Not applicable")
+        
+        # Remember the correct answer before shuffling
+        correct_answer = options[0]  # The first option is always the correct one in our data
+        
+        # Shuffle the options
+        random.shuffle(options)
+        
+        # Find where the correct answer ended up
+        quiz_questions.append(make_question(q_data['q'], options, options.index(correct_answer)))
+    
+    return make_quiz(plan['summary'], quiz_questions)
+
+def parse_quiz_from_text(quiz_text, story_text):
+    """Parse quiz questions from generated text"""
+    questions = []
+    # This is a simplified parser - in production, you'd want more robust parsing
+    lines = quiz_text.split('\n')
+    current_question = {}
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+            
+        # Check if it's a question number
+        if line[0].isdigit() and '.' in line[:3]:
+            if current_question:
+                questions.append(current_question)
+            current_question = {'question': line, 'options': [], 'correct': 'A'}
+        elif line.startswith(('A)', 'B)', 'C)', 'D)')):
+            current_question.get('options', []).append(line)
+        elif 'correct' in line.lower() or 'answer' in line.lower():
+            # Try to extract correct answer
+            for char in ['A', 'B', 'C', 'D']:
+                if char in line:
+                    current_question['correct'] = char
+                    break
+    
+    if current_question:
+        questions.append(current_question)
+    
+    # Ensure we have 5 questions
+    while len(questions) < 5:
+        questions.append(create_generic_question(len(questions) + 1, story_text))
+    
+    return questions[:5]
+
+def create_generic_question(num, story_text):
+    """Create a generic question based on story analysis"""
+    questions_bank = [
+        {
+            'question': f'{num}. What is the main theme of this story?',
+            'options': [
+                'A) Adventure and discovery',
+                'B) Love and relationships',
+                'C) Conflict and resolution',
+                'D) Growth and learning'
+            ],
+            'correct': 'C'
+        },
+        {
+            'question': f'{num}. What narrative technique is used in this story?',
+            'options': [
+                'A) Flashback',
+                'B) Linear progression',
+                'C) Multiple perspectives',
+                'D) Stream of consciousness'
+            ],
+            'correct': 'B'
+        },
+        {
+            'question': f'{num}. What is the story\'s primary conflict?',
+            'options': [
+                'A) Person vs. Person',
+                'B) Person vs. Nature',
+                'C) Person vs. Self',
+                'D) Person vs. Society'
+            ],
+            'correct': 'A'
+        }
+    ]
+    return questions_bank[num % len(questions_bank)] if num <= len(questions_bank) else questions_bank[0]
+
+
+# Command-line batch runner: one story per JSONL line or per file, quizzes out as JSONL
+
+def read_stories(paths):
+    """Yield {"text": ..., <other keys>} records from JSONL files, text files or stdin ('-')"""
+    for path in paths:
+        if path == '-':
+            data = sys.stdin.read()
+            name = '<stdin>'
+        else:
+            with open(path, encoding='utf-8') as f:
+                data = f.read()
+            name = path
+        if path.endswith('.jsonl') or (path == '-' and data.lstrip().startswith('{')):
+            for number, line in enumerate(data.splitlines(), 1):
+                if line.strip():
+                    record = json.loads(line)
+                    record.setdefault('source', f"{name}:{number}")
+                    yield record
+        else:
+            yield {"source": name, "text": data}
+
+def generate_record(record):
+    """Quiz for one input record; the output keeps its keys except the story text itself"""
+    output = {key: value for key, value in record.items() if key != 'text'}
+    text = (record.get('text') or '').strip()
+    if not text:
+        output['error'] = "Record has no text"
+        return output
+    try:
+        output['quiz'] = public_quiz(generate_quiz(text))
+    except Exception as e:
+        output['error'] = str(e)
+    return output
+
+def _log_to_stderr():
+    # The pipeline logs with print(); keep it out of JSONL written to stdout
+    sys.stdout = sys.stderr
+
+def run_batch(records, output, processes=None, chunksize=4):
+    """Generate quizzes for ``records`` on a process pool, writing JSONL in input order.
+
+    Each process runs the pipeline with its own inference pools and HTTP connections,
+    so model calls overlap within a process and the local work (fallback quizzes,
+    extractive summaries) uses every core. Returns (quizzes written, errors).
+    """
+    processes = processes or os.cpu_count() or 1
+    written = errors = 0
+    with multiprocessing.Pool(processes, initializer=_log_to_stderr) as pool:
+        for result in pool.imap(generate_record, records, chunksize):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            if 'error' in result:
+                errors += 1
+            else:
+                written += 1
+    return written, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate quizzes for stories (JSONL, text files or stdin)")
+    parser.add_argument('inputs', nargs='*', default=['-'], help="JSONL or text files; '-' for stdin")
+    parser.add_argument('-o', '--output', help="write JSONL here instead of stdout")
+    parser.add_argument('-p', '--processes', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunksize', type=int, default=4, help="stories handed to a process at a time")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        written, errors = run_batch(read_stories(args.inputs), output, args.processes, args.chunksize)
+    finally:
+        if args.output:
+            output.close()
+    elapsed = time.perf_counter() - started
+    rate = (written + errors) / elapsed if elapsed else 0.0
+    print(f"✅ {written} quizzes, {errors} errors in {elapsed:.1f}s ({rate:.1f} stories/s)", file=sys.stderr)
+    return 1 if errors and not written else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import hashlib
+import multiprocessing
+import os
+import time
+
+# Fields per bucket slot in the shared arrays
+_TOKENS, _UPDATED = range(2)
+
+
+def _fingerprint(key, secret):
+    """(slot hash, 52-bit fingerprint) of a key; stable across processes, unlike hash().
+
+    The hash is keyed with ``secret`` (random per table), so nobody can work out in
+    advance which keys share a slot with a given one.
+    """
+    digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=16, key=secret).digest(), 'big')
+    # Floats hold integers exactly up to 2**53; 0 marks an empty slot
+    return digest >> 64, float((digest & ((1 << 52) - 1)) or 1)
+
+
+class TokenBucketLimiter:
+    """Token buckets for many keys (IPs, usernames) in a fixed table of shared memory.
+
+    Like the circuit breakers, the table is created before gunicorn forks, so every
+    worker draws from the same buckets without a database round-trip. Each key holds
+    up to ``burst`` tokens and regains ``rate`` tokens per second. Keys hash into
+    ``slots`` buckets with a secret drawn when the table is created (so once per
+    deploy); keys landing on the same slot share its bucket, so the table never grows
+    and a collision can only make limiting stricter, never hand out a fresh bucket.
+    """
+
+    def __init__(self, name, rate, burst, slots=4096):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.slots = slots
+        self._secret = os.urandom(16)
+        self._lock = multiprocessing.Lock()
+        self._shared = multiprocessing.RawArray('d', slots * 2)
+
+    @classmethod
+    def per_minute(cls, name, per_minute, burst, slots=4096):
+        return cls(name, per_minute / 60.0, burst, slots)
+
+    def _refill(self, key):
+        """Base index of the key's bucket, refilled up to now (call with the lock held)"""
+        slot_hash, _ = _fingerprint(key, self._secret)
+        base = (slot_hash % self.slots) * 2
+        now = time.monotonic()
+        if not self._shared[base + _UPDATED]:
+            # Never used
+            self._shared[base + _TOKENS] = self.burst
+        else:
+            elapsed = max(0.0, now - self._shared[base + _UPDATED])
+            self._shared[base + _TOKENS] = min(self.burst, self._shared[base + _TOKENS] + elapsed * self.rate)
+        self._shared[base + _UPDATED] = now
+        return base
+
+    def _retry_after(self, tokens, cost):
+        return (cost - tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def consume(self, key, cost=1):
+        """Take ``cost`` tokens. Returns (allowed, seconds until it would be allowed)"""
+        with self._lock:
+            base = self._refill(key)
+            tokens = self._shared[base + _TOKENS]
+            if tokens >= cost:
+                self._shared[base + _TOKENS] = tokens - cost
+                return True, 0.0
+            return False, self._retry_after(tokens, cost)
+
+    def refund(self, key, cost=1):
+        """Give back tokens taken by ``consume`` for an attempt that turned out not to count"""
+        with self._lock:
+            base = self._refill(key)
+            self._shared[base + _TOKENS] = min(self.burst, self._shared[base + _TOKENS] + cost)
+
+
+class NegativeCache:
+    """Shared-memory set of keys known not to exist, each remembered for ``ttl`` seconds.
+
+    Used for unknown usernames: repeated logins for them are refused without a
+    database lookup. ``discard`` (on registration) is seen by every worker at once.
+    """
+
+    def __init__(self, ttl=60, slots=4096):
+        self.ttl = ttl
+        self.slots = slots
+        self._secret = os.urandom(16)
+        self._lock = multiprocessing.Lock()
+        self._shared = multiprocessing.RawArray('d', slots * 2)
+
+    def _slot(self, key):
+        slot_hash, fingerprint = _fingerprint(key, self._secret)
+        return (slot_hash % self.slots) * 2, fingerprint
+
+    def add(self, key):
+        base, fingerprint = self._slot(key)
+        with self._lock:
+            self._shared[base] = fingerprint
+            self._shared[base + 1] = time.monotonic() + self.ttl
+
+    def __contains__(self, key):
+        base, fingerprint = self._slot(key)
+        with self._lock:
+            return self._shared[base] == fingerprint and self._shared[base + 1] > time.monotonic()
+
+    def discard(self, key):
+        base, fingerprint = self._slot(key)
+        with self._lock:
+            if self._shared[base] == fingerprint:
+                self._shared[base] = 0.0
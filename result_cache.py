@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+
+def normalize_story(story_text):
+    """Collapse whitespace so trivially different submissions share a cache entry"""
+    return " ".join(story_text.split())
+
+
+def make_cache_key(story_text, version):
+    """Content-addressed key: hash of the normalized story plus the pipeline version"""
+    digest = hashlib.sha256()
+    digest.update(version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_story(story_text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache for generated quizzes.
+
+    The first tier is an in-process LRU with a TTL. The optional second tier is a
+    MongoDB collection with a TTL index so every gunicorn worker shares results.
+    Entries normally live ``ttl`` seconds; ``set`` can give one a longer life (the
+    corpus warmup keeps pre-generated quizzes through the school day).
+    """
+
+    def __init__(self, maxsize=256, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.collection = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"local_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def attach(self, collection):
+        """Use a MongoDB collection as the shared tier and make sure its TTL index exists"""
+        try:
+            # Each document carries its own expiry; the old fixed TTL on created_at is retired
+            if "created_at_1" in collection.index_information():
+                collection.drop_index("created_at_1")
+                collection.delete_many({"expires_at": {"$exists": False}})
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self.collection = collection
+        except Exception as e:
+            print(f"Result cache: shared tier disabled ({e})")
+            self.collection = None
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _get_local(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+
+        if self.collection is not None:
+            try:
+                # The TTL monitor only runs about once a minute, so filter stale documents ourselves
+                now = datetime.now(timezone.utc)
+                doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": now}})
+                if doc is not None:
+                    value = doc["value"]
+                    self._set_local(key, value, min(self.ttl, self._seconds_left(doc["expires_at"], now)))
+                    self._count("shared_hits")
+                    return value
+            except Exception as e:
+                print(f"Result cache lookup error: {e}")
+                self._count("errors")
+
+        self._count("misses")
+        return None
+
+    @staticmethod
+    def _seconds_left(expires_at, now):
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return (expires_at - now).total_seconds()
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl or self.ttl
+        self._set_local(key, value, ttl)
+        self._count("stores")
+        if self.collection is not None:
+            try:
+                now = datetime.now(timezone.utc)
+                self.collection.replace_one(
+                    {"_id": key},
+                    {"_id": key, "value": value, "created_at": now, "expires_at": now + timedelta(seconds=ttl)},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Result cache store error: {e}")
+                self._count("errors")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["local_size"] = len(self._entries)
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["local_hits"] + stats["shared_hits"]) / lookups, 3) if lookups else 0.0
+        stats["shared_tier"] = self.collection is not None
+        return stats
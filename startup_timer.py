@@ -0,0 +1,39 @@
+import time
+
+
+class StartupTimer:
+    """Wall time spent in each phase of app startup, checked against a budget.
+
+    ``mark(phase)`` closes the phase that started at the previous mark (or at creation).
+    ``report()`` returns the phases and total, and whether the total stayed within
+    ``budget_ms``; the app prints it once at the end of import and serves it on /readyz.
+    """
+
+    def __init__(self, budget_ms=1000):
+        self.budget_ms = budget_ms
+        self.phases = []
+        self._started = time.perf_counter()
+        self._last = self._started
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, round((now - self._last) * 1000, 1)))
+        self._last = now
+
+    def total_ms(self):
+        return round(sum(ms for _, ms in self.phases), 1)
+
+    def report(self):
+        total = self.total_ms()
+        return {
+            "phases": dict(self.phases),
+            "total_ms": total,
+            "budget_ms": self.budget_ms,
+            "within_budget": total <= self.budget_ms
+        }
+
+    def summary(self):
+        report = self.report()
+        phases = ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.phases)
+        status = "✓" if report["within_budget"] else "⚠️ over budget"
+        return f">>> Startup took {report['total_ms']:.0f} ms of a {self.budget_ms} ms budget {status} ({phases})"
@@ -49,24 +49,42 @@ async function submitStory() {
   document.getElementById("resultSection").style.display = "none";
 
   try {
+    // Stream the summary and questions as they become ready when the browser supports it,
+    // unless the server queues generations (a stream would hold a web thread the whole time)
+    const generateAsync = document.body.dataset.generateAsync === "true";
+    if (!generateAsync && window.ReadableStream && window.TextDecoder) {
+      await streamStory(inputText);
+      showSuccessNotification();
+      return;
+    }
+
     const response = await fetch("/generate", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ text: inputText }),
     });
 
-    const data = await response.json();
+    let data = await response.json();
     
     if (!response.ok) {
       throw new Error(data.error || "Failed to generate quiz");
     }
 
+    // Async mode: the server queued a job, wait for the background worker to finish it
+    if (response.status === 202 && data.status_url) {
+      data = await waitForJob(data.status_url);
+    }
+
     // Hide loading and show results
     document.getElementById("loadingSection").style.display = "none";
     document.getElementById("resultSection").style.display = "block";
 
-    // Parse and display the result
-    parseAndDisplayResult(data.result);
+    // Display the structured quiz (older servers only send the text rendering)
+    if (data.quiz) {
+      displayResult(quizFromJson(data.quiz));
+    } else {
+      parseAndDisplayResult(data.result);
+    }
     
     // Store the quiz ID for later use
     if (data.quiz_id) {
@@ -90,7 +108,101 @@ async function submitStory() {
   }
 }
 
+async function streamStory(inputText) {
+  const response = await fetch("/generate/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ text: inputText }),
+  });
+
+  const contentType = response.headers.get("Content-Type") || "";
+  if (!contentType.includes("text/event-stream")) {
+    // Errors come back as JSON; a login redirect returns HTML and fails to parse, which shows the login popup
+    const data = await response.json();
+    throw new Error(data.error || "Failed to generate quiz");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let summary = '';
+  const questions = [];
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let eventName = 'message';
+      let dataText = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          dataText += line.slice(5).trim();
+        }
+      }
+      const data = JSON.parse(dataText || '{}');
+
+      if (eventName === 'summary') {
+        // Show the summary right away, the questions follow
+        summary = data.summary;
+        document.getElementById("loadingSection").style.display = "none";
+        document.getElementById("resultSection").style.display = "block";
+        displayResult({ summary: summary, questions: [] });
+      } else if (eventName === 'question') {
+        questions.push(questionFromJson(data.question));
+        displayResult({ summary: summary, questions: questions });
+      } else if (eventName === 'done') {
+        currentQuizId = data.quiz_id;
+      } else if (eventName === 'error') {
+        throw new Error(data.error || "Failed to generate quiz");
+      }
+    }
+  }
+}
+
+async function waitForJob(statusUrl) {
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, 1000));
+    const response = await fetch(statusUrl);
+    const job = await response.json();
+
+    if (!response.ok || job.status === "failed") {
+      throw new Error(job.error || "Failed to generate quiz");
+    }
+    if (job.status === "done") {
+      return job;
+    }
+  }
+}
+
+const OPTION_LETTERS = ['A', 'B', 'C', 'D'];
+
+// Structured quiz from the API: {summary, questions: [{question, options, answer}]}
+function questionFromJson(q) {
+  return {
+    question: q.question,
+    options: q.options.map((text, i) => ({ letter: OPTION_LETTERS[i], text: text })),
+    correct: OPTION_LETTERS[q.answer]
+  };
+}
+
+function quizFromJson(quiz) {
+  return { summary: quiz.summary, questions: quiz.questions.map(questionFromJson) };
+}
+
+// Legacy SUMMARY/QUIZ text rendering
 function parseAndDisplayResult(result) {
+  displayResult(parseResultText(result));
+}
+
+function parseResultText(result) {
   const lines = result.split('\n');
   let currentSection = '';
   let summary = '';
@@ -136,6 +248,10 @@ function parseAndDisplayResult(result) {
     questions.push(currentQuestion);
   }
 
+  return { summary: summary, questions: questions };
+}
+
+function displayResult({ summary, questions }) {
   // Store quiz data
   quizData = questions;
   userAnswers = new Array(questions.length).fill(null);
@@ -259,16 +375,13 @@ async function showFinalResults() {
   performanceDiv.textContent = performanceMessage;
   document.getElementById("quizResults").style.display = "block";
   
-  // Save the score to the database
+  // Let the server grade the answers and save the score
   if (currentQuizId) {
     try {
-      const response = await fetch("/save_score", {
+      const response = await fetch(`/api/v1/quizzes/${currentQuizId}/grade`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ 
-          score: score, 
-          quiz_id: currentQuizId 
-        }),
+        body: JSON.stringify({ answers: userAnswers }),
       });
       
       if (!response.ok) {
@@ -0,0 +1,90 @@
+import string
+from collections import Counter
+
+# Word lists used by the fallback quiz generator. Tuples keep the order that decides
+# which match is shown first; lookups go against the story's token set, never the raw text.
+ACTION_WORDS = ('went', 'found', 'discovered', 'met', 'saw', 'heard', 'felt', 'took', 'gave', 'made', 'came', 'left', 'arrived', 'decided', 'realized', 'learned')
+PLOT_VERBS = ('found', 'discovered', 'met', 'saw', 'went', 'came', 'took', 'gave', 'made', 'ran', 'jumped', 'flew', 'fell', 'climbed', 'opened', 'closed', 'broke', 'fixed', 'helped', 'saved', 'fought', 'won', 'lost', 'died', 'lived', 'grew', 'changed', 'became', 'turned', 'returned')
+TIME_WORDS = ('morning', 'afternoon', 'evening', 'night', 'day', 'week', 'month', 'year', 'yesterday', 'today', 'tomorrow', 'once', 'then', 'now', 'later', 'before', 'after')
+EMOTION_WORDS = ('happy', 'sad', 'angry', 'scared', 'excited', 'worried', 'surprised', 'confused', 'proud', 'disappointed', 'loved', 'hated', 'feared', 'hoped', 'wished')
+DESCRIPTIVE_WORDS = ('beautiful', 'ugly', 'big', 'small', 'tall', 'short', 'dark', 'bright', 'mysterious', 'strange', 'magical', 'ordinary', 'special', 'dangerous', 'safe')
+TRAVEL_WORDS = ('went', 'traveled', 'journeyed', 'walked', 'ran', 'flew', 'drove', 'sailed', 'arrived', 'departed', 'left', 'came')
+DIALOGUE_WORDS = frozenset({'said', 'asked', 'replied'})
+# These used to be substring checks ('learn' in text), so list the inflections explicitly
+LESSON_WORDS = frozenset({'learn', 'learns', 'learned', 'learnt', 'learning', 'lesson', 'lessons', 'realize', 'realizes', 'realized', 'realizing'})
+CONTRAST_WORDS = frozenset({'but', 'however', 'although'})
+NATURE_WORDS = frozenset({'forest', 'forests', 'tree', 'trees'})
+URBAN_WORDS = frozenset({'city', 'cities', 'building', 'buildings', 'street', 'streets'})
+INDOOR_WORDS = frozenset({'house', 'houses', 'home', 'homes', 'room', 'rooms'})
+LOCATION_INDICATORS = frozenset({'in', 'at', 'to', 'from', 'near', 'beside', 'under', 'over', 'through', 'across', 'into', 'onto'})
+OBJECT_PATTERNS = frozenset({'a', 'an', 'the'})
+COMMON_WORDS = frozenset({'The', 'She', 'He', 'They', 'It', 'We', 'I', 'You', 'One', 'Once', 'This', 'That', 'There', 'These', 'Those', 'Throughout', 'In', 'At', 'On', 'By', 'For', 'With', 'But', 'And', 'Or', 'So', 'If', 'When', 'Where', 'Why', 'How', 'What', 'Who', 'Which', 'Every', 'Some', 'Many', 'Few', 'All', 'Any', 'After', 'Before', 'During', 'While', 'Since', 'Until', 'Curious', 'Suddenly', 'Finally', 'Eventually', 'Meanwhile', 'However', 'Therefore', 'Furthermore', 'Moreover', 'Nevertheless', 'Nonetheless', 'Otherwise', 'Instead', 'Indeed', 'Perhaps', 'Maybe', 'Certainly', 'Definitely', 'Probably', 'Possibly', 'Usually', 'Often', 'Sometimes', 'Always', 'Never', 'Just', 'Only', 'Even', 'Still', 'Already', 'Also', 'Too', 'Either', 'Neither', 'Both', 'Each', 'Another', 'Other', 'Such', 'Rather', 'Quite', 'Very', 'Really', 'Actually', 'Basically', 'Generally', 'Specifically', 'Particularly', 'Especially'})
+
+_ACTION_SET = frozenset(ACTION_WORDS)
+
+# Punctuation (except '.') becomes whitespace. Translating the UTF-8 bytes with a 256-entry
+# table is much cheaper than a regex or a str.translate dict; multi-byte characters are
+# left alone because none of their bytes are ASCII.
+_PUNCTUATION = string.punctuation.replace('.', '')
+_PUNCTUATION_TABLE = bytes.maketrans(_PUNCTUATION.encode('ascii'), b' ' * len(_PUNCTUATION))
+_UNICODE_PUNCTUATION = '\u201c\u201d\u2018\u2019\u2014\u2013\u2026'
+
+
+class StoryAnalysis:
+    """Tokenize a story once so every lexicon check is a set lookup.
+
+    ``sentences`` matches the old ``split('.')`` behaviour, ``tokens`` holds the lowercase
+    word tokens of all sentences in order and ``sentence_spans[i]`` is the ``(start, end)``
+    slice of ``tokens`` belonging to ``sentences[i]``. ``words`` is the whitespace split
+    used for the capitalisation-based name, place and object heuristics.
+    """
+
+    def __init__(self, story_text):
+        self.text = story_text
+        lower_text = story_text.lower()
+        self.words = story_text.split()
+        self.words_lower = lower_text.split()
+
+        for char in _UNICODE_PUNCTUATION:
+            if char in lower_text:
+                lower_text = lower_text.replace(char, ' ')
+        # Keep '.' as its own token so sentence boundaries survive the single split
+        spaced = lower_text.replace('.', ' . ').encode('utf-8').translate(_PUNCTUATION_TABLE).decode('utf-8')
+        marked_tokens = spaced.split()
+
+        # Sentence i of text.split('.') lies between the (i-1)th and ith '.' token
+        self.sentences = []
+        self.sentence_spans = []
+        self.tokens = []
+        start = 0
+        for chunk in story_text.split('.'):
+            try:
+                end = marked_tokens.index('.', start)
+            except ValueError:
+                end = len(marked_tokens)
+            sentence = chunk.strip()
+            if sentence:
+                first = len(self.tokens)
+                self.tokens.extend(marked_tokens[start:end])
+                self.sentences.append(sentence)
+                self.sentence_spans.append((first, len(self.tokens)))
+            start = end + 1
+
+        self.token_counts = Counter(self.tokens)
+
+    def has(self, word):
+        return word in self.token_counts
+
+    def has_any(self, words):
+        return not self.token_counts.keys().isdisjoint(words)
+
+    def found(self, lexicon):
+        """Words of ``lexicon`` present in the story, in lexicon order"""
+        return [word for word in lexicon if word in self.token_counts]
+
+    def sentence_tokens(self, index):
+        start, end = self.sentence_spans[index]
+        return self.tokens[start:end]
+
+    def sentence_has_action(self, index):
+        return not _ACTION_SET.isdisjoint(self.sentence_tokens(index))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Hugging Face inference API, for tests and load tests
+
+Point the app at it with:
+    HUGGINGFACE_API_URL=http://127.0.0.1:8001/models/bart
+    HUGGINGFACE_QA_URL=http://127.0.0.1:8001/models/flan-t5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_QUIZ = "\n".join(
+    f"{i}. Stub question {i}?\nA) First\nB) Second\nC) Third\nD) Fourth\nCorrect: {'ABCD'[i % 4]}"
+    for i in range(1, 6)
+)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when a load test opens hundreds at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StubInferenceServer:
+    """Answers summarization and text-generation requests after a configurable delay"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, fail_rate=0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                stub.requests += 1
+                time.sleep(stub.latency)
+                if random.random() < stub.fail_rate:
+                    status, payload = 503, {"error": "Stub failure", "estimated_time": 0.1}
+                elif 'bart' in self.path:
+                    inputs = body.get('inputs', '')
+                    texts = inputs if isinstance(inputs, list) else [inputs]
+                    status, payload = 200, [{"summary_text": " ".join(text.split()[:40]) or "Empty story."} for text in texts]
+                else:
+                    status, payload = 200, [{"generated_text": STUB_QUIZ}]
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _StubHTTPServer((host, port), Handler)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a stub Hugging Face inference server")
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=1.0, help="seconds to wait before answering")
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubInferenceServer(port=args.port, latency=args.latency, fail_rate=args.fail_rate)
+    print(f"Stub inference server on {server.url} (latency {args.latency}s)")
+    server.httpd.serve_forever()
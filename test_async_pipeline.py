@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the async pipeline keeps many generations in flight and the ASGI
+entry point splits routes between its native handlers and Flask
+"""
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import async_pipeline
+import quiz_pipeline
+from stub_inference_server import StubInferenceServer
+
+STORY = """Once upon a time a clever fox lived in a quiet forest. One morning he saw a crow
+sitting on a branch with a piece of cheese. The fox praised the crow's beautiful voice.
+The proud crow began to sing and dropped the cheese. The fox ran away with it, and the
+crow learned not to trust flattery."""
+
+def stub_backend(stub):
+    """Point the pipeline at the stub server, with a key so the models are called"""
+    return [patch.dict(os.environ, {'HUGGINGFACE_API_KEY': 'test-key'}),
+            patch.object(quiz_pipeline, 'HUGGINGFACE_API_URL', f"{stub.url}/models/bart"),
+            patch.object(quiz_pipeline, 'HUGGINGFACE_QA_URL', f"{stub.url}/models/flan-t5")]
+
+async def generate_all(stories):
+    try:
+        return await asyncio.gather(*(async_pipeline.generate_quiz(story) for story in stories))
+    finally:
+        # The clients belong to this event loop
+        await async_pipeline.async_client.aclose()
+
+def test_concurrent_generations():
+    """Forty stories at once take about one round of model latency, not forty"""
+    print("Testing concurrent generations...")
+    stub = StubInferenceServer(latency=0.3).start()
+    patches = stub_backend(stub)
+    try:
+        for p in patches:
+            p.start()
+        started = time.perf_counter()
+        quizzes = asyncio.run(generate_all([f"Story {i} at {started}. {STORY}" for i in range(40)]))
+        elapsed = time.perf_counter() - started
+    finally:
+        for p in reversed(patches):
+            p.stop()
+        stub.stop()
+    assert all(quiz['questions'][0]['question'].startswith("Stub question") for quiz in quizzes)
+    assert stub.requests == 80
+    assert elapsed < 4, elapsed
+    print(f"✓ 40 model quizzes in {elapsed:.2f}s")
+
+def test_identical_stories_share_a_generation():
+    """Simultaneous requests for one story make one pair of model calls"""
+    print("Testing single flight...")
+    stub = StubInferenceServer(latency=0.2).start()
+    patches = stub_backend(stub)
+    story = f"Shared at {time.time()}. {STORY}"
+    try:
+        for p in patches:
+            p.start()
+        quizzes = asyncio.run(generate_all([story] * 5))
+    finally:
+        for p in reversed(patches):
+            p.stop()
+        stub.stop()
+    assert stub.requests == 2
+    assert all(quiz == quizzes[0] for quiz in quizzes)
+    print("✓ One generation for five requests")
+
+def test_asgi_routing():
+    """Flask keeps every other route; /generate without a session gets Flask's login redirect"""
+    print("Testing ASGI routing...")
+    import asgi
+
+    async def requests():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            health = await client.get("/healthz")
+            anonymous = await client.post("/generate", json={"text": STORY})
+            cookie = asgi.session_serializer.dumps({'username': 'tester'})
+            with patch.object(asgi, 'save_quiz_result', return_value='quiz-1'), \
+                    patch.dict(os.environ, {'HUGGINGFACE_API_KEY': ''}):
+                native = await client.post("/generate", json={"text": STORY, "async": False},
+                                           headers={'Cookie': f"session={cookie}"})
+        await async_pipeline.async_client.aclose()
+        return health, anonymous, native
+
+    health, anonymous, native = asyncio.run(requests())
+    assert health.status_code == 200
+    assert anonymous.status_code == 302 and '/login' in anonymous.headers['location']
+    assert native.status_code == 200, native.text
+    assert native.json()['quiz_id'] == 'quiz-1'
+    print("✓ Native and Flask routes answered")
+
+def test_asgi_database_unavailable():
+    """Native handlers answer 503 with Retry-After when MongoDB is down, as the Flask views do"""
+    print("Testing ASGI error mapping...")
+    import asgi
+    from database import DatabaseUnavailable
+
+    async def requests():
+        transport = httpx.ASGITransport(app=asgi.application)
+        headers = {'Cookie': f"session={asgi.session_serializer.dumps({'username': 'tester'})}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            with patch.object(asgi, 'save_quiz_result', side_effect=DatabaseUnavailable("down")), \
+                    patch.dict(os.environ, {'HUGGINGFACE_API_KEY': ''}):
+                responses = [await client.post("/generate", json={"text": STORY, "async": False}, headers=headers),
+                             await client.post("/api/v1/quizzes", json={"text": STORY}, headers=headers)]
+        await async_pipeline.async_client.aclose()
+        return responses
+
+    for response in asyncio.run(requests()):
+        assert response.status_code == 503, response.text
+        assert response.headers['retry-after'] == str(int(asgi.mongo.retry_interval))
+        assert response.json() == {"error": "Database not available"}
+    print("✓ 503 with Retry-After from both handlers")
+
+if __name__ == "__main__":
+    test_concurrent_generations()
+    test_identical_stories_share_a_generation()
+    test_asgi_routing()
+    test_asgi_database_unavailable()
+    print("✓ All async pipeline tests passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify backend routing, failover and hedging
+"""
+import os
+import sys
+import time
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backends import Backend, BackendRouter
+
+def slow(result, delay):
+    def run(story_text):
+        time.sleep(delay)
+        return result
+    return run
+
+def failing(story_text):
+    raise RuntimeError("backend down")
+
+def test_prefers_fastest_healthy_backend():
+    """Within a tier the backend with the lower p50 is tried first"""
+    print("Testing latency-aware ordering...")
+    router = BackendRouter(min_samples=1)
+    router.register(Backend('slow', 'summary', slow('slow summary', 0.05)))
+    router.register(Backend('fast', 'summary', slow('fast summary', 0.0)))
+    router.register(Backend('local', 'summary', slow('local summary', 0.0), tier=1))
+    for backend in router.backends('summary'):
+        router._call(backend, "story")
+    assert [b.name for b in router.candidates('summary')] == ['fast', 'slow', 'local']
+    assert router.run('summary', "story") == 'fast summary'
+    print("✓ Fastest healthy backend chosen")
+
+def test_failover_and_health():
+    """Failing backends fall through to the next one and are marked unhealthy"""
+    print("Testing failover...")
+    router = BackendRouter(min_samples=2, hedge_after=5)
+    router.register(Backend('broken', 'quiz', failing))
+    router.register(Backend('backup', 'quiz', slow(['question'], 0.0), tier=1))
+    assert router.run('quiz', "story") == ['question']
+    assert router.run('quiz', "story") == ['question']
+    assert not router.healthy(router.backends('quiz')[0])
+    assert router.candidates('quiz')[0].name == 'backup'
+    print("✓ Failed backend skipped")
+
+def test_hedges_slow_primary():
+    """A second backend is started once the primary misses its hedge deadline"""
+    print("Testing hedged requests...")
+    router = BackendRouter(hedge_after=0.05)
+    router.register(Backend('remote', 'summary', slow('remote summary', 1.0)))
+    router.register(Backend('local', 'summary', slow('local summary', 0.0), tier=1))
+    started = time.perf_counter()
+    assert router.run('summary', "story") == 'local summary'
+    assert time.perf_counter() - started < 0.5
+    print("✓ Hedged request answered before the slow primary")
+
+if __name__ == "__main__":
+    test_prefers_fastest_healthy_backend()
+    test_failover_and_health()
+    test_hedges_slow_primary()
+    print("✓ All backend routing tests passed!")
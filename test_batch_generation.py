@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script to verify batch generation against the stub inference server: identical
+stories are generated once, summaries go out in batched requests, and the batch route
+stores every quiz with one insert_many
+"""
+import os
+import sys
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+
+import quiz_pipeline
+from content_store import content_ref, get_content
+from mongomock_support import fresh_worker, logged_in_client, sse_events, worker_database
+from stub_inference_server import StubInferenceServer
+
+STORY = """Once upon a time a clever fox lived in a quiet forest. One morning he saw a crow
+sitting on a branch with a piece of cheese. The fox praised the crow's beautiful voice.
+The proud crow began to sing and dropped the cheese. The fox ran away with it, and the
+crow learned not to trust flattery."""
+
+def stub_backend(stack, stub):
+    """Point the pipeline at the stub server, with a key so the models are called"""
+    stack.enter_context(patch.dict(os.environ, {'HUGGINGFACE_API_KEY': 'test-key'}))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_API_URL', f"{stub.url}/models/bart"))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_QA_URL', f"{stub.url}/models/flan-t5"))
+    stack.enter_context(patch.object(quiz_pipeline, 'BATCH_SUMMARY_SIZE', 8))
+    stack.callback(stub.stop)
+
+def stories(count):
+    """``count`` distinct stories no earlier test has cached"""
+    started = time.time()
+    return [f"Story {i} told at {started}. {STORY}" for i in range(count)]
+
+def test_batched_summaries_and_dedupe():
+    """Ten distinct stories out of twelve: two BART requests of up to eight inputs, ten quiz requests"""
+    print("Testing batch generation...")
+    texts = stories(10)
+    batch = texts + [texts[3], texts[7]]
+    stub = StubInferenceServer().start()
+    with ExitStack() as stack:
+        stub_backend(stack, stub)
+        results = list(quiz_pipeline.generate_batch(batch))
+    assert len(results) == 10
+    assert sorted(index for indexes, _ in results for index in indexes) == list(range(12))
+    assert sorted(indexes for indexes, _ in results if len(indexes) > 1) == [[3, 10], [7, 11]]
+    for indexes, quiz in results:
+        assert quiz['questions'][0]['question'].startswith("Stub question"), quiz
+        # The stub summarizes with the story's first words
+        assert quiz['summary'].startswith(batch[indexes[0]].split('.')[0])
+    assert stub.requests == 2 + 10, stub.requests
+    print(f"✓ {len(batch)} stories in {stub.requests} model requests")
+
+def test_item_error_falls_back():
+    """A story whose generation raises gets the rule-based quiz; the rest of the batch is unaffected"""
+    print("Testing batch item errors...")
+    texts = stories(3)
+    generate_quiz = quiz_pipeline.generate_quiz
+    def flaky_generate_quiz(story_text, summary=None):
+        if story_text == texts[1]:
+            raise RuntimeError("model exploded")
+        return generate_quiz(story_text, summary)
+
+    stub = StubInferenceServer().start()
+    with ExitStack() as stack:
+        stub_backend(stack, stub)
+        stack.enter_context(patch.object(quiz_pipeline, 'generate_quiz', flaky_generate_quiz))
+        results = dict((indexes[0], quiz) for indexes, quiz in quiz_pipeline.generate_batch(texts))
+    assert sorted(results) == [0, 1, 2]
+    assert results[0]['questions'][0]['question'].startswith("Stub question")
+    assert results[2]['questions'][0]['question'].startswith("Stub question")
+    assert results[1]['questions'] and not results[1]['questions'][0]['question'].startswith("Stub question")
+    print("✓ Failed item replaced by the fallback quiz")
+
+def test_batch_route_saves_in_one_insert():
+    """The route streams one item per distinct story, then saves every story's quiz in order"""
+    print("Testing the batch route...")
+    texts = stories(3)
+    batch = [texts[0], texts[1], texts[0], texts[2]]
+    stub = StubInferenceServer().start()
+    stack, app_module = fresh_worker()
+    with stack:
+        stub_backend(stack, stub)
+        stack.enter_context(patch.object(app_module, 'save_quiz_result',
+                                         side_effect=AssertionError("saved one quiz at a time")))
+        client = logged_in_client(app_module)
+        response = client.post('/api/v1/quizzes/batch', json={"stories": batch})
+        assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+        events = sse_events(response)
+
+        assert [event for event, _ in events] == ['item', 'item', 'item', 'done'], events
+        assert sorted(tuple(data['indexes']) for _, data in events[:-1]) == [(0, 2), (1,), (3,)]
+        quiz_ids = events[-1][1]['quiz_ids']
+        assert len(quiz_ids) == 4 and len(set(quiz_ids)) == 4
+
+        db = worker_database()
+        docs = [db.quiz_results.find_one({"_id": ObjectId(quiz_id)}) for quiz_id in quiz_ids]
+        assert [doc['story_ref'] for doc in docs] == [content_ref(text) for text in batch]
+        assert get_content(db, docs[3]['story_ref']) == texts[2]
+        assert docs[0]['quiz'] == docs[2]['quiz'] and len({doc['date'] for doc in docs}) == 1
+        assert db.contents.find_one({"_id": content_ref(texts[0])})['refs'] == 2
+        assert db.user_stats.find_one({"username": "reader"})['quiz_count'] == 4
+
+        empty = client.post('/api/v1/quizzes/batch', json={"stories": [STORY, " "]})
+        assert empty.status_code == 400
+    print("✓ Batch streamed and saved")
+
+def test_batch_route_reports_save_errors():
+    """A failure after generation ends the stream with an error event instead of a broken response"""
+    print("Testing batch route errors...")
+    stub = StubInferenceServer().start()
+    stack, app_module = fresh_worker()
+    with stack:
+        stub_backend(stack, stub)
+        stack.enter_context(patch.object(app_module, 'save_quiz_results', side_effect=RuntimeError("disk full")))
+        response = logged_in_client(app_module).post('/api/v1/quizzes/batch', json={"stories": stories(2)})
+        events = sse_events(response)
+    assert [event for event, _ in events] == ['item', 'item', 'error']
+    assert events[-1][1] == {"error": "disk full"}
+    print("✓ Error event sent")
+
+if __name__ == "__main__":
+    test_batched_summaries_and_dedupe()
+    test_item_error_falls_back()
+    test_batch_route_saves_in_one_insert()
+    test_batch_route_reports_save_errors()
+    print("✓ All batch generation tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chunked map-reduce summarization
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chunking import split_into_chunks, map_reduce_summarize, quiz_excerpt
+
+long_story = " ".join(f"Chapter {i} tells how the traveler reached village{i} by the river." for i in range(400))
+
+def test_chunks_respect_sentences_and_size():
+    """Chunks hold whole sentences and never exceed the word window"""
+    print("Testing chunking...")
+    chunks = split_into_chunks(long_story, max_words=100)
+    assert all(len(chunk.split()) <= 100 for chunk in chunks)
+    assert all(chunk.endswith('.') for chunk in chunks)
+    assert " ".join(chunks).split() == long_story.split()
+    print(f"✓ {len(chunks)} chunks of at most 100 words")
+
+def test_map_reduce_calls_model_per_chunk():
+    """Every chunk is summarized, then the joined summaries are summarized again"""
+    print("Testing map-reduce...")
+    calls = []
+
+    def fake_model(text):
+        calls.append(len(text.split()))
+        assert len(text.split()) <= 100
+        return " ".join(text.split()[:10])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        summary = map_reduce_summarize(long_story, fake_model, executor, max_words=100)
+    assert len(summary.split()) <= 10
+    assert len(calls) > len(split_into_chunks(long_story, max_words=100))
+    print(f"✓ {len(calls)} model calls")
+
+def test_model_outage_is_reported():
+    """Some failed chunks fall back quietly; a model that failed on every chunk is a failure"""
+    print("Testing chunk failures...")
+    calls = []
+
+    def flaky_model(text):
+        calls.append(text)
+        if len(calls) % 2:
+            raise RuntimeError("model unavailable")
+        return " ".join(text.split()[:10])
+
+    def down_model(text):
+        raise RuntimeError("model unavailable")
+
+    fallback = lambda text: " ".join(text.split()[:5])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert map_reduce_summarize(long_story, flaky_model, executor, max_words=100, fallback=fallback)
+        assert map_reduce_summarize(long_story, down_model, executor, max_words=100, fallback=fallback) == ''
+    print("✓ Partial failures covered, total failure reported")
+
+def test_quiz_excerpt_covers_whole_story():
+    """The quiz excerpt samples from the end of a long story too"""
+    print("Testing quiz excerpt...")
+    excerpt = quiz_excerpt(long_story, max_chars=1500, max_words=100)
+    assert len(excerpt) <= 1500
+    assert any(f"village{i} " in excerpt for i in range(300, 400))
+    print("✓ Excerpt covers the whole story")
+
+if __name__ == "__main__":
+    test_chunks_respect_sentences_and_size()
+    test_map_reduce_calls_model_per_chunk()
+    test_model_outage_is_reported()
+    test_quiz_excerpt_covers_whole_story()
+    print("✓ All chunking tests passed!")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared circuit breaker
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from circuit_breaker import CircuitBreaker
+
+def test_opens_and_probes():
+    """Opens after N failures, lets one probe through after the timeout, closes on success"""
+    print("Testing open / half-open / closed transitions...")
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0.1)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.is_open() and not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == 'open'
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.snapshot()["state"] == 'closed' and breaker.allow()
+    print("✓ Breaker transitions work")
+
+def _fail_in_child(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+def test_state_shared_across_forked_workers():
+    """Failures recorded in a forked worker open the circuit for the parent too"""
+    print("Testing shared state across processes...")
+    breaker = CircuitBreaker('shared', failure_threshold=2, reset_timeout=30)
+    child = multiprocessing.get_context('fork').Process(target=_fail_in_child, args=(breaker,))
+    child.start()
+    child.join()
+    assert breaker.is_open()
+    print("✓ Circuit opened by another process")
+
+if __name__ == "__main__":
+    test_opens_and_probes()
+    test_state_shared_across_forked_workers()
+    print("✓ All circuit breaker tests passed!")
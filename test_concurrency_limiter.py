@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script to verify generation slots, their queue, and the gunicorn sizing plan
+"""
+import os
+import sys
+import threading
+import time
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from concurrency_limiter import ConcurrencyLimiter, LimiterFull
+from worker_sizing import plan
+
+def test_slots_queue_and_reject():
+    """Two run, one waits for a slot, the fourth is turned away at once"""
+    print("Testing slots and queue...")
+    limiter = ConcurrencyLimiter('test', limit=2, max_queue=1, queue_timeout=5)
+    release = threading.Event()
+    entered = []
+
+    def hold():
+        with limiter.slot():
+            entered.append(time.monotonic())
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    stats = limiter.stats()
+    assert (stats["active"], stats["waiting"]) == (2, 1), stats
+    try:
+        limiter.acquire()
+        raise AssertionError("a full queue should reject")
+    except LimiterFull as e:
+        assert e.retry_after >= 1
+    release.set()
+    for thread in threads:
+        thread.join()
+    stats = limiter.stats()
+    assert len(entered) == 3
+    assert (stats["active"], stats["admitted"], stats["queued"], stats["rejected"]) == (0, 3, 1, 1), stats
+    print(f"✓ Queued request waited {stats['max_wait_ms']} ms")
+
+def test_queue_timeout():
+    """A queued request gives up after queue_timeout instead of holding its thread"""
+    print("Testing queue timeout...")
+    limiter = ConcurrencyLimiter('test', limit=1, max_queue=1, queue_timeout=0.1)
+    acquired_at = limiter.acquire()
+    started = time.monotonic()
+    try:
+        limiter.acquire()
+        raise AssertionError("the queued request should time out")
+    except LimiterFull:
+        pass
+    assert time.monotonic() - started < 1
+    limiter.release(acquired_at)
+    assert limiter.stats()["timed_out"] == 1
+    with limiter.slot():
+        pass
+    print("✓ Timed out and recovered")
+
+def test_sizing_plan():
+    """Workers follow CPUs but fit in memory; threads cover generation plus page threads"""
+    print("Testing sizing plan...")
+    small = plan(cpus=0.5, memory=512 << 20, environ={})
+    assert (small["workers"], small["threads"]) == (2, 10), small
+    big = plan(cpus=4, memory=16 << 30, environ={})
+    assert big["workers"] == 9, big
+    tight = plan(cpus=8, memory=1 << 30, environ={'WORKER_MEMORY_MB': '400'})
+    assert tight["workers"] == 2, tight
+    overridden = plan(cpus=4, memory=16 << 30, environ={'WEB_CONCURRENCY': '3', 'GUNICORN_THREADS': '6'})
+    assert (overridden["workers"], overridden["threads"]) == (3, 6), overridden
+    print(f"✓ 0.5 CPU / 512 MB -> {small['workers']} workers x {small['threads']} threads")
+
+if __name__ == "__main__":
+    test_slots_queue_and_reject()
+    test_queue_timeout()
+    test_sizing_plan()
+    print("✓ All concurrency limiter tests passed!")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test script to verify content store encoding
+"""
+import os
+import sys
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from content_store import COMPRESS_MIN_BYTES, content_ref, decode_body, encode_body
+
+def test_small_bodies_stay_text():
+    """Short texts are stored as plain strings"""
+    print("Testing small bodies...")
+    body, encoding = encode_body("Alice found a rabbit hole.".encode('utf-8'))
+    assert encoding == 'text'
+    assert decode_body({"body": body, "encoding": encoding}) == "Alice found a rabbit hole."
+    print("✓ Small bodies stored as text")
+
+def test_large_bodies_round_trip_compressed():
+    """Large, repetitive texts are zlib-compressed and decode back unchanged"""
+    print("Testing compression round trip...")
+    text = "Alice walked through the forest — and saw a rabbit. " * 100
+    data = text.encode('utf-8')
+    assert len(data) >= COMPRESS_MIN_BYTES
+    body, encoding = encode_body(data)
+    assert encoding == 'zlib' and len(body) < len(data)
+    assert decode_body({"body": body, "encoding": encoding}) == text
+    print(f"✓ {len(data)} bytes stored as {len(body)}")
+
+def test_refs_are_content_addressed():
+    """Identical texts share a reference, different ones do not"""
+    print("Testing content references...")
+    assert content_ref("same story") == content_ref("same story")
+    assert content_ref("same story") != content_ref("same story!")
+    print("✓ References are content hashes")
+
+if __name__ == "__main__":
+    test_small_bodies_stay_text()
+    test_large_bodies_round_trip_compressed()
+    test_refs_are_content_addressed()
+    print("✓ All content store tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the index setup: ensure_indexes creates every index and drops the
+retired ones, and the COLLSCAN check flags the hot queries until their indexes exist
+
+mongomock has no explain(), so the check runs against a stand-in planner here. Set
+TEST_MONGO_URI (e.g. mongodb://localhost:27017) to also run it against a real MongoDB,
+in a throwaway database that is dropped afterwards.
+"""
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mongomock
+from mongomock.collection import Cursor
+
+from db_indexes import HOT_QUERIES, INDEXES, ensure_indexes, find_collscans
+
+def planned_explain(cursor):
+    """explain() for mongomock: an IXSCAN when an index leads with a filtered field or the first sort key"""
+    fields = list(cursor._spec) + [key for key, _ in cursor._sort or []][:1]
+    leading = {index['key'][0][0] for index in cursor.collection.index_information().values()}
+    if any(field in leading for field in fields):
+        stage = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+    else:
+        stage = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}} if cursor._sort else {"stage": "COLLSCAN"}
+    return {"queryPlanner": {"winningPlan": stage}}
+
+def test_ensure_indexes():
+    """Every index is created once, reruns are no-ops, and the retired username_date is dropped"""
+    print("Testing ensure_indexes...")
+    db = mongomock.MongoClient()['indexes_test']
+    db.quiz_results.create_index([("username", 1), ("date", -1)], name="username_date")
+
+    created = ensure_indexes(db)
+    assert len(created) == sum(len(specs) for specs in INDEXES.values()), created
+    for collection, specs in INDEXES.items():
+        existing = db[collection].index_information()
+        for keys, options in specs:
+            assert existing[options['name']]['key'] == keys, (collection, options['name'])
+            assert existing[options['name']].get('unique', False) == options.get('unique', False)
+    assert 'username_date' not in db.quiz_results.index_information()
+
+    assert ensure_indexes(db) == created
+    assert len(db.quiz_results.index_information()) == 2
+    print(f"✓ {len(created)} indexes created")
+
+def test_collscan_check():
+    """Before ensure_indexes the profile history scans quiz_results; afterwards no hot query does"""
+    print("Testing the COLLSCAN check...")
+    db = mongomock.MongoClient()['indexes_test']
+    db.quiz_results.insert_one({"username": "ana", "date": 0, "score": 3})
+    with patch.object(Cursor, 'explain', planned_explain, create=True):
+        problems = {description: stages for description, _, stages in find_collscans(db)}
+        # Only the save_score update has the _id index to fall back on
+        assert len(problems) == len(HOT_QUERIES) - 1 and "save_score update" not in problems, problems
+        assert problems["profile quiz history"] == ['SORT', 'COLLSCAN']
+
+        ensure_indexes(db)
+        assert find_collscans(db) == []
+    print("✓ Collection scans flagged until indexed")
+
+def test_collscan_check_on_mongodb():
+    """The same check against a real server's query planner, when TEST_MONGO_URI is set"""
+    uri = os.environ.get('TEST_MONGO_URI')
+    if not uri:
+        print("- Skipping the MongoDB explain check: TEST_MONGO_URI is not set")
+        return
+    from pymongo import MongoClient
+
+    print("Testing the COLLSCAN check on MongoDB...")
+    client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+    db = client[f"indexes_test_{int(time.time() * 1000)}"]
+    try:
+        db.quiz_results.insert_many([{"username": f"user{i % 10}", "date": i, "score": i} for i in range(100)])
+        assert "profile quiz history" in [description for description, _, _ in find_collscans(db)]
+
+        ensure_indexes(db)
+        problems = find_collscans(db)
+        assert problems == [], problems
+    finally:
+        client.drop_database(db.name)
+        client.close()
+    print("✓ Every hot query uses an index")
+
+if __name__ == "__main__":
+    test_ensure_indexes()
+    test_collscan_check()
+    test_collscan_check_on_mongodb()
+    print("✓ All index tests passed!")
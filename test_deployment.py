@@ -18,16 +18,17 @@ def test_app_startup_without_mongo():
         'MONGO_URI': 'mongodb://invalid-host:27017/test',
         'SECRET_KEY': 'test-secret-key',
         'FLASK_ENV': 'production',
-        'HUGGINGFACE_API_KEY': 'test-key'
+        'HUGGINGFACE_API_KEY': 'test-key',
+        'MONGO_TIMEOUT_MS': '500'
     }
     
     with patch.dict(os.environ, test_env):
         try:
-            # Import the app (this will trigger the MongoDB connection attempt)
-            from app import app, mongo_connected
+            # Import the app (MongoDB is only contacted on first use)
+            from app import app, mongo
             
             print(f"✓ App imported successfully")
-            print(f"✓ MongoDB connected: {mongo_connected}")
+            print(f"✓ MongoDB connected: {mongo.connected}")
             
             # Test that the app can handle requests
             with app.test_client() as client:
@@ -39,6 +40,15 @@ def test_app_startup_without_mongo():
                 assert response.status_code == 200
                 print("✓ Home page working")
                 
+                response = client.get('/healthz')
+                assert response.status_code == 200
+                print("✓ Liveness endpoint working")
+                
+                response = client.get('/readyz')
+                assert response.status_code == 503
+                assert response.get_json()['checks']['mongodb']['ok'] is False
+                print("✓ Readiness reports MongoDB as unavailable")
+                
             print("✓ All tests passed! App can run without MongoDB.")
             return True
             
@@ -46,6 +56,24 @@ def test_app_startup_without_mongo():
             print(f"✗ Test failed: {e}")
             return False
 
+# Operational stats are for signed-in users, not the public
+STATS_ROUTES = ['/cache/stats', '/auth/stats', '/mail/stats', '/backends/stats', '/concurrency/stats']
+
+def test_stats_need_login():
+    """Stats endpoints redirect anonymous clients to the login page"""
+    print("Testing stats endpoints...")
+    from mongomock_support import fresh_worker, logged_in_client
+    stack, app_module = fresh_worker()
+    with stack:
+        anonymous = app_module.app.test_client()
+        client = logged_in_client(app_module)
+        for path in STATS_ROUTES:
+            response = anonymous.get(path)
+            assert response.status_code == 302 and '/login' in response.headers['Location'], path
+            assert client.get(path).status_code == 200, path
+    print(f"✓ {len(STATS_ROUTES)} stats endpoints need a login")
+
 if __name__ == "__main__":
     success = test_app_startup_without_mongo()
+    test_stats_need_login()
     sys.exit(0 if success else 1)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the local extractive summarizer
+"""
+import os
+import sys
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from extractive_summarizer import summarize_extractive
+
+test_story = """
+Once upon a time, there was a young girl named Alice who loved to explore. 
+One day, she found a mysterious rabbit hole in her garden. Curious, she 
+decided to follow the white rabbit down the hole. She fell for what seemed 
+like hours before landing in a strange wonderland filled with talking animals 
+and magical creatures. Alice met a grinning Cheshire Cat who could disappear 
+at will, attended a mad tea party with the March Hare and the Mad Hatter, 
+and even played croquet with the Queen of Hearts using flamingos as mallets. 
+Throughout her journey, Alice learned that things aren't always what they seem 
+and that imagination can take you to incredible places. In the end, she woke 
+up under a tree, wondering if it had all been a dream.
+"""
+
+def test_summary_uses_story_sentences_in_order():
+    """The summary is 3 sentences taken from the story, in story order"""
+    print("Testing extractive summary...")
+    summary = summarize_extractive(test_story)
+    flat_story = " ".join(test_story.split())
+    parts = [part for part in summary.rstrip('.').split('. ')]
+    assert len(parts) == 3
+    positions = [flat_story.index(part) for part in parts]
+    assert positions == sorted(positions)
+    print(f"✓ Summary: {summary}")
+
+def test_short_and_long_inputs():
+    """Short stories are returned whole, long ones stay bounded"""
+    print("Testing input sizes...")
+    assert summarize_extractive("Alice went home. She slept.") == "Alice went home. She slept."
+    long_story = " ".join(f"Sentence number {i} talks about topic{i % 50} and river{i % 7}." for i in range(3000))
+    assert len(summarize_extractive(long_story).split('. ')) <= 6
+    print("✓ Summary length is bounded")
+
+if __name__ == "__main__":
+    test_summary_uses_story_sentences_in_order()
+    test_short_and_long_inputs()
+    print("✓ All extractive summarizer tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the /generate/stream route: the summary event comes first, one
+event per question follows, and the stream always ends with done or error, including
+when the models time out
+"""
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+
+import quiz_pipeline
+from database import DatabaseUnavailable
+from mongomock_support import fresh_worker, logged_in_client, sse_events, worker_database
+from stub_inference_server import StubInferenceServer
+
+STORY = """Once upon a time a clever fox lived in a quiet forest. One morning he saw a crow
+sitting on a branch with a piece of cheese. The fox praised the crow's beautiful voice.
+The proud crow began to sing and dropped the cheese. The fox ran away with it, and the
+crow learned not to trust flattery."""
+
+def stub_backend(stack, stub):
+    """Point the pipeline at the stub server, with a key so the models are called"""
+    stack.enter_context(patch.dict(os.environ, {'HUGGINGFACE_API_KEY': 'test-key'}))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_API_URL', f"{stub.url}/models/bart"))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_QA_URL', f"{stub.url}/models/flan-t5"))
+    stack.callback(stub.stop)
+
+def fresh_story():
+    """A story no earlier test has cached"""
+    return f"Told at {time.time()}. {STORY}"
+
+def test_stream_framing():
+    """summary, five numbered questions, then done with the saved quiz's id, each as its own SSE block"""
+    print("Testing stream framing...")
+    story = fresh_story()
+    stub = StubInferenceServer().start()
+    stack, app_module = fresh_worker()
+    with stack:
+        stub_backend(stack, stub)
+        response = logged_in_client(app_module).post('/generate/stream', json={"text": story})
+        assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache' and response.headers['X-Accel-Buffering'] == 'no'
+        body = response.get_data(as_text=True)
+        assert body.startswith("event: summary\ndata: {") and body.endswith("}\n\n")
+        events = sse_events(response)
+        # Closing the finished stream gave its generation slot back
+        assert app_module.generation_limiter.stats()['active'] == 0
+
+        assert [event for event, _ in events] == ['summary'] + ['question'] * 5 + ['done'], events
+        assert events[0][1]['summary'].startswith("Told at")
+        questions = [data for event, data in events if event == 'question']
+        assert [data['index'] for data in questions] == list(range(5))
+        assert questions[0]['question']['question'] == "Stub question 1?"
+        assert questions[0]['text'].startswith("1. Stub question 1?")
+        done = events[-1][1]
+        assert done['quiz']['questions'] == [data['question'] for data in questions]
+        saved = worker_database().quiz_results.find_one({"_id": ObjectId(done['quiz_id'])})
+        assert saved['username'] == 'reader' and saved['quiz']['summary'] == events[0][1]['summary']
+    assert stub.requests == 2
+    print("✓ summary, 5 questions, done")
+
+def test_stream_model_timeout():
+    """Models slower than the client timeout: the fallback quiz is streamed and saved instead"""
+    print("Testing model timeouts...")
+    story = fresh_story()
+    stub = StubInferenceServer(latency=2.0).start()
+    stack, app_module = fresh_worker()
+    with stack:
+        stub_backend(stack, stub)
+        client = quiz_pipeline.inference_client
+        stack.enter_context(patch.object(client, 'timeout', 0.2))
+        stack.enter_context(patch.object(client, 'budget', 0.3))
+        # The timeouts count against the breakers; do not leave them half-way to open
+        for breaker in (quiz_pipeline.summary_breaker, quiz_pipeline.quiz_breaker):
+            stack.callback(breaker.record_success)
+        started = time.perf_counter()
+        response = logged_in_client(app_module).post('/generate/stream', json={"text": story})
+        events = sse_events(response)
+        elapsed = time.perf_counter() - started
+
+        kinds = [event for event, _ in events]
+        assert kinds[0] == 'summary' and kinds[-1] == 'done' and 'error' not in kinds, kinds
+        assert kinds.count('summary') == 1 and kinds.count('question') == len(events[-1][1]['quiz']['questions'])
+        assert not any(data['question']['question'].startswith("Stub question")
+                       for event, data in events if event == 'question')
+        assert worker_database().quiz_results.count_documents({}) == 1
+    assert elapsed < 2.0, elapsed
+    print(f"✓ Fallback streamed after {elapsed:.2f}s")
+
+def test_stream_errors():
+    """A failure after the questions were sent ends the stream with an error event"""
+    print("Testing stream errors...")
+    for error in (DatabaseUnavailable("MongoDB is down"), RuntimeError("disk full")):
+        stack, app_module = fresh_worker()
+        with stack:
+            stack.enter_context(patch.dict(os.environ, {'HUGGINGFACE_API_KEY': ''}))
+            stack.enter_context(patch.object(app_module, 'save_quiz_result', side_effect=error))
+            response = logged_in_client(app_module).post('/generate/stream', json={"text": fresh_story()})
+            events = sse_events(response)
+        assert response.status_code == 200
+        assert events[0][0] == 'summary' and events[-1] == ('error', {"error": str(error)}), events
+        assert 'done' not in [event for event, _ in events]
+
+    stack, app_module = fresh_worker()
+    with stack:
+        assert logged_in_client(app_module).post('/generate/stream', json={"text": ""}).status_code == 400
+    print("✓ Error events sent")
+
+def test_page_streams_only_in_sync_mode():
+    """The page is told whether generations are queued, so it polls the job instead of streaming"""
+    print("Testing the page's generation mode...")
+    stack, app_module = fresh_worker()
+    with stack:
+        client = app_module.app.test_client()
+        for generate_async, expected in ((False, 'data-generate-async="false"'), (True, 'data-generate-async="true"')):
+            with patch.object(app_module, 'GENERATE_ASYNC', generate_async):
+                assert expected in client.get('/').get_data(as_text=True)
+    print("✓ Mode exposed to the page")
+
+if __name__ == "__main__":
+    test_stream_framing()
+    test_stream_model_timeout()
+    test_stream_errors()
+    test_page_streams_only_in_sync_mode()
+    print("✓ All generate stream tests passed!")
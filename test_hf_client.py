@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script to verify inference client retries against a local stub server
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import requests
+
+from hf_client import AsyncInferenceClient, InferenceClient
+
+def start_stub_server(cold_responses, delay=0.0):
+    """Serve `cold_responses` 503s with an estimated_time, then a summary, each after `delay` seconds"""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            calls.append(self.path)
+            time.sleep(delay)
+            if len(calls) <= cold_responses:
+                status, body = 503, {"error": "Model is loading", "estimated_time": 0.1}
+            else:
+                status, body = 200, [{"summary_text": "A short summary."}]
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/", calls
+
+def test_retries_cold_model():
+    """A 503 with estimated_time is retried until the model answers"""
+    print("Testing retry on cold model...")
+    server, url, calls = start_stub_server(cold_responses=2)
+    try:
+        response = InferenceClient(budget=5).post(url, json={"inputs": "story"})
+        assert response.status_code == 200
+        assert len(calls) == 3
+        print("✓ Cold model retried within budget")
+    finally:
+        server.shutdown()
+
+def test_budget_caps_retries():
+    """Retries stop once the latency budget would be exceeded"""
+    print("Testing latency budget...")
+    server, url, calls = start_stub_server(cold_responses=10)
+    try:
+        response = InferenceClient(budget=0.15).post(url, json={"inputs": "story"})
+        assert response.status_code == 503
+        assert len(calls) < 10
+        print(f"✓ Gave up after {len(calls)} attempts")
+    finally:
+        server.shutdown()
+
+def test_read_timeout_not_retried():
+    """A model slower than the timeout costs one timeout, not the whole retry budget"""
+    print("Testing read timeouts...")
+    server, url, calls = start_stub_server(cold_responses=0, delay=0.5)
+    try:
+        started = time.perf_counter()
+        try:
+            InferenceClient(timeout=0.2, budget=5).post(url, json={"inputs": "story"})
+            assert False, "expected a read timeout"
+        except requests.ReadTimeout:
+            pass
+        elapsed = time.perf_counter() - started
+
+        async def async_post():
+            client = AsyncInferenceClient(timeout=0.2, budget=5)
+            try:
+                await client.post(url, json={"inputs": "story"})
+            finally:
+                await client.aclose()
+        async_started = time.perf_counter()
+        try:
+            asyncio.run(async_post())
+            assert False, "expected a read timeout"
+        except httpx.ReadTimeout:
+            pass
+        async_elapsed = time.perf_counter() - async_started
+    finally:
+        server.shutdown()
+    assert len(calls) == 2, calls
+    assert elapsed < 0.45 and async_elapsed < 0.45, (elapsed, async_elapsed)
+    print(f"✓ Gave up after one timeout ({elapsed:.2f}s, async {async_elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    test_retries_cold_model()
+    test_budget_caps_retries()
+    test_read_timeout_not_retried()
+    print("✓ All inference client tests passed!")
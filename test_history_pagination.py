@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the profile's keyset pagination: cursors round-trip, malformed or
+tampered cursors are rejected, and pages keep a stable order when quizzes share a date
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+
+from mongomock_support import fresh_worker, logged_in_client, worker_database
+
+START = datetime(2025, 1, 6, 9, 0)
+
+def test_cursor_round_trip():
+    """A cursor decodes to the date (to the millisecond) and id it was made from"""
+    print("Testing cursor encoding...")
+    stack, app_module = fresh_worker()
+    with stack:
+        object_id = ObjectId()
+        for date in (START, START.replace(tzinfo=timezone.utc), START + timedelta(microseconds=123456)):
+            cursor = app_module.encode_history_cursor({"date": date, "_id": object_id})
+            assert cursor == f"1736154000{'123' if date.microsecond else '000'}_{object_id}", cursor
+            decoded_date, decoded_id = app_module.decode_history_cursor(cursor)
+            assert decoded_id == object_id
+            assert decoded_date == date.replace(tzinfo=timezone.utc, microsecond=date.microsecond // 1000 * 1000)
+    print("✓ Cursors round-trip")
+
+def test_invalid_cursors_rejected():
+    """Anything encode_history_cursor could not have produced decodes to None and redirects the profile"""
+    print("Testing invalid cursors...")
+    stack, app_module = fresh_worker()
+    with stack:
+        object_id = str(ObjectId())
+        for cursor in ("", "garbage", "1736154000000", f"abc_{object_id}", "1736154000000_not-an-id",
+                       f"1736154000000_{object_id.upper()}", f"+1736154000000_{object_id}",
+                       f"01736154000000_{object_id}", f" 1736154000000_{object_id}",
+                       f"1736154000000_{object_id}_", f"99999999999999999999_{object_id}"):
+            assert app_module.decode_history_cursor(cursor) is None, cursor
+
+        worker_database().users.insert_one({"username": "reader"})
+        client = logged_in_client(app_module)
+        rejected = client.get(f'/profile?before=1736154000000_{object_id.upper()}')
+        assert rejected.status_code == 302 and rejected.headers['Location'].endswith('/profile')
+        with client.session_transaction() as session:
+            assert session['_flashes'][0][0] == 'warning'
+        assert client.get(f'/profile?before=1736154000000_{object_id}').status_code == 200
+    print("✓ Invalid cursors rejected")
+
+def test_pages_are_stable():
+    """Every quiz is listed exactly once, newest first, even with equal dates and new quizzes mid-walk"""
+    print("Testing page order...")
+    stack, app_module = fresh_worker()
+    with stack:
+        db = worker_database()
+        # Groups of three quizzes share a timestamp, so only _id orders them
+        db.quiz_results.insert_many([{"username": "reader", "date": START + timedelta(minutes=i // 3), "score": i}
+                                     for i in range(23)])
+        db.quiz_results.insert_many([{"username": "other", "date": START, "score": 0} for _ in range(5)])
+        expected = [str(doc["_id"]) for doc in db.quiz_results.find({"username": "reader"})
+                    .sort([("date", -1), ("_id", -1)])]
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            results, cursor = app_module.quiz_history_page("reader", cursor, limit=5)
+            assert set(results[0]) == {"_id", "date", "score"}
+            seen += [result["_id"] for result in results]
+            pages += 1
+            if pages == 2:
+                # A quiz created while the user pages appears on the first page, not in the middle
+                db.quiz_results.insert_one({"username": "reader", "date": START + timedelta(days=1), "score": 0})
+            if cursor is None:
+                break
+        assert pages == 5 and seen == expected, seen
+    print(f"✓ {len(seen)} quizzes over {pages} pages")
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_invalid_cursors_rejected()
+    test_pages_are_stable()
+    print("✓ All history pagination tests passed!")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the generation job queue: atomic claims, lease expiry, abandoned
+jobs, and requests that arrive before the worker's background MongoDB connection is up
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mongomock
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+from mongomock_support import fresh_worker, logged_in_client, worker_database
+
+STORY = "The fox met a crow. The crow sang a song and dropped the cheese. The fox ate it and ran away."
+
+def test_job_routes_before_connect():
+    """Queueing and polling a job connect in the request instead of failing on a detached queue"""
+    print("Testing job routes before the background connect...")
+    stack, app_module = fresh_worker()
+    with stack:
+        client = logged_in_client(app_module)
+        queued = client.post('/generate', json={"text": STORY, "async": True})
+        assert queued.status_code == 202, queued.get_data(as_text=True)
+        job_id = queued.get_json()['job_id']
+        status = client.get(f'/jobs/{job_id}')
+        assert status.status_code == 200 and status.get_json()['status'] == 'queued'
+        assert client.get('/jobs/000000000000000000000000').status_code == 404
+        assert app_module.mail_outbox.enqueue("quiz@example.com", ["reader@example.com"], "Hi", "<p>Hi</p>")
+        # Index creation belongs to the gunicorn master, not to each worker's first connect
+        assert 'username_date_id' not in worker_database().quiz_results.index_information()
+    print("✓ Job queued and found")
+
+def test_job_routes_without_database():
+    """With MongoDB unreachable the job routes answer 503 with Retry-After, not 500"""
+    print("Testing job routes without MongoDB...")
+    stack, app_module = fresh_worker(uri=None)
+    with stack:
+        client = logged_in_client(app_module)
+        for response in (client.post('/generate', json={"text": STORY, "async": True}),
+                         client.get('/jobs/000000000000000000000000')):
+            assert response.status_code == 503, response.status_code
+            assert response.headers['Retry-After']
+    print("✓ 503 with Retry-After")
+
+def attached_queue(handler, **kwargs):
+    queue = JobQueue(handler, **kwargs)
+    queue.attach(mongomock.MongoClient()['queue_test'].generation_jobs)
+    return queue
+
+def expire_leases(queue):
+    """What a worker dying mid-job looks like once its lease has run out"""
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    queue.collection.update_many({"status": RUNNING}, {"$set": {"lease_expires": past}})
+
+class AtomicCollection:
+    """Runs each call on a mongomock collection under one lock.
+
+    MongoDB applies a find_one_and_update atomically; mongomock does not across
+    threads, so without this two claims could both read the same queued job.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if not callable(attribute):
+            return attribute
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return locked
+
+def test_concurrent_claims():
+    """Two workers draining one queue never run the same job"""
+    print("Testing concurrent claims...")
+    handled = []
+    # Each worker's first job waits for the other's, so both are claiming at the same time
+    both_running = threading.Barrier(2)
+    def handler(job):
+        name = threading.current_thread().name
+        first = name not in {worker for worker, _ in handled}
+        handled.append((name, job["payload"]["n"]))
+        if first:
+            both_running.wait(5)
+        return job["payload"]["n"]
+
+    queue = attached_queue(handler)
+    queue.collection = AtomicCollection(queue.collection)
+    for n in range(40):
+        queue.enqueue("reader", {"n": n})
+
+    def drain():
+        while queue.run_one():
+            pass
+    workers = [threading.Thread(target=drain, name=f"worker-{i}") for i in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(n for _, n in handled) == list(range(40)), handled
+    assert {name for name, _ in handled} == {"worker-0", "worker-1"}
+    assert queue.collection.count_documents({"status": DONE, "attempts": 1}) == 40
+    print("✓ Each job claimed once")
+
+def test_reclaim_after_lease_expiry():
+    """A job whose worker died is claimed again, but not while its lease is still running"""
+    print("Testing lease expiry...")
+    queue = attached_queue(lambda job: "ok", max_attempts=2)
+    job_id = queue.enqueue("reader", {})
+    first = queue.claim()
+    assert str(first["_id"]) == job_id and first["attempts"] == 1
+    assert queue.claim() is None
+
+    expire_leases(queue)
+    second = queue.claim()
+    assert second["_id"] == first["_id"] and second["attempts"] == 2 and second["status"] == RUNNING
+    print("✓ Expired lease re-claimed")
+
+def test_fail_abandoned():
+    """After the last attempt an expired job is failed rather than retried"""
+    print("Testing abandoned jobs...")
+    queue = attached_queue(lambda job: "ok", max_attempts=2)
+    first, second, waiting = (queue.enqueue("reader", {"n": n}) for n in range(3))
+    queue.claim()
+    queue.claim()
+    expire_leases(queue)
+    # Both are retried once, oldest first, ahead of the job still waiting
+    assert [str(queue.claim()["_id"]) for _ in range(2)] == [first, second]
+    expire_leases(queue)
+    # Out of attempts: the waiting job is claimed and the expired ones are not
+    assert str(queue.claim()["_id"]) == waiting
+    assert queue.claim() is None
+
+    queue.fail_abandoned()
+    for job_id in (first, second):
+        job = queue.get(job_id, "reader")
+        assert job["status"] == FAILED and job["error"] == "Job abandoned by worker", job
+        assert job["attempts"] == 2 and "lease_expires" not in job and job["finished_at"]
+    # Not expired yet, so not failed
+    assert queue.get(waiting, "reader")["status"] == RUNNING
+    assert queue.collection.count_documents({"status": QUEUED}) == 0
+    print("✓ Abandoned jobs failed")
+
+if __name__ == "__main__":
+    test_job_routes_before_connect()
+    test_job_routes_without_database()
+    test_concurrent_claims()
+    test_reclaim_after_lease_expiry()
+    test_fail_abandoned()
+    print("✓ All job queue tests passed!")
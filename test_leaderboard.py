@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the daily rollups, the period leaderboards and the rollup rebuild
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mongomock
+
+import leaderboard
+from mongomock_support import fresh_worker, logged_in_client, worker_database
+from leaderboard import IST, activity, ist_day, rebuild, record_daily_quiz, record_daily_score, top_players
+
+# Noon IST on a Wednesday; naive datetimes below are UTC, as MongoDB returns them
+NOW = datetime(2025, 1, 8, 12, 0, tzinfo=IST)
+TODAY = datetime(2025, 1, 8, 5, 0)
+
+def rollup(db, username, day):
+    return db.daily_rollups.find_one({"username": username, "day": day},
+                                     {"_id": 0, "quizzes": 1, "completed": 1, "points": 1})
+
+def test_daily_rollups():
+    """Quizzes and scores land in the IST day the quiz was generated; re-scores add the difference"""
+    print("Testing daily rollups...")
+    db = mongomock.MongoClient()['leaderboard_test']
+    # 20:00 UTC is already the next day in IST
+    late = datetime(2025, 1, 7, 20, 0)
+    assert ist_day(late) == '2025-01-08' and ist_day(datetime(2025, 1, 7, 18, 0)) == '2025-01-07'
+
+    record_daily_quiz(db, "ana", late)
+    record_daily_quiz(db, "ana", TODAY, count=2)
+    record_daily_score(db, "ana", late, 60)
+    record_daily_score(db, "ana", TODAY, 40)
+    assert rollup(db, "ana", '2025-01-08') == {"quizzes": 3, "completed": 2, "points": 100}
+
+    record_daily_score(db, "ana", late, 90, old_score=60)
+    record_daily_score(db, "ana", TODAY, 10, old_score=40)
+    assert rollup(db, "ana", '2025-01-08') == {"quizzes": 3, "completed": 2, "points": 100}
+    assert db.daily_rollups.count_documents({}) == 1
+    print("✓ IST buckets and re-score deltas")
+
+def test_top_players():
+    """A period ranks the heap's top ``limit`` by points, then completed; 'all' reads user_stats"""
+    print("Testing top players...")
+    db = mongomock.MongoClient()['leaderboard_test']
+    for i in range(12):
+        username = f"user{i:02d}"
+        record_daily_quiz(db, username, TODAY)
+        record_daily_score(db, username, TODAY, 10 * i)
+    # Points spread over several days of the week add up; older days fall outside it
+    record_daily_quiz(db, "veteran", TODAY - timedelta(days=6), count=2)
+    record_daily_score(db, "veteran", TODAY - timedelta(days=6), 70)
+    record_daily_score(db, "veteran", TODAY - timedelta(days=3), 60)
+    record_daily_score(db, "veteran", TODAY - timedelta(days=7), 500)
+    # Generated but never completed: not on the board
+    record_daily_quiz(db, "lurker", TODAY, count=5)
+    # Same points as user11, more quizzes completed
+    record_daily_score(db, "tied", TODAY, 55)
+    record_daily_score(db, "tied", TODAY, 55)
+
+    week = top_players(db, 'week', limit=3, now=NOW)
+    assert week == [{"username": "veteran", "points": 130, "completed": 2},
+                    {"username": "tied", "points": 110, "completed": 2},
+                    {"username": "user11", "points": 110, "completed": 1}], week
+    day = top_players(db, 'day', limit=20, now=NOW)
+    assert [row["username"] for row in day][:2] == ["tied", "user11"]
+    assert "veteran" not in [row["username"] for row in day] and len(day) == 13
+    assert top_players(db, 'month', limit=1, now=NOW)[0] == {"username": "veteran", "points": 630, "completed": 3}
+
+    db.user_stats.insert_many([
+        {"username": "ana", "score_sum": 300, "completed_count": 4},
+        {"username": "ben", "score_sum": 300, "completed_count": 5},
+        {"username": "cy", "score_sum": 0, "completed_count": 0},
+        {"username": "dee", "score_sum": 120, "completed_count": 2},
+    ])
+    assert top_players(db, 'all', limit=2) == [{"username": "ben", "points": 300, "completed": 5},
+                                               {"username": "ana", "points": 300, "completed": 4}]
+    assert [row["username"] for row in top_players(db, 'all')] == ["ben", "ana", "dee"]
+    print("✓ Period and all-time rankings")
+
+def test_activity():
+    """Every day of the window is present, oldest first, with zeros for quiet days"""
+    print("Testing activity...")
+    db = mongomock.MongoClient()['leaderboard_test']
+    record_daily_quiz(db, "ana", TODAY, count=2)
+    record_daily_score(db, "ana", TODAY, 80)
+    record_daily_quiz(db, "ben", TODAY)
+    record_daily_quiz(db, "ben", TODAY - timedelta(days=2))
+    record_daily_quiz(db, "ben", TODAY - timedelta(days=5))
+
+    series = activity(db, days=3, now=NOW)
+    assert [row["day"] for row in series] == ['2025-01-06', '2025-01-07', '2025-01-08']
+    assert series[0] == {"day": '2025-01-06', "quizzes": 1, "completed": 0, "points": 0, "active_users": 1}
+    assert series[1] == {"day": '2025-01-07', "quizzes": 0, "completed": 0, "points": 0, "active_users": 0}
+    assert series[2] == {"day": '2025-01-08', "quizzes": 3, "completed": 1, "points": 80, "active_users": 2}
+    print("✓ Activity series")
+
+def python_rollups(db):
+    """What the rebuild pipeline computes; mongomock has no $dateToString timezone"""
+    rows = {}
+    for doc in db.quiz_results.find():
+        key = (ist_day(doc["date"]), doc["username"])
+        row = rows.setdefault(key, {"_id": {"day": key[0], "username": key[1]},
+                                    "quizzes": 0, "completed": 0, "points": 0})
+        row["quizzes"] += 1
+        if doc.get("score") is not None:
+            row["completed"] += 1
+            row["points"] += doc["score"]
+    return list(rows.values())
+
+def test_rebuild_in_place():
+    """Rebuild fixes drifted rows without removing them first and drops rows with no quizzes left"""
+    print("Testing rebuild...")
+    db = mongomock.MongoClient()['leaderboard_test']
+    for username, when, score in (("ana", TODAY, 70), ("ana", TODAY, None), ("ben", TODAY - timedelta(days=1), 50)):
+        db.quiz_results.insert_one({"username": username, "date": when, "score": score})
+        record_daily_quiz(db, username, when)
+        if score is not None:
+            record_daily_score(db, username, when, score)
+    expected = {(doc["day"], doc["username"]): doc for doc in db.daily_rollups.find()}
+    ana_id = expected[('2025-01-08', "ana")]["_id"]
+
+    # Drift: a lost increment, and a row whose quizzes were deleted
+    db.daily_rollups.update_one({"_id": ana_id}, {"$inc": {"points": -70, "completed": -1}})
+    db.daily_rollups.insert_one({"day": '2025-01-01', "username": "gone", "quizzes": 4, "completed": 0, "points": 0})
+
+    deletes = []
+    original_delete_many = db.daily_rollups.delete_many
+    def delete_many(query):
+        # Only stale ids are ever deleted; the board is never emptied
+        assert query != {}
+        deletes.append(query)
+        return original_delete_many(query)
+
+    with patch.object(leaderboard, '_aggregate_rollups', python_rollups), \
+            patch.object(db.daily_rollups, 'delete_many', delete_many):
+        assert rebuild(db) == 2
+    rebuilt = {(doc["day"], doc["username"]): doc for doc in db.daily_rollups.find()}
+    assert rebuilt == expected, rebuilt
+    assert rebuilt[('2025-01-08', "ana")]["_id"] == ana_id
+    assert len(deletes) == 1
+
+    # Nothing stale: no delete at all
+    deletes.clear()
+    with patch.object(leaderboard, '_aggregate_rollups', python_rollups), \
+            patch.object(db.daily_rollups, 'delete_many', delete_many):
+        assert rebuild(db) == 2
+    assert not deletes
+    print("✓ Rollups rebuilt in place")
+
+def test_routes_need_login():
+    """Usernames and scores are only shown to signed-in users, and never cached by shared proxies"""
+    print("Testing leaderboard routes...")
+    stack, app_module = fresh_worker()
+    with stack:
+        worker_database().user_stats.insert_one({"username": "ana", "score_sum": 9, "completed_count": 2})
+        anonymous = app_module.app.test_client()
+        for path in ('/leaderboard', '/analytics/activity'):
+            response = anonymous.get(path)
+            assert response.status_code == 302 and '/login' in response.headers['Location'], path
+        client = logged_in_client(app_module)
+        board = client.get('/leaderboard?limit=5')
+        assert board.status_code == 200 and board.headers['Cache-Control'].startswith('private')
+        assert board.get_json()['players'] == [{"username": "ana", "points": 9, "completed": 2}]
+        assert len(client.get('/analytics/activity?days=7').get_json()['days']) == 7
+    print("✓ Login required")
+
+if __name__ == "__main__":
+    test_daily_rollups()
+    test_top_players()
+    test_activity()
+    test_rebuild_in_place()
+    test_routes_need_login()
+    print("✓ All leaderboard tests passed!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the mail outbox: SMTP connection reuse, retries and dead-lettering
+"""
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mail_outbox import DEAD, QUEUED, SENT, MailOutbox, SMTPTransport, is_permanent
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; counts connections and received messages"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 test ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command in ("EHLO", "HELO"):
+                self.reply("250-test")
+                self.reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                self.reply("235 authenticated")
+            elif command == "RCPT" and "refused" in line:
+                self.reply("550 no such user")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+                if self.server.messages == self.server.drop_after:
+                    # Like a server closing an idle connection
+                    return
+            else:
+                self.reply("250 ok")
+
+def start_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = 0
+    server.drop_after = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class FakeCollection:
+    """Records the status each message ends up in"""
+
+    def __init__(self):
+        self.updates = {}
+
+    def update_one(self, query, update):
+        self.updates[query["_id"]] = update["$set"]
+
+def message(i, to="reader@example.com", attempts=1):
+    return {"_id": i, "sender": "quiz@example.com", "recipients": [to], "subject": f"Message {i}",
+            "html": "<p>Hello</p>", "attempts": attempts}
+
+def test_batch_reuses_one_connection():
+    """A batch goes out over a single SMTP connection"""
+    print("Testing SMTP connection reuse...")
+    server = start_server()
+    outbox = MailOutbox(lambda: None)
+    outbox.collection = FakeCollection()
+    transport = SMTPTransport("127.0.0.1", server.server_address[1], use_tls=False)
+    assert outbox.send_batch(transport, [message(i) for i in range(5)]) == 5
+    assert outbox.send_batch(transport, [message(i) for i in range(5, 8)]) == 3
+    transport.close()
+    assert server.messages == 8 and server.connections == 1
+    assert all(update["status"] == SENT for update in outbox.collection.updates.values())
+    server.shutdown()
+    print("✓ 8 messages, 1 connection")
+
+def test_failures_retry_or_dead_letter():
+    """Refused recipients are dead-lettered at once; temporary errors back off until max_attempts"""
+    print("Testing retries and dead letters...")
+    server = start_server()
+    outbox = MailOutbox(lambda: None, max_attempts=3, retry_base=30)
+    outbox.collection = FakeCollection()
+    transport = SMTPTransport("127.0.0.1", server.server_address[1], use_tls=False)
+    sent = outbox.send_batch(transport, [message(1), message(2, to="refused@example.com"), message(3)])
+    transport.close()
+    assert sent == 2
+    assert outbox.collection.updates[2]["status"] == DEAD
+    # The refusal is an SMTP answer, not a dropped connection: no reconnect
+    assert server.connections == 1
+
+    temporary = smtplib.SMTPResponseException(421, "try later")
+    assert not is_permanent(temporary) and is_permanent(smtplib.SMTPResponseException(554, "rejected"))
+    outbox._mark_failed(message(4, attempts=1), temporary)
+    assert outbox.collection.updates[4]["status"] == QUEUED
+    outbox._mark_failed(message(5, attempts=3), temporary)
+    assert outbox.collection.updates[5]["status"] == DEAD
+    server.shutdown()
+    print("✓ Retries and dead letters work")
+
+def test_dropped_connection_reconnects():
+    """A connection the server closed is reopened once and the message still goes out"""
+    print("Testing reconnect...")
+    server = start_server()
+    server.drop_after = 2
+    outbox = MailOutbox(lambda: None)
+    outbox.collection = FakeCollection()
+    transport = SMTPTransport("127.0.0.1", server.server_address[1], use_tls=False)
+    assert outbox.send_batch(transport, [message(i) for i in range(4)]) == 4
+    transport.close()
+    assert server.messages == 4 and server.connections == 2
+    server.shutdown()
+    print("✓ Reconnected after the server hung up")
+
+if __name__ == "__main__":
+    test_batch_reuses_one_connection()
+    test_failures_retry_or_dead_letter()
+    test_dropped_connection_reconnects()
+    print("✓ All mail outbox tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script to verify password hashing, rehash detection and backpressure
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from password_hasher import HasherBusy, PasswordHasher, hash_rounds
+
+def test_hash_and_check():
+    """Hashes verify, wrong passwords and non-bcrypt strings do not"""
+    print("Testing hash and check...")
+    hasher = PasswordHasher(rounds=4, workers=0)
+    hashed = hasher.hash("secret")
+    assert hasher.check(hashed, "secret")
+    assert not hasher.check(hashed, "Secret")
+    assert not hasher.check("not-a-hash", "secret")
+    # bcrypt reads 72 bytes; longer passwords are truncated rather than rejected
+    long_hash = hasher.hash("x" * 100)
+    assert hasher.check(long_hash, "x" * 72)
+    print("✓ Hash and check work")
+
+def test_rehash_detection():
+    """A hash made with another work factor needs upgrading"""
+    print("Testing rehash detection...")
+    hashed = PasswordHasher(rounds=4, workers=0).hash("secret")
+    assert hash_rounds(hashed) == 4
+    assert not PasswordHasher(rounds=4).needs_rehash(hashed)
+    assert PasswordHasher(rounds=5).needs_rehash(hashed)
+    print("✓ Work factor changes are detected")
+
+def test_backpressure():
+    """Calls beyond max_pending are rejected immediately instead of queueing"""
+    print("Testing backpressure...")
+    hasher = PasswordHasher(rounds=4, workers=0, max_pending=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_check(*args):
+        started.set()
+        release.wait(5)
+        return True
+
+    thread = threading.Thread(target=hasher._run, args=(slow_check,))
+    thread.start()
+    started.wait(5)
+    try:
+        hasher.hash("secret")
+        assert False, "expected HasherBusy"
+    except HasherBusy:
+        pass
+    release.set()
+    thread.join()
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["pending"] == 0
+    print("✓ Saturated pool rejects new work")
+
+def test_timeout_keeps_its_slot():
+    """A hash that times out still counts as pending until the pool finishes it, and is not counted as completed"""
+    print("Testing hash timeouts...")
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1, timeout=0.05)
+    # A thread pool stands in for the process pool, so the stuck job can be released
+    hasher._pool, hasher._pool_pid = ThreadPoolExecutor(max_workers=1), os.getpid()
+    release = threading.Event()
+    try:
+        hasher._run(release.wait, 5)
+        assert False, "expected HasherBusy"
+    except HasherBusy:
+        pass
+    stats = hasher.stats()
+    assert stats["timed_out"] == 1 and stats["completed"] == 0 and stats["pending"] == 1, stats
+    # The job is still running, so its slot is not handed out again
+    try:
+        hasher.hash("secret")
+        assert False, "expected HasherBusy"
+    except HasherBusy:
+        pass
+    assert hasher.stats()["rejected"] == 1
+
+    release.set()
+    hasher._pool.shutdown(wait=True)
+    stats = hasher.stats()
+    assert stats["pending"] == 0 and stats["completed"] == 1 and stats["timed_out"] == 1, stats
+    print("✓ Timed-out hash held its slot until it finished")
+
+if __name__ == "__main__":
+    test_hash_and_check()
+    test_rehash_detection()
+    test_backpressure()
+    test_timeout_keeps_its_slot()
+    print("✓ All password hasher tests passed!")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the structured quiz model
+"""
+import os
+import sys
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from quiz_model import grade, make_question, make_quiz, parse_quiz_text, quiz_from_parsed, render_quiz_text
+
+QUIZ = make_quiz("Alice follows a rabbit.", [
+    make_question("Who is the main character?", ["Bob", "Alice", "The Queen", "A cat"], 1),
+    make_question("What does she follow?", ["A rabbit", "A dog", "A bird", "A river"], 0),
+])
+
+def test_text_round_trip():
+    """Rendering to the legacy SUMMARY/QUIZ text and parsing it back gives the same quiz"""
+    print("Testing legacy text round trip...")
+    text = render_quiz_text(QUIZ)
+    assert text.startswith("SUMMARY:\nAlice follows a rabbit.\n\nQUIZ:\n1. Who is the main character?\n")
+    assert "   B) Alice\n   C) The Queen\n   D) A cat\n   Correct: B" in text
+    assert parse_quiz_text(text) == QUIZ
+    print("✓ Text rendering round-trips")
+
+def test_model_output_is_normalized():
+    """Numbering and option letters from the model parser are stripped"""
+    print("Testing model output conversion...")
+    parsed = [{'question': '1. Who is the main character?',
+               'options': ['A) Bob', 'B) Alice', 'C) The Queen', 'D) A cat'], 'correct': 'B'}]
+    quiz = quiz_from_parsed("Alice follows a rabbit.", parsed)
+    assert quiz['questions'][0] == QUIZ['questions'][0]
+    print("✓ Model questions converted")
+
+def test_grading():
+    """Answers are graded by index or letter; missing and malformed answers are wrong"""
+    print("Testing server-side grading...")
+    assert grade(QUIZ, [1, 0]) == (2, [True, True])
+    assert grade(QUIZ, ['b', 'C']) == (1, [True, False])
+    assert grade(QUIZ, [True]) == (0, [False, False])
+    print("✓ Grading works")
+
+if __name__ == "__main__":
+    test_text_round_trip()
+    test_model_output_is_normalized()
+    test_grading()
+    print("✓ All quiz model tests passed!")
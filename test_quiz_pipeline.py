@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the pipeline imports without the web app, the batch CLI keeps input order
+and the summary and quiz model calls run side by side
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import quiz_pipeline
+from stub_inference_server import StubInferenceServer
+
+STORY = """Once upon a time a clever fox lived in a quiet forest. One morning he saw a crow
+sitting on a branch with a piece of cheese. The fox praised the crow's beautiful voice.
+The proud crow began to sing and dropped the cheese. The fox ran away with it, and the
+crow learned not to trust flattery."""
+
+def test_pipeline_import_is_standalone():
+    """Importing the pipeline pulls in neither Flask nor a MongoDB client"""
+    print("Testing standalone import...")
+    # A fresh interpreter, since other tests may already have imported the app
+    check = "import sys, quiz_pipeline; print(sorted({'app', 'flask', 'flask_pymongo'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+    print("✓ No web stack imported")
+
+def test_read_stories():
+    """JSONL lines keep their keys; plain text files become one story each"""
+    print("Testing story readers...")
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl = os.path.join(directory, "stories.jsonl")
+        with open(jsonl, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "a", "text": STORY}) + "\n\n" + json.dumps({"id": "b", "text": STORY}) + "\n")
+        text = os.path.join(directory, "fox.txt")
+        with open(text, "w", encoding="utf-8") as f:
+            f.write(STORY)
+        records = list(quiz_pipeline.read_stories([jsonl, text]))
+    assert [record.get('id') for record in records] == ["a", "b", None]
+    assert records[1]['source'].endswith("stories.jsonl:3")
+    assert records[2]['text'] == STORY
+    print("✓ JSONL and text files read")
+
+def test_run_batch_keeps_order():
+    """Quizzes come back as JSONL in input order; empty stories are reported, not fatal"""
+    print("Testing batch runner...")
+    records = [{"id": i, "text": STORY if i != 2 else ""} for i in range(6)]
+    output = io.StringIO()
+    # Rule-based quizzes only: no network
+    with patch.dict(os.environ, {'HUGGINGFACE_API_KEY': ''}):
+        written, errors = quiz_pipeline.run_batch(records, output, processes=2, chunksize=1)
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (written, errors) == (5, 1)
+    assert [row['id'] for row in rows] == list(range(6))
+    assert 'error' in rows[2] and 'text' not in rows[0]
+    assert rows[0]['quiz']['questions'] and rows[0]['quiz']['version'] == 1
+    print(f"✓ {written} quizzes in order")
+
+def stub_backend(stack, stub):
+    """Point the pipeline at the stub server, with a key so the models are called"""
+    stack.enter_context(patch.dict(os.environ, {'HUGGINGFACE_API_KEY': 'test-key'}))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_API_URL', f"{stub.url}/models/bart"))
+    stack.enter_context(patch.object(quiz_pipeline, 'HUGGINGFACE_QA_URL', f"{stub.url}/models/flan-t5"))
+    stack.callback(stub.stop)
+
+def timed_model_calls(concurrent):
+    stub = StubInferenceServer(latency=0.5).start()
+    with ExitStack() as stack:
+        stub_backend(stack, stub)
+        stack.enter_context(patch.object(quiz_pipeline, 'HF_CONCURRENT_CALLS', concurrent))
+        started = time.perf_counter()
+        summary, questions, timings = quiz_pipeline._run_model_calls(f"Timed at {started}. {STORY}")
+        elapsed = time.perf_counter() - started
+    assert summary and len(questions) == 5 and stub.requests == 2
+    assert set(timings) == {'summary', 'quiz'} and min(timings.values()) >= 500, timings
+    return elapsed
+
+def test_model_calls_overlap():
+    """With concurrent calls the summary and quiz requests wait out the latency together"""
+    print("Testing concurrent model calls...")
+    concurrent = timed_model_calls(True)
+    sequential = timed_model_calls(False)
+    assert concurrent < 0.8, concurrent
+    assert sequential >= 1.0, sequential
+    print(f"✓ {concurrent:.2f}s side by side, {sequential:.2f}s one after the other")
+
+def test_empty_result_stops_waiting():
+    """An empty summary means the fallback anyway, so the slow quiz call is not waited for"""
+    print("Testing early cancel...")
+    release = threading.Event()
+    quiz_calls = []
+    def slow_quiz(story_text):
+        quiz_calls.append(story_text)
+        release.wait(5)
+        return []
+
+    with patch.dict(os.environ, {'HUGGINGFACE_API_KEY': 'test-key'}), \
+            patch.object(quiz_pipeline, 'request_summary', lambda story_text: ''), \
+            patch.object(quiz_pipeline, 'request_quiz', slow_quiz):
+        try:
+            started = time.perf_counter()
+            summary, questions, timings = quiz_pipeline._run_model_calls(STORY)
+            elapsed = time.perf_counter() - started
+        finally:
+            release.set()
+        # The sequential path does not even start the quiz call
+        quiz_calls.clear()
+        with patch.object(quiz_pipeline, 'HF_CONCURRENT_CALLS', False):
+            assert quiz_pipeline._run_model_calls(STORY)[2] == {'summary': 0}
+        assert not quiz_calls
+    assert (summary, questions) == ('', [])
+    assert timings == {'summary': 0, 'quiz': 'cancelled'}, timings
+    assert elapsed < 0.5, elapsed
+    print(f"✓ Returned after {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_pipeline_import_is_standalone()
+    test_read_stories()
+    test_run_batch_keeps_order()
+    test_model_calls_overlap()
+    test_empty_result_stops_waiting()
+    print("✓ All pipeline tests passed!")
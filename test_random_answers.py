@@ -8,10 +8,10 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Import the generate function from app
+# Import the generate function from the pipeline (no web app or database needed)
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from app import generate_free_response
+from quiz_pipeline import generate_free_response
 
 # Test story
 test_story = """
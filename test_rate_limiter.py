@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared token-bucket rate limiter and negative cache
+"""
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bcrypt
+
+from mongomock_support import fresh_worker, worker_database
+from rate_limiter import NegativeCache, TokenBucketLimiter, _fingerprint
+
+def test_bucket_limits_and_refills():
+    """A key gets `burst` calls at once, then one per 1/rate seconds; keys are independent"""
+    print("Testing token bucket...")
+    limiter = TokenBucketLimiter('test', rate=20, burst=3)
+    assert all(limiter.consume('1.2.3.4')[0] for _ in range(3))
+    allowed, retry_after = limiter.consume('1.2.3.4')
+    assert not allowed and 0 < retry_after <= 0.05
+    assert limiter.consume('5.6.7.8')[0]
+    time.sleep(0.06)
+    assert limiter.consume('1.2.3.4')[0]
+    assert not limiter.consume('1.2.3.4')[0]
+    limiter.refund('1.2.3.4')
+    assert limiter.consume('1.2.3.4')[0]
+    print("✓ Buckets limit, refill and take refunds")
+
+def test_collisions_share_a_bucket():
+    """A key landing on another key's slot draws from the same tokens instead of resetting them"""
+    print("Testing slot collisions...")
+    limiter = TokenBucketLimiter('tiny', rate=0.01, burst=3, slots=1)
+    assert all(limiter.consume('victim')[0] for _ in range(3))
+    # Every key collides in a one-slot table; none of them gets a fresh bucket
+    assert not limiter.consume('attacker')[0]
+    assert not limiter.consume('victim')[0]
+    # Slots come from a hash keyed per table, so collisions cannot be worked out in advance
+    a, b = TokenBucketLimiter('a', 1, 1), TokenBucketLimiter('b', 1, 1)
+    assert a._secret != b._secret
+    assert [_fingerprint(f"user{i}", a._secret)[0] % 4096 for i in range(8)] != \
+        [_fingerprint(f"user{i}", b._secret)[0] % 4096 for i in range(8)]
+    print("✓ Collisions share tokens")
+
+def _drain(limiter):
+    while limiter.consume('attacker')[0]:
+        pass
+
+def test_buckets_shared_across_forked_workers():
+    """Tokens used in a forked worker are gone for the parent too"""
+    print("Testing shared state across processes...")
+    limiter = TokenBucketLimiter('shared', rate=0.01, burst=5)
+    child = multiprocessing.get_context('fork').Process(target=_drain, args=(limiter,))
+    child.start()
+    child.join()
+    assert not limiter.consume('attacker')[0]
+    print("✓ Bucket drained by another process")
+
+def test_negative_cache():
+    """Unknown keys are remembered for ttl seconds and can be forgotten early"""
+    print("Testing negative cache...")
+    cache = NegativeCache(ttl=0.05)
+    cache.add('ghost')
+    assert 'ghost' in cache and 'someone' not in cache
+    cache.discard('ghost')
+    assert 'ghost' not in cache
+    cache.add('ghost')
+    time.sleep(0.06)
+    assert 'ghost' not in cache
+    print("✓ Negative cache works")
+
+def test_classroom_behind_one_address():
+    """A whole class logging in from one NAT address is never throttled; wrong passwords from it are"""
+    print("Testing logins from one address...")
+    stack, app_module = fresh_worker()
+    with stack:
+        stack.enter_context(patch.object(app_module, 'TRUST_PROXY_HEADERS', True))
+        # Cheap hashes, checked on the request thread
+        stack.enter_context(patch.object(app_module.password_hasher, 'workers', 0))
+        stack.enter_context(patch.object(app_module.password_hasher, 'rounds', 4))
+        hashed = bcrypt.hashpw(b"classpass", bcrypt.gensalt(4)).decode('utf-8')
+        students = [f"student{i}" for i in range(3 * app_module.auth_ip_limiter.burst)]
+        worker_database().users.insert_many([{"username": name, "password": hashed} for name in students])
+        school = {'X-Forwarded-For': f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.1"}
+
+        for name in students:
+            client = app_module.app.test_client()
+            response = client.post('/login', data={"username": name, "password": "classpass"}, headers=school)
+            assert response.status_code == 302, (name, response.status_code)
+
+        statuses = [app_module.app.test_client().post('/login', headers=school, data={
+            "username": students[i % len(students)], "password": "wrong"}).status_code
+            for i in range(app_module.auth_ip_limiter.burst + 1)]
+    assert statuses[-1] == 429 and 429 not in statuses[:5]
+    print(f"✓ {len(students)} logins from one address, failures still throttled")
+
+def test_parallel_burst_is_charged_up_front():
+    """Concurrent wrong passwords for one username: no more password checks than the burst"""
+    print("Testing a parallel burst...")
+    stack, app_module = fresh_worker()
+    with stack:
+        checks = []
+        def slow_wrong_password(hashed, password):
+            checks.append(password)
+            time.sleep(0.2)
+            return False
+        stack.enter_context(patch.object(app_module.password_hasher, 'check', slow_wrong_password))
+        worker_database().users.insert_one({"username": "victim", "password": "hash"})
+        statuses = []
+        def attempt(i):
+            client = app_module.app.test_client()
+            statuses.append(client.post('/login', data={"username": "victim", "password": f"guess{i}"},
+                                        environ_base={'REMOTE_ADDR': f"10.9.{i}.1"}).status_code)
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    burst = app_module.login_user_limiter.burst
+    assert len(checks) <= burst, len(checks)
+    assert statuses.count(429) >= 20 - burst, statuses
+    print(f"✓ {len(checks)} of 20 parallel guesses reached bcrypt")
+
+def test_forwarded_for_needs_a_trusted_proxy():
+    """Without TRUST_PROXY_HEADERS a client cannot pick its own address with X-Forwarded-For"""
+    print("Testing X-Forwarded-For handling...")
+    stack, app_module = fresh_worker()
+    with stack:
+        spoofed = {'X-Forwarded-For': '203.0.113.7'}
+        with app_module.app.test_request_context(headers=spoofed, environ_base={'REMOTE_ADDR': '10.0.0.5'}):
+            assert app_module.client_ip() == '10.0.0.5'
+            with patch.object(app_module, 'TRUST_PROXY_HEADERS', True):
+                assert app_module.client_ip() == '203.0.113.7'
+    print("✓ Header only trusted behind the proxy")
+
+if __name__ == "__main__":
+    test_bucket_limits_and_refills()
+    test_collisions_share_a_bucket()
+    test_buckets_shared_across_forked_workers()
+    test_negative_cache()
+    test_classroom_behind_one_address()
+    test_parallel_burst_is_charged_up_front()
+    test_forwarded_for_needs_a_trusted_proxy()
+    print("✓ All rate limiter tests passed!")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the generated-quiz result cache
+"""
+import os
+import sys
+import time
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import ResultCache, make_cache_key
+
+def test_cache_key_ignores_whitespace():
+    """Stories differing only in whitespace share a key, other versions do not"""
+    print("Testing cache key normalization...")
+    key = make_cache_key("Alice  found a\n rabbit hole.", "v1")
+    assert key == make_cache_key("  Alice found a rabbit hole.  ", "v1")
+    assert key != make_cache_key("Alice found a rabbit hole.", "v2")
+    assert key != make_cache_key("Bob found a rabbit hole.", "v1")
+    print("✓ Cache keys are content-addressed")
+
+def test_lru_and_ttl():
+    """Least recently used entries are evicted and expired entries are misses"""
+    print("Testing LRU eviction and TTL...")
+    cache = ResultCache(maxsize=2, ttl=60)
+    cache.set("a", {"result": 1})
+    cache.set("b", {"result": 2})
+    assert cache.get("a") == {"result": 1}
+    cache.set("c", {"result": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    short = ResultCache(maxsize=2, ttl=0.01)
+    short.set("a", {"result": 1})
+    time.sleep(0.02)
+    assert short.get("a") is None
+
+    stats = cache.stats()
+    assert stats["local_hits"] == 2 and stats["misses"] == 1
+    print(f"✓ Cache stats: {stats}")
+
+if __name__ == "__main__":
+    test_cache_key_ignores_whitespace()
+    test_lru_and_ttl()
+    print("✓ All result cache tests passed!")
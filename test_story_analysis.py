@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the tokenize-once story analysis
+"""
+import os
+import sys
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from story_analysis import StoryAnalysis, PLOT_VERBS, LESSON_WORDS
+
+def test_whole_word_matching():
+    """Keywords match whole tokens only ("met" is not found inside "metal")"""
+    print("Testing whole-word matching...")
+    analysis = StoryAnalysis("The knight found a metal shield. He learned to be brave.")
+    assert analysis.found(PLOT_VERBS) == ['found']
+    assert not analysis.has('met')
+    assert analysis.has_any(LESSON_WORDS)
+    print("✓ Lexicon lookups use whole tokens")
+
+def test_sentence_spans():
+    """Sentences match split('.') and map onto their own tokens"""
+    print("Testing sentence spans...")
+    story = 'Alice went home. ... She said, "Hello!" . The end'
+    analysis = StoryAnalysis(story)
+    assert analysis.sentences == [s.strip() for s in story.split('.') if s.strip()]
+    assert analysis.sentence_tokens(0) == ['alice', 'went', 'home']
+    assert analysis.sentence_tokens(1) == ['she', 'said', 'hello']
+    assert analysis.sentence_has_action(0) and not analysis.sentence_has_action(2)
+    assert analysis.token_counts['the'] == 1
+    print("✓ Sentence spans line up with sentences")
+
+if __name__ == "__main__":
+    test_whole_word_matching()
+    test_sentence_spans()
+    print("✓ All story analysis tests passed!")
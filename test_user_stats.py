@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the incremental user statistics agree with a rebuild from history
+and that /save_score keeps impossible scores out of them
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mongomock
+
+from mongomock_support import fresh_worker, logged_in_client, worker_database
+from user_stats import get_user_stats, rebuild, record_quiz_created, record_score
+
+START = datetime(2025, 1, 6, 9, 0)
+
+def create_quizzes(db, username, count):
+    """Save ``count`` quizzes the way save_quiz_result does; returns their ids"""
+    ids = []
+    for i in range(count):
+        when = START + timedelta(minutes=i)
+        ids.append(db.quiz_results.insert_one({"username": username, "date": when}).inserted_id)
+        record_quiz_created(db, username, when)
+    return ids
+
+def totals(db, username):
+    stats = get_user_stats(db, username)
+    return {key: stats.get(key) for key in ("quiz_count", "completed_count", "score_sum", "best_score")}
+
+def test_scores_and_rescores():
+    """First score counts once; re-scores only move the sum by the difference; a lower one recomputes best"""
+    print("Testing score updates...")
+    db = mongomock.MongoClient()['stats_test']
+    first, second = create_quizzes(db, "ana", 2)
+    assert totals(db, "ana") == {"quiz_count": 2, "completed_count": 0, "score_sum": 0, "best_score": None}
+
+    previous = record_score(db, "ana", first, 60, START + timedelta(hours=1))
+    assert previous["_id"] == first and previous.get("score") is None
+    assert totals(db, "ana") == {"quiz_count": 2, "completed_count": 1, "score_sum": 60, "best_score": 60}
+
+    record_score(db, "ana", first, 80, START + timedelta(hours=2))
+    assert totals(db, "ana") == {"quiz_count": 2, "completed_count": 1, "score_sum": 80, "best_score": 80}
+
+    record_score(db, "ana", second, 70, START + timedelta(hours=3))
+    assert totals(db, "ana") == {"quiz_count": 2, "completed_count": 2, "score_sum": 150, "best_score": 80}
+
+    # The best score goes down: $max cannot lower it, so it is recomputed
+    record_score(db, "ana", first, 50, START + timedelta(hours=4))
+    assert totals(db, "ana") == {"quiz_count": 2, "completed_count": 2, "score_sum": 120, "best_score": 70}
+    assert get_user_stats(db, "ana")["last_activity"] == START + timedelta(hours=4)
+    print("✓ First score, higher and lower re-scores")
+
+def test_foreign_or_missing_quiz():
+    """Scoring someone else's quiz changes nothing"""
+    print("Testing foreign quizzes...")
+    db = mongomock.MongoClient()['stats_test']
+    (quiz_id,) = create_quizzes(db, "ana", 1)
+    assert record_score(db, "ben", quiz_id, 90, START) is None
+    assert db.quiz_results.find_one({"_id": quiz_id}).get("score") is None
+    assert db.user_stats.find_one({"username": "ben"}) is None
+    print("✓ Foreign quiz ignored")
+
+def test_rebuild_matches_incremental():
+    """Recomputing from quiz_results gives the same documents the increments produced"""
+    print("Testing rebuild...")
+    db = mongomock.MongoClient()['stats_test']
+    for username, scores in (("ana", [60, 80, None, 40]), ("ben", [None, None]), ("cy", [100])):
+        for quiz_id, score in zip(create_quizzes(db, username, len(scores)), scores):
+            if score is not None:
+                record_score(db, username, quiz_id, score, START + timedelta(days=1))
+                # A re-score down and back up exercises both branches
+                record_score(db, username, quiz_id, score // 2, START + timedelta(days=1))
+                record_score(db, username, quiz_id, score, START + timedelta(days=1))
+    # Activity from scoring would not be in quiz_results; compare the totals rebuild owns
+    incremental = {doc["username"]: totals(db, doc["username"]) for doc in db.user_stats.find()}
+    db.user_stats.delete_many({})
+    assert rebuild(db) == 3
+    rebuilt = {doc["username"]: totals(db, doc["username"]) for doc in db.user_stats.find()}
+    assert rebuilt == incremental, (rebuilt, incremental)
+    assert incremental["ana"] == {"quiz_count": 4, "completed_count": 3, "score_sum": 180, "best_score": 80}
+    assert incremental["ben"]["best_score"] is None and incremental["ben"]["completed_count"] == 0
+    print("✓ Rebuild matches the incremental totals")
+
+def test_save_score_rejects_bad_scores():
+    """Non-finite, negative or larger-than-the-quiz scores never reach the running totals"""
+    print("Testing score validation...")
+    stack, app_module = fresh_worker()
+    with stack:
+        db = worker_database()
+        questions = [{"question": f"Q{i}?", "options": ["A", "B", "C", "D"], "answer": 0} for i in range(5)]
+        quiz_id = str(db.quiz_results.insert_one({"username": "reader", "date": START, "score": None,
+                                                  "quiz": {"summary": "S", "questions": questions}}).inserted_id)
+        client = logged_in_client(app_module)
+        for raw in ("Infinity", "-Infinity", "NaN", "1e12", "-1", "5.5", "true", '"4"'):
+            response = client.post('/save_score', data=f'{{"score": {raw}, "quiz_id": "{quiz_id}"}}',
+                                   content_type='application/json')
+            assert response.status_code == 400, (raw, response.status_code)
+        assert db.quiz_results.find_one()["score"] is None and db.user_stats.find_one() is None
+
+        assert client.post('/save_score', json={"score": 4, "quiz_id": quiz_id}).status_code == 200
+        assert client.post('/save_score', json={"score": 5, "quiz_id": "0" * 24}).status_code == 404
+        assert totals(db, "reader") == {"quiz_count": 1, "completed_count": 1, "score_sum": 4, "best_score": 4}
+    print("✓ Bad scores rejected")
+
+if __name__ == "__main__":
+    test_scores_and_rescores()
+    test_foreign_or_missing_quiz()
+    test_rebuild_matches_incremental()
+    test_save_score_rejects_bad_scores()
+    print("✓ All user stats tests passed!")
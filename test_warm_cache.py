@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script to verify corpus discovery and checkpoint resume for the cache warmup
+"""
+import json
+import os
+import sys
+import tempfile
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from warm_cache import corpus_items, load_checkpoint
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def test_corpus_items_are_distinct_stories():
+    """Text files and JSONL lines are found recursively; repeated passages are warmed once"""
+    print("Testing corpus discovery...")
+    with tempfile.TemporaryDirectory() as corpus:
+        write(os.path.join(corpus, "unit1", "fox.txt"), "The fox met a crow.")
+        write(os.path.join(corpus, "unit1", "fox copy.txt"), "The fox  met a crow.\n")
+        write(os.path.join(corpus, "unit2", "more.jsonl"),
+              json.dumps({"id": "lion", "text": "The lion slept."}) + "\n" + json.dumps({"id": "empty", "text": ""}))
+        write(os.path.join(corpus, "notes.csv"), "not a story")
+        write(os.path.join(corpus, ".warmup_checkpoint.jsonl"), "")
+        items = list(corpus_items(corpus))
+    assert [item_id for item_id, _, _ in items] == [os.path.join("unit1", "fox copy.txt"), "lion"]
+    print(f"✓ {len(items)} distinct stories")
+
+def test_checkpoint_resume():
+    """Done keys are skipped unless they expire too soon; a torn last line is ignored"""
+    print("Testing checkpoint...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoint.jsonl")
+        assert load_checkpoint(path, 0) == set()
+        write(path, json.dumps({"item": "a", "key": "k1", "expires_at": 2000}) + "\n"
+              + json.dumps({"item": "b", "key": "k2", "expires_at": 1000}) + "\n"
+              + '{"item": "c", "ke')
+        assert load_checkpoint(path, 1500) == {"k1"}
+    print("✓ Checkpoint resumes")
+
+if __name__ == "__main__":
+    test_corpus_items_are_distinct_stories()
+    test_checkpoint_resume()
+    print("✓ All warmup tests passed!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-user quiz statistics kept up to date as quizzes are created and scored
+
+One document per user in ``user_stats`` holds running totals, so the profile page
+reads a single document instead of aggregating the user's whole history. The
+totals are only ever changed with $inc/$max/$set, so concurrent requests from the
+same user do not lose updates.
+
+Usage:
+    python user_stats.py rebuild            # recompute every user's document from quiz_results
+    python user_stats.py rebuild <username> # recompute one user
+"""
+import sys
+
+from pymongo import ReturnDocument, UpdateOne
+
+EMPTY_STATS = {"quiz_count": 0, "completed_count": 0, "score_sum": 0, "best_score": None, "last_activity": None}
+
+
+def record_quiz_created(db, username, when, count=1):
+    """Count ``count`` newly generated quizzes"""
+    _update(db, username, {"$inc": {"quiz_count": count}, "$max": {"last_activity": when}})
+
+
+def record_score(db, username, quiz_id, score, when):
+    """Store ``score`` on a quiz and fold it into the user's totals.
+
+    Returns the quiz as it was before (_id, date and old score), or None when it does
+    not exist or belongs to someone else. A quiz that already had a score only
+    contributes the difference, so re-scoring never double counts.
+    """
+    previous = db.quiz_results.find_one_and_update(
+        {"_id": quiz_id, "username": username},
+        {"$set": {"score": score}},
+        projection={"score": 1, "date": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return None
+
+    old_score = previous.get("score")
+    if old_score is None:
+        increments = {"completed_count": 1, "score_sum": score}
+    else:
+        increments = {"score_sum": score - old_score}
+    _update(db, username, {"$inc": increments, "$max": {"best_score": score, "last_activity": when}})
+    if old_score is not None and score < old_score:
+        # The old score may have been the best one; $max cannot lower it, so look again
+        best = _aggregate(db, username)
+        best_score = best[0]["best_score"] if best else None
+        db.user_stats.update_one({"username": username}, {"$set": {"best_score": best_score}})
+    return previous
+
+
+def _update(db, username, update):
+    result = db.user_stats.update_one({"username": username}, update, upsert=True)
+    if result.upserted_id is not None:
+        # First write for a user who may already have history: start from the real totals
+        rebuild(db, username)
+
+
+def get_user_stats(db, username):
+    """The user's totals, rebuilt from history the first time they are needed"""
+    stats = db.user_stats.find_one({"username": username}, {"_id": 0})
+    if stats is None:
+        rebuild(db, username)
+        stats = db.user_stats.find_one({"username": username}, {"_id": 0}) or {}
+    return stats
+
+
+def _aggregate(db, username=None):
+    pipeline = [{"$match": {"username": username}}] if username else []
+    pipeline.append({"$group": {
+        "_id": "$username",
+        "quiz_count": {"$sum": 1},
+        # $sum and $max skip quizzes that were never scored
+        "completed_count": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$score", None]}, None]}, 0, 1]}},
+        "score_sum": {"$sum": "$score"},
+        "best_score": {"$max": "$score"},
+        "last_activity": {"$max": "$date"}
+    }})
+    return list(db.quiz_results.aggregate(pipeline))
+
+
+def rebuild(db, username=None):
+    """Recompute user_stats from quiz_results for one user or everyone; returns the count written"""
+    operations = []
+    rows = _aggregate(db, username)
+    if username and not rows:
+        rows = [dict(EMPTY_STATS, _id=username)]
+    for row in rows:
+        # Fields that have no value yet (never scored) are left out, so $max starts from the first score
+        update = {"$set": {key: row[key] for key in EMPTY_STATS if row[key] is not None}}
+        unset = {key: "" for key in EMPTY_STATS if row[key] is None}
+        if unset:
+            update["$unset"] = unset
+        operations.append(UpdateOne({"username": row["_id"]}, update, upsert=True))
+    if operations:
+        db.user_stats.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def main(argv):
+    from db_indexes import connect_from_env, ensure_indexes
+
+    if len(argv) < 2 or argv[1] != 'rebuild':
+        print(__doc__)
+        return 2
+    db = connect_from_env()
+    ensure_indexes(db)
+    written = rebuild(db, argv[2] if len(argv) > 2 else None)
+    print(f"✅ Rebuilt stats for {written} user(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -77,11 +77,17 @@ def main():
         'flask',
         'flask_cors',
         'flask_bcrypt',
+        'bcrypt',
         'flask_pymongo',
         'flask_wtf',
         'flask_mail',
         'requests',
-        'dotenv'
+        'dotenv',
+        'numpy',
+        'scipy',
+        'httpx',
+        'uvicorn',
+        'asgiref'
     ]
     
     for package in packages:
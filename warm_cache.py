@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Pre-generate quizzes for a story corpus into the shared result cache
+
+/generate looks quizzes up in the ``generation_cache`` collection by story content and
+pipeline version, so a passage warmed here is a cache hit for every worker. Stories are
+read from a directory (``*.txt``, ``*.md`` and ``*.jsonl`` with a ``text`` key, searched
+recursively) and generated on a process pool.
+
+Finished items are appended to a checkpoint file (by default ``.warmup_checkpoint.jsonl``
+in the corpus directory) with their cache key and expiry. An interrupted run picks up
+where it stopped. Re-running later only redoes passages that changed, passages whose
+entry is about to expire, or a corpus generated with an older pipeline version.
+
+Usage:
+    python warm_cache.py <corpus_dir> [--processes N] [--ttl SECONDS] [--checkpoint PATH] [--restart]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import quiz_pipeline
+from result_cache import make_cache_key
+
+# Warmed quizzes outlive regular cache entries: long enough for a school day and the next morning
+WARM_TTL = int(os.environ.get('WARM_CACHE_TTL', 36 * 3600))
+# Passages whose entry expires sooner than this are generated again
+REFRESH_MARGIN = 6 * 3600
+STORY_SUFFIXES = ('.txt', '.md', '.jsonl')
+PROGRESS_EVERY = 50
+
+# Set in each pool process by _init_worker
+_worker_ttl = WARM_TTL
+
+
+def corpus_files(corpus_dir):
+    paths = []
+    for root, _, files in os.walk(corpus_dir):
+        paths += [os.path.join(root, name) for name in files
+                  if name.endswith(STORY_SUFFIXES) and not name.startswith('.')]
+    return sorted(paths)
+
+
+def corpus_items(corpus_dir):
+    """(item id, cache key, story text) for every distinct story in the corpus"""
+    seen = set()
+    for record in quiz_pipeline.read_stories(corpus_files(corpus_dir)):
+        text = (record.get('text') or '').strip()
+        if not text:
+            continue
+        key = make_cache_key(text, quiz_pipeline.GENERATION_VERSION)
+        if key in seen:
+            continue
+        seen.add(key)
+        item = record.get('id') or os.path.relpath(record['source'], corpus_dir)
+        yield str(item), key, text
+
+
+def load_checkpoint(path, min_expiry):
+    """Cache keys already warmed that stay valid until at least ``min_expiry`` (epoch seconds)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if entry.get('expires_at', 0) >= min_expiry:
+                done.add(entry['key'])
+    return done
+
+
+def _init_worker(ttl):
+    from db_indexes import connect_from_env
+
+    global _worker_ttl
+    _worker_ttl = ttl
+    # The pipeline logs with print(); keep the progress output readable
+    sys.stdout = sys.stderr
+    try:
+        # One client per process, created after the fork
+        quiz_pipeline.result_cache.attach(connect_from_env().generation_cache)
+    except Exception as e:
+        # An initializer that raises makes the pool respawn it forever; fail the items instead
+        print(f"Warmup worker could not reach MongoDB: {e}")
+
+
+def warm_item(item):
+    """Make sure one story's quiz is in the shared cache for the warmup TTL"""
+    item_id, key, text = item
+    cache = quiz_pipeline.result_cache
+    if cache.collection is None:
+        return item_id, key, 'failed', "result cache has no database"
+    entry = cache.get(key)
+    status = 'refreshed'
+    if entry is None:
+        entry = quiz_pipeline.generate_quiz_entry(text)
+        status = 'generated'
+        if not entry.get('cacheable'):
+            # A fallback after a model error: leave it for the next run instead of pinning it
+            return item_id, key, 'failed', "model unavailable, fallback quiz not cached"
+    cache.set(key, entry, ttl=_worker_ttl)
+    return item_id, key, status, None
+
+
+def warm(corpus_dir, checkpoint_path, processes=None, ttl=WARM_TTL, restart=False):
+    """Warm every pending corpus item; returns counts per status plus timing"""
+    processes = processes or os.cpu_count() or 1
+    now = time.time()
+    done = set() if restart else load_checkpoint(checkpoint_path, now + REFRESH_MARGIN)
+    items = list(corpus_items(corpus_dir))
+    pending = [item for item in items if item[1] not in done]
+    counts = {"total": len(items), "skipped": len(items) - len(pending),
+              "generated": 0, "refreshed": 0, "failed": 0}
+    print(f"Warming {len(pending)} of {len(items)} stories on {processes} processes "
+          f"({counts['skipped']} already done)")
+
+    started = time.perf_counter()
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+            multiprocessing.Pool(processes, initializer=_init_worker, initargs=(ttl,)) as pool:
+        for finished, (item_id, key, status, error) in enumerate(pool.imap_unordered(warm_item, pending), 1):
+            counts[status] += 1
+            if error:
+                print(f"⚠️ {item_id}: {error}")
+            else:
+                checkpoint.write(json.dumps({"item": item_id, "key": key,
+                                             "expires_at": round(time.time() + ttl)}) + "\n")
+                checkpoint.flush()
+            if finished % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  {finished}/{len(pending)} ({finished / elapsed:.1f} items/s)")
+
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    counts["items_per_second"] = round(len(pending) / counts["seconds"], 2) if counts["seconds"] else 0.0
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate quizzes for a story corpus into the result cache")
+    parser.add_argument('corpus_dir')
+    parser.add_argument('-p', '--processes', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--ttl', type=int, default=WARM_TTL, help="seconds warmed quizzes stay cached")
+    parser.add_argument('--checkpoint', help="progress file (default: <corpus_dir>/.warmup_checkpoint.jsonl)")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and warm everything")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.corpus_dir):
+        print(f"❌ {args.corpus_dir} is not a directory")
+        return 2
+    if not os.environ.get('MONGO_URI'):
+        print("❌ MONGO_URI must be set: warmed quizzes go to the shared result cache")
+        return 2
+    checkpoint = args.checkpoint or os.path.join(args.corpus_dir, '.warmup_checkpoint.jsonl')
+    counts = warm(args.corpus_dir, checkpoint, args.processes, args.ttl, args.restart)
+    print(f"✅ {counts['generated']} generated, {counts['refreshed']} refreshed, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped in {counts['seconds']}s ({counts['items_per_second']} items/s)")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
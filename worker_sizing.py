@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Gunicorn worker and thread counts derived from the CPUs and memory this container gets
+
+Workers follow the usual 2 x CPUs + 1, capped by how many fit in memory (each worker
+holds its own copy of numpy, scipy and the Flask app). CPU quotas and memory limits
+are read from the cgroup, so a 0.5 CPU / 512 MB instance gets 2 workers rather than
+whatever the host has. Threads are sized for the two request classes of app.py:
+GENERATION_SLOTS + GENERATION_QUEUE threads may be taken by quiz generation (see
+concurrency_limiter.py), and PAGE_THREADS more are always left for pages, login and
+static files.
+
+WEB_CONCURRENCY and GUNICORN_THREADS override the computed values.
+
+Usage:
+    python worker_sizing.py      # print the plan for this machine
+"""
+import json
+import os
+
+from concurrency_limiter import ConcurrencyLimiter
+
+# Resident memory of one worker after preloading; measure with ps when dependencies change
+DEFAULT_WORKER_MEMORY_MB = 200
+# Left for the master process, the page cache and spikes
+MEMORY_HEADROOM = 0.2
+# No cgroup limit: v1 reports a number close to 2**63
+UNLIMITED = 1 << 60
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def available_cpus():
+    """CPUs this process may use: the cgroup quota when there is one, else the affinity mask"""
+    quota = period = None
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+    else:
+        quota = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    try:
+        if quota not in (None, 'max', '-1') and int(period) > 0:
+            return int(quota) / int(period)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory():
+    """Bytes of memory this process may use: the cgroup limit when there is one, else physical memory"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        limit = _read(path)
+        if limit and limit.isdigit() and int(limit) < UNLIMITED:
+            return int(limit)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def plan(cpus=None, memory=None, environ=os.environ):
+    """Workers, threads and timeout for gunicorn_config.py, with the inputs that produced them"""
+    cpus = cpus if cpus is not None else available_cpus()
+    memory = memory if memory is not None else available_memory()
+    worker_mb = int(environ.get('WORKER_MEMORY_MB', DEFAULT_WORKER_MEMORY_MB))
+
+    workers = int(2 * cpus) + 1
+    if memory:
+        workers = min(workers, int(memory * (1 - MEMORY_HEADROOM) // (worker_mb << 20)))
+    workers = max(1, workers)
+
+    generation = ConcurrencyLimiter.from_env(environ=environ)
+    threads = generation.limit + generation.max_queue + int(environ.get('PAGE_THREADS', 4))
+
+    return {
+        "workers": int(environ.get('WEB_CONCURRENCY') or workers),
+        "threads": int(environ.get('GUNICORN_THREADS') or threads),
+        "timeout": int(environ.get('GUNICORN_TIMEOUT', 300)),
+        "cpus": round(cpus, 2),
+        "memory_mb": memory >> 20 if memory else None,
+        "worker_memory_mb": worker_mb,
+        "generation_threads": generation.limit + generation.max_queue
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(plan(), indent=2))